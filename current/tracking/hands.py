@@ -39,15 +39,19 @@ from mediapipe.tasks.python import vision
 
 # Add eye_tracking to path for nose tracker import
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "eye_tracking"))
-from nose_tracker import NoseTracker
+from nose_tracker import SCREEN_H, SCREEN_W, NoseTracker
 
 # Add voice_nav to path for voice control
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "voice_nav"))
-from stt_elevenlabs import transcribe_from_mic, ElevenLabsSTTError
-from typing_control import type_text
+from stt_elevenlabs import STT_URL, ElevenLabsSTTError
+from stt_router import get_router, transcribe_from_mic
+from audio_capture import DEFAULT_MAX_DURATION_SEC, PrerollCapture
+from typing_control import IncrementalTyper, type_text
+from http_client import prewarm
+from spatial_index import PointerSnapper, SpatialIndex
 
 # from element_selector import capture_screen
-from ai_client import query_openrouter, OpenRouterError
+from ai_client import OPENROUTER_API_URL, stream_openrouter, OpenRouterError
 
 # =========================
 # CONFIG
@@ -62,6 +66,10 @@ DOUBLE_CLICK_WINDOW = 0.35
 HOLD_TIME = 0.5  # For ONE gesture
 TWO_TRIGGER_TIME = 0.1  # For TWO gesture (nose mode)
 
+# Snap the nose cursor onto detected UI elements while it dwells
+NOSE_SNAP = os.getenv("VOICE_NAV_NOSE_SNAP") == "1"
+SNAP_REFRESH_SEC = 1.0  # how often elements are re-detected in eye mode
+
 BASE_GAIN = 35
 MAX_GAIN = 120
 SMOOTHING_ALPHA = 0.3
@@ -98,7 +106,8 @@ prev_vm = False  # Track previous voice mode state
 gesture_start = {"ONE": None, "TWO": None}
 
 # Nose tracker instance
-nose_tracker = NoseTracker()
+snapper = PointerSnapper() if NOSE_SNAP else None
+nose_tracker = NoseTracker(snapper=snapper)
 
 last_pinch_time = 0.0
 pinch_active = False
@@ -107,7 +116,9 @@ pinch_active = False
 voice_recording = False
 voice_result = None
 voice_start_time = 0.0
-VOICE_RECORD_DURATION = 6.0  # matches DEFAULT_DURATION_SEC in stt_elevenlabs
+VOICE_RECORD_DURATION = DEFAULT_MAX_DURATION_SEC  # capture stops earlier on silence
+VOICE_PREROLL_SEC = 1.5  # keep mic audio from while ONE is held; 0 disables
+voice_preroll = None
 
 # Voice mode state
 voice_mode_active = False
@@ -151,7 +162,7 @@ def voice_record_thread():
     """Background thread to record and transcribe voice."""
     global voice_recording, voice_result
     try:
-        transcript = transcribe_from_mic()
+        transcript = transcribe_from_mic(preroll=voice_preroll)
         voice_result = ("success", transcript)
         print(f"[Voice Mode] Transcription successful: {transcript}")
     except ElevenLabsSTTError as e:
@@ -166,6 +177,20 @@ def voice_record_thread():
     voice_recording = False
 
 
+def start_voice_preroll():
+    """Start always-on mic capture so speech during the ONE hold isn't lost."""
+    global voice_preroll
+
+    if VOICE_PREROLL_SEC <= 0 or voice_preroll is not None:
+        return
+    try:
+        voice_preroll = PrerollCapture(preroll_sec=VOICE_PREROLL_SEC)
+        voice_preroll.start()
+    except Exception as e:
+        print(f"[Voice Mode] Pre-roll capture unavailable: {e}")
+        voice_preroll = None
+
+
 def start_voice_mode():
     """Start voice mode: record speech and type directly."""
     global voice_mode_active, voice_recording, voice_result, voice_start_time
@@ -183,6 +208,30 @@ def start_voice_mode():
     print("Recording... speak now")
 
 
+def snap_refresh_thread():
+    """Re-detect screen elements for nose snapping while eye mode is on."""
+    from element_selector import get_detector
+    from screen_capture import capture_gray
+
+    while nose_tracker.active:
+        try:
+            gray = capture_gray()
+            boxes = get_detector().detect(gray).boxes.astype(np.float64)
+            # Scale to the tracker's screen size. It writes REL_X as -dx, so
+            # its x axis runs opposite to the screen's.
+            scale_x = SCREEN_W / gray.shape[1]
+            scale_y = SCREEN_H / gray.shape[0]
+            boxes[:, 0] = SCREEN_W - (boxes[:, 0] + boxes[:, 2]) * scale_x
+            boxes[:, 1] *= scale_y
+            boxes[:, 2] *= scale_x
+            boxes[:, 3] *= scale_y
+            snapper.set_index(SpatialIndex(boxes))
+        except Exception as e:
+            print(f"Snap target refresh failed: {e}")
+        time.sleep(SNAP_REFRESH_SEC)
+    snapper.set_index(None)
+
+
 def process_voice_result():
     """Process completed voice transcription: type directly or query AI."""
     global voice_result, voice_mode_active
@@ -210,13 +259,16 @@ def process_voice_result():
     # Check if query contains "triad" - if so, send to AI
     if "ai" in lower:
         print("Triad detected - querying AI...")
+        typer = IncrementalTyper()
         try:
-            response = query_openrouter(transcript)
-            print(f"AI response: {response}")
-            type_text(response)
+            for delta in stream_openrouter(transcript):
+                typer.push(delta)
         except OpenRouterError as e:
             print(f"AI query failed: {e}")
-            type_text(transcript)
+            if not typer.finish():
+                type_text(transcript)
+        else:
+            print(f"AI response: {typer.finish()}")
     else:
         print(f"Typing: {transcript}")
         type_text(transcript)
@@ -390,6 +442,8 @@ def run_tracking(trigger_voice_mode=None):
         last_blink_time
 
     cap = cv2.VideoCapture(1)
+    start_voice_preroll()
+    get_router()  # starts loading local Whisper if the router uses it
     print("FINAL gesture pipeline running (ESC to quit)")
 
     while True:
@@ -494,6 +548,9 @@ def run_tracking(trigger_voice_mode=None):
             if current_gesture == g:
                 if gesture_start[g] is None:
                     gesture_start[g] = now
+                    if g == "ONE":
+                        # Open API connections while the hold is still timing.
+                        prewarm(STT_URL, OPENROUTER_API_URL)
             else:
                 gesture_start[g] = None
 
@@ -511,6 +568,8 @@ def run_tracking(trigger_voice_mode=None):
         # Start/stop nose tracker when eye mode changes
         if em and not prev_em:
             nose_tracker.start()
+            if snapper is not None:
+                threading.Thread(target=snap_refresh_thread, daemon=True).start()
         elif not em and prev_em:
             nose_tracker.stop()
         prev_em = em
@@ -585,8 +644,7 @@ def run_tracking(trigger_voice_mode=None):
 
         # Voice recording overlay
         if voice_recording:
-            elapsed = now - voice_start_time
-            remaining = max(0, VOICE_RECORD_DURATION - elapsed)
+            elapsed = min(now - voice_start_time, VOICE_RECORD_DURATION)
 
             # Semi-transparent red overlay
             overlay = frame.copy()
@@ -598,14 +656,22 @@ def run_tracking(trigger_voice_mode=None):
             cv2.circle(frame, (30, 40), 12, (0, 0, pulse + 128), -1)
             cv2.putText(
                 frame,
-                f"RECORDING... {remaining:.1f}s",
+                f"LISTENING... {elapsed:.1f}s",
                 (50, 50),
                 FONT,
                 1.0,
                 (255, 255, 255),
                 2,
             )
-            cv2.putText(frame, "Speak now!", (50, 75), FONT, 0.6, (200, 200, 255), 1)
+            cv2.putText(
+                frame,
+                "Speak now - stops when you pause",
+                (50, 75),
+                FONT,
+                0.6,
+                (200, 200, 255),
+                1,
+            )
 
         cv2.imshow("Gesture Control Pipeline", frame)
 
@@ -613,6 +679,8 @@ def run_tracking(trigger_voice_mode=None):
             break
 
     nose_tracker.stop()
+    if voice_preroll is not None:
+        voice_preroll.stop()
     cap.release()
     cv2.destroyAllWindows()
 
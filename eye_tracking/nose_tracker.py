@@ -297,10 +297,16 @@ def main():
 
 
 class NoseTracker:
-    """Reusable nose tracker that can be started/stopped"""
+    """Reusable nose tracker that can be started/stopped
 
-    def __init__(self):
+    An optional snapper (e.g. voice_nav's ``PointerSnapper``) can pull the
+    cursor onto on-screen elements; it gets screen coordinates, so its
+    elements must be scaled to SCREEN_W x SCREEN_H.
+    """
+
+    def __init__(self, snapper=None):
         self.landmarker = None
+        self.snapper = snapper
         self.calibration = NoseCalibration()
         self.curr_x, self.curr_y = SCREEN_W // 2, SCREEN_H // 2
         self.prev_nose_x, self.prev_nose_y = None, None
@@ -422,6 +428,8 @@ class NoseTracker:
             # Smooth cursor movement
             new_x = self.curr_x + SMOOTH_FACTOR * (target_x - self.curr_x)
             new_y = self.curr_y + SMOOTH_FACTOR * (target_y - self.curr_y)
+            if self.snapper is not None:
+                new_x, new_y = self.snapper.apply(new_x, new_y, target_x, target_y)
 
             dx = int(new_x - self.curr_x)
             dy = int(new_y - self.curr_y)
@@ -1,13 +1,20 @@
 """OpenRouter AI client for querying language models."""
 
-import base64
+import asyncio
+import json
 import logging
 import os
-from typing import Optional
+import time
+from typing import Iterator, Optional, Sequence
 
 from PIL import Image
 import requests
 
+import http_client
+from model_selector import ModelSelector, run_with_timeout
+from response_cache import ResponseCache, make_key
+from vision_payload import encode_screenshot
+
 logger = logging.getLogger(__name__)
 
 OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
@@ -18,71 +25,114 @@ CHEAP_MODELS = [
     "meta-llama/llama-3.1-8b-instruct",
     "google/gemma-2-27b-it",
 ]
+# Interchangeable models per request class, in preference order.
+TEXT_MODELS = [DEFAULT_MODEL] + [m for m in CHEAP_MODELS if m != DEFAULT_MODEL]
+VISION_MODELS = [VISION_MODEL, "openai/gpt-4o-mini"]
+TEXT_DEADLINE_SEC = 30.0
+VISION_DEADLINE_SEC = 60.0
+HEDGE_CONCURRENCY = 2  # cheap models in flight at once
+HEDGE_MODEL_TIMEOUT_SEC = 15.0
+
+TEXT_SYSTEM_PROMPT = "You are a helpful assistant. Provide concise, accurate responses."
+VISION_SYSTEM_PROMPT = """You are an AI assistant helping a user fill in an input field on their screen.
+
+The user is looking at an application (shown in the screenshot) and has an input field focused.
+They've asked you a question or requested content to type into that field.
+
+IMPORTANT GUIDELINES:
+1. Look at the screenshot to understand the context - what application is open, what form/field the user is likely filling in
+2. Generate a response that is DIRECTLY suitable to paste into the input field
+3. Do NOT include explanations, preambles, or meta-commentary
+4. Do NOT use markdown formatting, bullet points, or special characters unless the input field clearly expects them
+5. Match the tone and format expected by the input field (e.g., formal for email, casual for chat, code for a code editor)
+6. If the screenshot shows a search bar, provide search terms. If it's a message field, write the message. If it's a form field, provide appropriate form data.
+7. Keep your response concise and directly usable - the user will type this verbatim
+
+Respond with ONLY the text that should be typed into the input field."""
 
 
 class OpenRouterError(Exception):
     pass
 
 
-def _image_to_base64(image: Image.Image) -> str:
-    """Convert PIL Image to base64 data URL."""
-    import io
-    buffer = io.BytesIO()
-    image.save(buffer, format="PNG")
-    b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-    return f"data:image/png;base64,{b64}"
+_response_cache = ResponseCache()
+_selector = ModelSelector({"text": TEXT_MODELS, "vision": VISION_MODELS})
 
 
-def query_openrouter(
-    query: str,
-    model: Optional[str] = None,
-    api_key: Optional[str] = None,
-) -> str:
-    """Send a query to OpenRouter API and return the response.
-
-    Args:
-        query: User's question or query text
-        model: Model to use (defaults to DEFAULT_MODEL)
-        api_key: OpenRouter API key (defaults to env variable)
+def cache_stats() -> dict:
+    """Hit/miss metrics of the text response cache."""
+    return _response_cache.stats()
 
-    Returns:
-        AI response text
 
-    Raises:
-        OpenRouterError: If API request fails
-    """
-    key = api_key or os.getenv("OPENROUTER_API_KEY")
-    if not key:
-        raise OpenRouterError("Missing OPENROUTER_API_KEY")
+def model_stats() -> dict[str, dict]:
+    """Rolling latency, error rate, throughput and breaker state per model."""
+    return _selector.summary()
 
-    selected_model = model or DEFAULT_MODEL
 
-    headers = {
+def _headers(key: str) -> dict:
+    return {
         "Authorization": f"Bearer {key}",
         "Content-Type": "application/json",
         "HTTP-Referer": "https://github.com",
         "X-Title": "voice-nav",
     }
 
-    payload = {
-        "model": selected_model,
+
+def _api_key(api_key: Optional[str]) -> str:
+    key = api_key or os.getenv("OPENROUTER_API_KEY")
+    if not key:
+        raise OpenRouterError("Missing OPENROUTER_API_KEY")
+    return key
+
+
+def _text_payload(query: str, model: str) -> dict:
+    return {
+        "model": model,
         "messages": [
-            {
-                "role": "system",
-                "content": "You are a helpful assistant. Provide concise, accurate responses.",
-            },
+            {"role": "system", "content": TEXT_SYSTEM_PROMPT},
             {"role": "user", "content": query},
         ],
     }
 
+
+def _vision_payload(query: str, screenshot: Image.Image, model: str) -> dict:
+    # Reuses an encode already started for this screenshot, if any.
+    images = encode_screenshot(screenshot).result()
+    content = [{"type": "text", "text": query}]
+    if len(images) > 1:
+        labels = "; ".join(
+            f"image {i + 1}: {img.label}" for i, img in enumerate(images)
+        )
+        content.append({"type": "text", "text": f"Screenshots ({labels})."})
+    content.extend(
+        {"type": "image_url", "image_url": {"url": img.data_url}} for img in images
+    )
+    logger.info(
+        f"Vision payload: {sum(img.upload_bytes for img in images)} image bytes, "
+        f"encoded in {sum(img.encode_ms for img in images):.0f} ms"
+    )
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": VISION_SYSTEM_PROMPT},
+            {"role": "user", "content": content},
+        ],
+    }
+
+
+def _complete(payload: dict, key: str, timeout: float) -> tuple[str, Optional[int]]:
     try:
-        logger.info(f"Querying OpenRouter with model: {selected_model}")
-        resp = requests.post(
-            OPENROUTER_API_URL, headers=headers, json=payload, timeout=30
+        resp = http_client.post(
+            OPENROUTER_API_URL, headers=_headers(key), json=payload, timeout=timeout
         )
     except requests.RequestException as e:
         raise OpenRouterError(f"Request failed: {e}")
+    return _completion_content(resp)
+
 
+def _completion_content(resp) -> tuple[str, Optional[int]]:
+    # Works for both requests and httpx responses; also returns the
+    # completion token count when the API reports usage.
     if resp.status_code != 200:
         raise OpenRouterError(f"API error {resp.status_code}: {resp.text}")
 
@@ -93,95 +143,380 @@ def query_openrouter(
 
     try:
         content = data["choices"][0]["message"]["content"]
-        logger.info(f"Received response: {len(content)} characters")
-        return content.strip()
     except (KeyError, IndexError) as e:
         raise OpenRouterError(f"Unexpected response format: {e}")
+    return content, (data.get("usage") or {}).get("completion_tokens")
 
 
-def query_openrouter_with_vision(
+async def _acomplete(
+    payload: dict, key: str, timeout: float
+) -> tuple[str, Optional[int]]:
+    import httpx
+
+    client = http_client.get_async_client()
+    try:
+        resp = await client.post(
+            OPENROUTER_API_URL, headers=_headers(key), json=payload, timeout=timeout
+        )
+    except httpx.TimeoutException:
+        raise OpenRouterError(f"Timed out after {timeout:.0f}s")
+    except httpx.HTTPError as e:
+        raise OpenRouterError(f"Request failed: {e}")
+    return _completion_content(resp)
+
+
+def _stream_completion(payload: dict, key: str, timeout: float) -> Iterator[str]:
+    """POST with ``stream: true`` and yield content deltas from the SSE body."""
+    start = time.perf_counter()
+    try:
+        resp = http_client.post(
+            OPENROUTER_API_URL,
+            headers=_headers(key),
+            json={**payload, "stream": True},
+            timeout=timeout,
+            stream=True,
+        )
+    except requests.RequestException as e:
+        raise OpenRouterError(f"Request failed: {e}")
+
+    try:
+        if resp.status_code != 200:
+            raise OpenRouterError(f"API error {resp.status_code}: {resp.text}")
+
+        first_token_ms = None
+        chars = 0
+        for data in _sse_data(resp):
+            if data == "[DONE]":
+                break
+            try:
+                chunk = json.loads(data)
+            except ValueError as e:
+                raise OpenRouterError(f"Invalid stream chunk: {e}")
+            if chunk.get("error"):
+                raise OpenRouterError(f"Stream error: {chunk['error']}")
+            try:
+                delta = chunk["choices"][0].get("delta", {}).get("content") or ""
+            except (KeyError, IndexError) as e:
+                raise OpenRouterError(f"Unexpected stream format: {e}")
+            if not delta:
+                continue
+            if first_token_ms is None:
+                first_token_ms = (time.perf_counter() - start) * 1000
+                logger.info(f"First token after {first_token_ms:.0f} ms")
+            chars += len(delta)
+            yield delta
+        logger.info(
+            f"Stream finished: {chars} characters in "
+            f"{(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+    except requests.RequestException as e:
+        raise OpenRouterError(f"Stream interrupted: {e}")
+    finally:
+        resp.close()
+
+
+def _sse_data(resp) -> Iterator[str]:
+    """Yield the ``data:`` payloads of a server-sent event stream.
+
+    Comment lines (OpenRouter sends ``: OPENROUTER PROCESSING`` keep-alives)
+    and other fields are skipped; multi-line data is joined per event.
+    """
+    lines = []
+    for line in resp.iter_lines():
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line:
+            if lines:
+                yield "\n".join(lines)
+                lines = []
+        elif line.startswith("data:"):
+            lines.append(line[5:].lstrip(" "))
+    if lines:
+        yield "\n".join(lines)
+
+
+def _routed_complete(
+    model_class: str,
+    model: Optional[str],
+    build_payload,
+    key: str,
+    deadline_sec: float,
+) -> str:
+    """Complete on ``model``, or on the best model of the class with retries."""
+
+    def attempt(name: str, timeout: float):
+        return _complete(build_payload(name), key, timeout)
+
+    if model is not None:
+        start = time.perf_counter()
+        try:
+            content, tokens = run_with_timeout(
+                attempt, deadline_sec, model, deadline_sec
+            )
+        except TimeoutError as e:
+            _selector.record(model, ok=False)
+            raise OpenRouterError(str(e))
+        except OpenRouterError:
+            _selector.record(model, ok=False)
+            raise
+        _selector.record(model, True, (time.perf_counter() - start) * 1000, tokens)
+        return content
+
+    try:
+        return _selector.call(
+            model_class, attempt, deadline_sec, retry_on=(OpenRouterError,)
+        )
+    except TimeoutError as e:
+        raise OpenRouterError(str(e))
+
+
+def _recorded_stream(model: str, deltas: Iterator[str]) -> Iterator[str]:
+    # Streams only feed health stats: once text is typed there is no retry,
+    # and stream timing isn't comparable with blocking-call latency.
+    try:
+        yield from deltas
+    except OpenRouterError:
+        _selector.record(model, ok=False)
+        raise
+    _selector.record(model, ok=True)
+
+
+def query_openrouter(
     query: str,
-    screenshot: Image.Image,
     model: Optional[str] = None,
     api_key: Optional[str] = None,
+    use_cache: bool = True,
 ) -> str:
-    """Send a query with screenshot to OpenRouter vision model.
+    """Send a query to OpenRouter API and return the response.
 
     Args:
         query: User's question or query text
-        screenshot: PIL Image of the current screen
-        model: Model to use (defaults to VISION_MODEL)
+        model: Model to use (defaults to the fastest healthy of TEXT_MODELS,
+            with retries on the others)
         api_key: OpenRouter API key (defaults to env variable)
+        use_cache: Answer repeated queries from the response cache
 
     Returns:
-        AI response text suitable for typing into an input field
+        AI response text
 
     Raises:
         OpenRouterError: If API request fails
     """
-    key = api_key or os.getenv("OPENROUTER_API_KEY")
-    if not key:
-        raise OpenRouterError("Missing OPENROUTER_API_KEY")
+    cache_key = make_key(query, model or "text", TEXT_SYSTEM_PROMPT)
+    if use_cache:
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Response cache hit ({cache_stats()})")
+            return cached
+    key = _api_key(api_key)
+
+    logger.info(f"Querying OpenRouter with model: {model or 'auto'}")
+    content = _routed_complete(
+        "text",
+        model,
+        lambda name: _text_payload(query, name),
+        key,
+        TEXT_DEADLINE_SEC,
+    )
+    logger.info(f"Received response: {len(content)} characters")
+    content = content.strip()
+    if use_cache and content:
+        _response_cache.put(cache_key, content)
+    return content
+
+
+def stream_openrouter(
+    query: str,
+    model: Optional[str] = None,
+    api_key: Optional[str] = None,
+    use_cache: bool = True,
+) -> Iterator[str]:
+    """Like ``query_openrouter`` but yield response text as it is generated.
 
-    selected_model = model or VISION_MODEL
-    image_url = _image_to_base64(screenshot)
+    A cached response is yielded in one piece; a completed stream is cached.
 
-    headers = {
-        "Authorization": f"Bearer {key}",
-        "Content-Type": "application/json",
-        "HTTP-Referer": "https://github.com",
-        "X-Title": "voice-nav",
-    }
+    Raises:
+        OpenRouterError: If the request fails or the stream breaks off
+    """
+    cache_key = make_key(query, model or "text", TEXT_SYSTEM_PROMPT)
+    if use_cache:
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Response cache hit ({cache_stats()})")
+            yield cached
+            return
+    key = _api_key(api_key)
+    selected_model = model or _selector.candidates("text")[0]
+
+    logger.info(f"Streaming from OpenRouter with model: {selected_model}")
+    parts = []
+    deltas = _stream_completion(
+        _text_payload(query, selected_model), key, timeout=TEXT_DEADLINE_SEC
+    )
+    for delta in _recorded_stream(selected_model, deltas):
+        parts.append(delta)
+        yield delta
+    content = "".join(parts).strip()
+    if use_cache and content:
+        _response_cache.put(cache_key, content)
+
+
+async def query_openrouter_hedged(
+    query: str,
+    models: Optional[Sequence[str]] = None,
+    api_key: Optional[str] = None,
+    max_concurrency: int = HEDGE_CONCURRENCY,
+    model_timeout_sec: float = HEDGE_MODEL_TIMEOUT_SEC,
+    use_cache: bool = True,
+) -> str:
+    """Send a query to several models at once and return the first answer.
 
-    system_prompt = """You are an AI assistant helping a user fill in an input field on their screen.
+    Up to ``max_concurrency`` models are queried at a time, in order; when
+    one fails or times out the next model in the list takes its slot. The
+    first non-empty answer wins and the remaining requests are cancelled.
 
-The user is looking at an application (shown in the screenshot) and has an input field focused.
-They've asked you a question or requested content to type into that field.
+    Args:
+        query: User's question or query text
+        models: Models to race (defaults to TEXT_MODELS, best first)
+        api_key: OpenRouter API key (defaults to env variable)
+        max_concurrency: Requests in flight at once
+        model_timeout_sec: Wall-clock limit for each model's request
+        use_cache: Answer repeated queries from the response cache
 
-IMPORTANT GUIDELINES:
-1. Look at the screenshot to understand the context - what application is open, what form/field the user is likely filling in
-2. Generate a response that is DIRECTLY suitable to paste into the input field
-3. Do NOT include explanations, preambles, or meta-commentary
-4. Do NOT use markdown formatting, bullet points, or special characters unless the input field clearly expects them
-5. Match the tone and format expected by the input field (e.g., formal for email, casual for chat, code for a code editor)
-6. If the screenshot shows a search bar, provide search terms. If it's a message field, write the message. If it's a form field, provide appropriate form data.
-7. Keep your response concise and directly usable - the user will type this verbatim
+    Returns:
+        AI response text
 
-Respond with ONLY the text that should be typed into the input field."""
+    Raises:
+        OpenRouterError: If every model fails
+    """
+    candidates = list(models or _selector.candidates("text"))
+    if not candidates:
+        raise OpenRouterError("No models to query")
+    cache_keys = {m: make_key(query, m, TEXT_SYSTEM_PROMPT) for m in candidates}
+    if use_cache:
+        for model in candidates:
+            cached = _response_cache.get(cache_keys[model])
+            if cached is not None:
+                logger.info(f"Response cache hit for {model} ({cache_stats()})")
+                return cached
+    key = _api_key(api_key)
+
+    start = time.perf_counter()
+    slots = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def ask(model: str) -> str:
+        async with slots:
+            call_start = time.perf_counter()
+            try:
+                # httpx timeouts apply per read; a model trickling bytes (or
+                # keep-alive whitespace) would never hit them.
+                try:
+                    content, tokens = await asyncio.wait_for(
+                        _acomplete(
+                            _text_payload(query, model), key, timeout=model_timeout_sec
+                        ),
+                        model_timeout_sec,
+                    )
+                except asyncio.TimeoutError:
+                    raise OpenRouterError(f"Timed out after {model_timeout_sec:.0f}s")
+                content = content.strip()
+                if not content:
+                    raise OpenRouterError("Empty response")
+            except OpenRouterError:
+                _selector.record(model, ok=False)
+                raise
+        latency_ms = (time.perf_counter() - call_start) * 1000
+        _selector.record(model, True, latency_ms, tokens)
+        return content
+
+    tasks = {asyncio.create_task(ask(model)): model for model in candidates}
+    pending = set(tasks)
+    errors: dict[str, str] = {}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                model = tasks[task]
+                try:
+                    content = task.result()
+                except OpenRouterError as e:
+                    errors[model] = str(e)
+                    logger.warning(f"Hedged model {model} failed: {e}")
+                    continue
+                logger.info(
+                    f"Hedged winner: {model} in "
+                    f"{(time.perf_counter() - start) * 1000:.0f} ms "
+                    f"({len(pending)} cancelled)"
+                )
+                if use_cache:
+                    _response_cache.put(cache_keys[model], content)
+                return content
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    raise OpenRouterError(
+        "All models failed: " + "; ".join(f"{m}: {e}" for m, e in errors.items())
+    )
 
-    payload = {
-        "model": selected_model,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": query},
-                    {"type": "image_url", "image_url": {"url": image_url}},
-                ],
-            },
-        ],
-    }
 
-    try:
-        logger.info(f"Querying OpenRouter vision model: {selected_model}")
-        resp = requests.post(
-            OPENROUTER_API_URL, headers=headers, json=payload, timeout=60
-        )
-    except requests.RequestException as e:
-        raise OpenRouterError(f"Request failed: {e}")
+def query_openrouter_with_vision(
+    query: str,
+    screenshot: Image.Image,
+    model: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> str:
+    """Send a query with screenshot to OpenRouter vision model.
 
-    if resp.status_code != 200:
-        raise OpenRouterError(f"API error {resp.status_code}: {resp.text}")
+    Args:
+        query: User's question or query text
+        screenshot: PIL Image of the current screen
+        model: Model to use (defaults to the fastest healthy of VISION_MODELS,
+            with retries on the others)
+        api_key: OpenRouter API key (defaults to env variable)
 
-    try:
-        data = resp.json()
-    except ValueError as e:
-        raise OpenRouterError(f"Invalid JSON response: {e}")
+    Returns:
+        AI response text suitable for typing into an input field
 
-    try:
-        content = data["choices"][0]["message"]["content"]
-        logger.info(f"Received vision response: {len(content)} characters")
-        return content.strip()
-    except (KeyError, IndexError) as e:
-        raise OpenRouterError(f"Unexpected response format: {e}")
+    Raises:
+        OpenRouterError: If API request fails
+    """
+    key = _api_key(api_key)
+
+    logger.info(f"Querying OpenRouter vision model: {model or 'auto'}")
+    content = _routed_complete(
+        "vision",
+        model,
+        lambda name: _vision_payload(query, screenshot, name),
+        key,
+        VISION_DEADLINE_SEC,
+    )
+    logger.info(f"Received vision response: {len(content)} characters")
+    return content.strip()
+
+
+def stream_openrouter_with_vision(
+    query: str,
+    screenshot: Image.Image,
+    model: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> Iterator[str]:
+    """Like ``query_openrouter_with_vision`` but yield text as it is generated.
+
+    Raises:
+        OpenRouterError: If the request fails or the stream breaks off
+    """
+    key = _api_key(api_key)
+    selected_model = model or _selector.candidates("vision")[0]
+
+    logger.info(f"Streaming from OpenRouter vision model: {selected_model}")
+    deltas = _stream_completion(
+        _vision_payload(query, screenshot, selected_model),
+        key,
+        timeout=VISION_DEADLINE_SEC,
+    )
+    yield from _recorded_stream(selected_model, deltas)
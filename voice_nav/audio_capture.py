@@ -0,0 +1,416 @@
+"""Streaming microphone capture with voice activity endpointing."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATE = 16000
+FRAME_MS = 20
+DEFAULT_MAX_DURATION_SEC = 8.0
+DEFAULT_SILENCE_SEC = 0.4
+DEFAULT_START_TIMEOUT_SEC = 3.0
+DEFAULT_MIN_SPEECH_SEC = 0.08
+DEFAULT_PAD_SEC = 0.1
+DEFAULT_PREROLL_SEC = 1.5
+
+
+def frame_length(sample_rate: int = DEFAULT_SAMPLE_RATE) -> int:
+    """Number of samples in one analysis frame."""
+    return sample_rate * FRAME_MS // 1000
+
+
+def _to_db(rms: np.ndarray | float) -> np.ndarray | float:
+    return 20.0 * np.log10(np.maximum(rms, 1e-10))
+
+
+class EnergyVAD:
+    """Frame-level speech detector on RMS energy with an adaptive noise floor.
+
+    A frame is speech when it is louder than both ``threshold_db`` and the
+    running noise floor plus ``margin_db``. The floor only tracks non-speech
+    frames so a long utterance can't drag it upwards.
+    """
+
+    def __init__(
+        self,
+        threshold_db: float = -45.0,
+        margin_db: float = 12.0,
+        floor_alpha: float = 0.05,
+    ):
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.floor_alpha = floor_alpha
+        self.noise_floor_db = threshold_db - margin_db
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        """Classify one mono float32 frame."""
+        if frame.size == 0:
+            return False
+        level = float(_to_db(np.sqrt(np.mean(np.square(frame, dtype=np.float64)))))
+        speech = level > max(self.threshold_db, self.noise_floor_db + self.margin_db)
+        if not speech:
+            self.noise_floor_db += self.floor_alpha * (level - self.noise_floor_db)
+        return speech
+
+
+class Endpointer:
+    """Decide when an utterance has started and finished.
+
+    Feed frames in arrival order with :meth:`push`; it returns True once the
+    capture should stop. ``reason`` records why. Only live frames count
+    toward the start timeout, so pre-roll doesn't shorten the wait for speech.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+        vad: Optional[EnergyVAD] = None,
+        silence_sec: float = DEFAULT_SILENCE_SEC,
+        start_timeout_sec: float = DEFAULT_START_TIMEOUT_SEC,
+        max_duration_sec: float = DEFAULT_MAX_DURATION_SEC,
+        min_speech_sec: float = DEFAULT_MIN_SPEECH_SEC,
+    ):
+        self.vad = vad or EnergyVAD()
+        self.silence_samples = int(silence_sec * sample_rate)
+        self.start_timeout_samples = int(start_timeout_sec * sample_rate)
+        self.max_samples = int(max_duration_sec * sample_rate)
+        self.min_speech_samples = int(min_speech_sec * sample_rate)
+        self.elapsed = 0
+        self.live_elapsed = 0
+        self.speech_run = 0
+        self.silence_run = 0
+        self.speech_started = False
+        self.reason: Optional[str] = None
+
+    def push(self, frame: np.ndarray, live: bool = True) -> bool:
+        """Consume one frame and return True when capture should stop.
+
+        Args:
+            frame: Mono samples
+            live: False for pre-roll captured before the trigger
+        """
+        n = len(frame)
+        self.elapsed += n
+        if live:
+            self.live_elapsed += n
+
+        if self.vad.is_speech(frame):
+            self.speech_run += n
+            self.silence_run = 0
+            if self.speech_run >= self.min_speech_samples:
+                self.speech_started = True
+        else:
+            self.speech_run = 0
+            self.silence_run += n
+
+        if self.speech_started and self.silence_run >= self.silence_samples:
+            self.reason = "endpoint"
+        elif (
+            not self.speech_started and self.live_elapsed >= self.start_timeout_samples
+        ):
+            self.reason = "no speech"
+        elif self.elapsed >= self.max_samples:
+            self.reason = "max duration"
+        return self.reason is not None
+
+
+def trim_silence(
+    audio: np.ndarray,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    vad: Optional[EnergyVAD] = None,
+    pad_sec: float = DEFAULT_PAD_SEC,
+) -> np.ndarray:
+    """Strip leading and trailing silence, keeping ``pad_sec`` around speech.
+
+    Returns a view into ``audio``; an all-silent clip yields an empty array.
+    """
+    vad = vad or EnergyVAD()
+    n = frame_length(sample_rate)
+    count = len(audio) // n
+    if count == 0:
+        return audio[:0]
+
+    frames = audio[: count * n].reshape(count, n).astype(np.float64, copy=False)
+    levels = _to_db(np.sqrt(np.mean(np.square(frames), axis=1)))
+    floor = min(float(np.percentile(levels, 10)), vad.noise_floor_db)
+    speech = np.flatnonzero(levels > max(vad.threshold_db, floor + vad.margin_db))
+    if speech.size == 0:
+        return audio[:0]
+
+    pad = int(pad_sec * sample_rate)
+    start = max(0, speech[0] * n - pad)
+    end = min(len(audio), (speech[-1] + 1) * n + pad)
+    return audio[start:end]
+
+
+def microphone_frames(
+    sample_rate: int = DEFAULT_SAMPLE_RATE, timeout_sec: float = 1.0
+) -> Iterator[np.ndarray]:
+    """Yield mono float32 frames from the default microphone as they arrive.
+
+    The input stream stays open until the generator is closed.
+    """
+    import sounddevice as sd
+
+    frames: queue.Queue[np.ndarray] = queue.Queue()
+
+    def callback(indata, frame_count, time_info, status):
+        if status:
+            logger.debug(f"Input stream status: {status}")
+        frames.put(indata[:, 0].copy())
+
+    with sd.InputStream(
+        samplerate=sample_rate,
+        channels=1,
+        dtype="float32",
+        blocksize=frame_length(sample_rate),
+        callback=callback,
+    ):
+        while True:
+            try:
+                yield frames.get(timeout=timeout_sec)
+            except queue.Empty:
+                raise RuntimeError("Microphone stopped delivering audio")
+
+
+class AudioRingBuffer:
+    """Preallocated circular buffer of mono float32 samples."""
+
+    def __init__(self, capacity: int):
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._written = 0
+
+    def __len__(self) -> int:
+        return min(self._written, len(self._data))
+
+    def write(self, samples: np.ndarray):
+        """Copy ``samples`` in, overwriting the oldest audio."""
+        cap = len(self._data)
+        n = len(samples)
+        if n >= cap:
+            self._data[:] = samples[-cap:]
+            self._written = cap
+            return
+        start = self._written % cap
+        first = min(n, cap - start)
+        self._data[start : start + first] = samples[:first]
+        self._data[: n - first] = samples[first:]
+        self._written += n
+
+    def clear(self):
+        """Forget everything written so far."""
+        self._written = 0
+
+    def holds(self, view: np.ndarray) -> bool:
+        """Whether ``view`` may alias this buffer's storage."""
+        return np.may_share_memory(view, self._data)
+
+    def latest(self, count: int) -> list[np.ndarray]:
+        """Views of the newest ``count`` samples in chronological order.
+
+        The views alias the buffer, so they stay valid only until it wraps.
+        """
+        cap = len(self._data)
+        count = min(count, len(self))
+        if count == 0:
+            return []
+        end = self._written % cap or cap
+        start = end - count
+        if start >= 0:
+            return [self._data[start:end]]
+        return [v for v in (self._data[start:], self._data[:end]) if len(v)]
+
+
+class PrerollCapture:
+    """Always-on microphone capture that remembers the last few seconds.
+
+    While idle, audio goes into a ring buffer from the PortAudio callback.
+    :meth:`utterance_frames` hands out that pre-roll as buffer views followed
+    by live frames; the ring is frozen until the generator is closed so the
+    views are never overwritten mid-utterance. Closing it empties the ring,
+    so the next pre-roll never replays audio from before this utterance.
+    """
+
+    def __init__(
+        self,
+        preroll_sec: float = DEFAULT_PREROLL_SEC,
+        sample_rate: int = DEFAULT_SAMPLE_RATE,
+    ):
+        self.preroll_sec = preroll_sec
+        self.sample_rate = sample_rate
+        self.ring = AudioRingBuffer(int(preroll_sec * sample_rate))
+        self._lock = threading.Lock()
+        self._tap: Optional[queue.Queue[np.ndarray]] = None
+        self._stream = None
+
+    def start(self):
+        """Open the input stream; a no-op if already running."""
+        if self._stream is not None:
+            return
+        import sounddevice as sd
+
+        self._stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="float32",
+            blocksize=frame_length(self.sample_rate),
+            callback=self._callback,
+        )
+        self._stream.start()
+        logger.info(f"Pre-roll capture running ({self.preroll_sec}s buffer)")
+
+    def stop(self):
+        if self._stream is None:
+            return
+        self._stream.stop()
+        self._stream.close()
+        self._stream = None
+
+    def _callback(self, indata, frame_count, time_info, status):
+        if status:
+            logger.debug(f"Input stream status: {status}")
+        self._on_frame(indata[:, 0])
+
+    def _on_frame(self, samples: np.ndarray):
+        with self._lock:
+            if self._tap is not None:
+                self._tap.put(samples.copy())
+            else:
+                self.ring.write(samples)
+
+    def is_preroll(self, frame: np.ndarray) -> bool:
+        """Whether a frame from :meth:`utterance_frames` is buffered pre-roll."""
+        return self.ring.holds(frame)
+
+    def utterance_frames(self, timeout_sec: float = 1.0) -> Iterator[np.ndarray]:
+        """Yield the buffered pre-roll, then live frames until closed."""
+        tap: queue.Queue[np.ndarray] = queue.Queue()
+        with self._lock:
+            self._tap = tap
+            preroll = self.ring.latest(len(self.ring))
+        try:
+            yield from preroll
+            while True:
+                try:
+                    yield tap.get(timeout=timeout_sec)
+                except queue.Empty:
+                    raise RuntimeError("Microphone stopped delivering audio")
+        finally:
+            with self._lock:
+                self._tap = None
+                self.ring.clear()
+
+
+def _open_source(
+    sample_rate: int,
+    frames: Optional[Iterable[np.ndarray]],
+    preroll: Optional[PrerollCapture],
+) -> Iterable[np.ndarray]:
+    if frames is not None:
+        return frames
+    if preroll is not None:
+        return preroll.utterance_frames()
+    return microphone_frames(sample_rate)
+
+
+def _is_live(
+    frame: np.ndarray,
+    frames: Optional[Iterable[np.ndarray]],
+    preroll: Optional[PrerollCapture],
+) -> bool:
+    return frames is not None or preroll is None or not preroll.is_preroll(frame)
+
+
+def _close_source(source: Iterable[np.ndarray]):
+    close = getattr(source, "close", None)
+    if close is not None:
+        close()
+
+
+def stream_utterance(
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    max_duration_sec: float = DEFAULT_MAX_DURATION_SEC,
+    silence_sec: float = DEFAULT_SILENCE_SEC,
+    start_timeout_sec: float = DEFAULT_START_TIMEOUT_SEC,
+    frames: Optional[Iterable[np.ndarray]] = None,
+    preroll: Optional[PrerollCapture] = None,
+) -> Iterator[np.ndarray]:
+    """Yield frames as they are captured until the speaker stops.
+
+    Same arguments as :func:`record_utterance`. Frames are not trimmed, and
+    pre-roll frames are ring views that must be consumed before the next one
+    is requested.
+    """
+    endpointer = Endpointer(
+        sample_rate=sample_rate,
+        silence_sec=silence_sec,
+        start_timeout_sec=start_timeout_sec,
+        max_duration_sec=max_duration_sec,
+    )
+    source = _open_source(sample_rate, frames, preroll)
+    try:
+        for frame in source:
+            yield frame
+            if endpointer.push(frame, _is_live(frame, frames, preroll)):
+                break
+    finally:
+        _close_source(source)
+    logger.info(
+        f"Streamed {endpointer.elapsed / sample_rate:.2f}s ({endpointer.reason})"
+    )
+
+
+def record_utterance(
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    max_duration_sec: float = DEFAULT_MAX_DURATION_SEC,
+    silence_sec: float = DEFAULT_SILENCE_SEC,
+    start_timeout_sec: float = DEFAULT_START_TIMEOUT_SEC,
+    frames: Optional[Iterable[np.ndarray]] = None,
+    preroll: Optional[PrerollCapture] = None,
+) -> np.ndarray:
+    """Record until the speaker stops talking and return the trimmed audio.
+
+    Args:
+        sample_rate: Capture sample rate in Hz
+        max_duration_sec: Hard cap on capture length
+        silence_sec: Trailing silence that ends the utterance
+        start_timeout_sec: Give up if no speech starts within this time
+        frames: Frame source; defaults to the live microphone
+        preroll: Running pre-roll capture to read from instead of opening
+            a new stream, so speech from before the call is kept
+
+    Returns:
+        Mono float32 audio with leading/trailing silence removed
+    """
+    endpointer = Endpointer(
+        sample_rate=sample_rate,
+        silence_sec=silence_sec,
+        start_timeout_sec=start_timeout_sec,
+        max_duration_sec=max_duration_sec,
+    )
+    source = _open_source(sample_rate, frames, preroll)
+    chunks: list[np.ndarray] = []
+    try:
+        for frame in source:
+            chunks.append(frame)
+            if endpointer.push(frame, _is_live(frame, frames, preroll)):
+                break
+        # Pre-roll chunks are ring views; join them before the source is
+        # closed and the ring starts overwriting.
+        audio = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+    finally:
+        _close_source(source)
+
+    trimmed = trim_silence(audio, sample_rate, vad=endpointer.vad)
+    logger.info(
+        f"Captured {len(audio) / sample_rate:.2f}s ({endpointer.reason}), "
+        f"{len(trimmed) / sample_rate:.2f}s after trimming"
+    )
+    return trimmed
@@ -0,0 +1,74 @@
+"""Benchmark detect_elements on large screens across worker counts.
+
+Usage:
+    python bench_detection.py --size 3840x2160 --workers 1 2 4 8
+    python bench_detection.py --image screenshot.png --runs 20
+
+Every worker count must return the same elements as one worker; a
+mismatch is reported and fails the run.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from cv2 import FONT_HERSHEY_SIMPLEX, putText, rectangle
+from PIL import Image
+
+from element_selector import detect_elements
+
+
+def load_screen(path: str | None, size: str) -> Image.Image:
+    """Load a screenshot, or draw a desktop-like one of the given size."""
+    if path is not None:
+        return Image.open(path).convert("RGB")
+
+    width, height = (int(v) for v in size.split("x"))
+    rng = np.random.default_rng(0)
+    frame = np.full((height, width, 3), 240, np.uint8)
+    for _ in range(width * height // 20_000):
+        x, y = int(rng.integers(0, width - 300)), int(rng.integers(0, height - 100))
+        w, h = int(rng.integers(30, 280)), int(rng.integers(24, 90))
+        color = tuple(int(c) for c in rng.integers(0, 200, 3))
+        rectangle(frame, (x, y), (x + w, y + h), color, -1 if rng.random() < 0.5 else 2)
+        putText(frame, "Ok", (x + 5, y + 20), FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+    return Image.fromarray(frame)
+
+
+def bench(image: Image.Image, workers: int, runs: int) -> tuple[float, list]:
+    children = detect_elements(image, workers=workers)  # warm-up, starts the pool
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        detect_elements(image, workers=workers)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000, children
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", help="screenshot to use instead of a synthetic one")
+    parser.add_argument("--size", default="3840x2160", help="synthetic screen size")
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    image = load_screen(args.image, args.size)
+    print(f"{image.width}x{image.height}, {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'median ms':>10} {'speedup':>8}  same output")
+
+    baseline_ms, expected = bench(image, 1, args.runs)
+    expected = [(c.absolute_position, c.width, c.height) for c in expected]
+    ok = True
+    for workers in args.workers:
+        ms, children = bench(image, workers, args.runs)
+        same = [(c.absolute_position, c.width, c.height) for c in children] == expected
+        ok &= same
+        print(f"{workers:>8} {ms:>10.1f} {baseline_ms / ms:>7.2f}x  {same}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark per-call lookups on the interactive path against their budgets.
+
+Usage:
+    python bench_lookups.py
+    python bench_lookups.py --runs 5000
+
+Each case reports its median time per call; a case over its budget is
+reported and fails the run. Budgets are wall-clock targets for a
+desktop CPU, which is why they live here rather than in the tests.
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+
+from element_tracker import match_boxes
+from response_cache import ResponseCache, make_key
+from spatial_index import SpatialIndex
+
+
+def cache_hit() -> Callable[[], object]:
+    """A memory hit in the LLM response cache."""
+    cache = ResponseCache(path=None)
+    key = make_key("write a polite out of office reply", "m", "sys")
+    cache.put(key, "I'm out of the office.")
+    return lambda: cache.get(key)
+
+
+def _points(count: int, seed: int) -> Callable[[], tuple[float, float]]:
+    """Cycle through random points on a 1600x1600 screen."""
+    points = np.random.default_rng(seed).uniform(0, 1600, (count, 2)).tolist()
+    return itertools.cycle(points).__next__
+
+
+def _screen_index() -> SpatialIndex:
+    """An index over 500 random boxes."""
+    rng = np.random.default_rng(0)
+    xy = rng.integers(0, 1500, (500, 2))
+    wh = rng.integers(4, 160, (500, 2))
+    return SpatialIndex(np.concatenate([xy, wh], axis=1))
+
+
+def spatial_nearest() -> Callable[[], object]:
+    """The element nearest a pointer, among 500."""
+    index, point = _screen_index(), _points(1000, 2)
+    return lambda: index.nearest(*point())
+
+
+def spatial_at() -> Callable[[], object]:
+    """The elements under a pointer, among 500."""
+    index, point = _screen_index(), _points(1000, 3)
+    return lambda: index.at(*point())
+
+
+def box_matching() -> Callable[[], object]:
+    """Matching 300 boxes to their scrolled positions."""
+    cols = 18
+    boxes = np.array(
+        [(40 + (i % cols) * 90, 40 + (i // cols) * 60, 70, 40) for i in range(300)]
+    )
+    moved = boxes + (0, 4, 0, 0)
+    moved[::7, 0] += 3
+    moved = moved[np.random.default_rng(1).permutation(len(moved))]
+    return lambda: match_boxes(boxes, moved)
+
+
+# name -> (setup returning the call to time, budget in microseconds)
+CASES = {
+    "cache hit": (cache_hit, 100.0),
+    "spatial nearest": (spatial_nearest, 500.0),
+    "spatial at": (spatial_at, 500.0),
+    "box matching": (box_matching, 1000.0),
+}
+
+
+def bench(call: Callable[[], object], runs: int) -> float:
+    """Median microseconds per call."""
+    call()  # warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("cases", nargs="*", default=list(CASES), help="cases to run")
+    args = parser.parse_args()
+
+    print(f"{'case':<16}{'median us':>11}{'budget us':>11}  ok")
+    ok = True
+    for name in args.cases:
+        setup, budget_us = CASES[name]
+        us = bench(setup(), args.runs)
+        ok &= us < budget_us
+        print(f"{name:<16}{us:>11.1f}{budget_us:>11.0f}  {us < budget_us}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
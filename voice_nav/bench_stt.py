@@ -0,0 +1,90 @@
+"""Benchmark local Whisper real-time factor per backend and model size.
+
+Usage:
+    python bench_stt.py --models tiny base small --backends whisper faster-whisper
+    python bench_stt.py --audio sample.wav --runs 5
+
+RTF is processing time divided by audio duration; below 1.0 is faster
+than real time.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from stt import DEFAULT_COMPUTE_TYPE, SAMPLE_RATE, WhisperEngine
+
+
+def load_audio(path: str | None, seconds: float) -> np.ndarray:
+    """Load a clip as 16 kHz mono float32, or synthesize one."""
+    if path is None:
+        rng = np.random.default_rng(0)
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        tone = 0.2 * np.sin(2 * np.pi * 220 * t)
+        return (tone + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+    import soundfile as sf
+
+    audio, rate = sf.read(path, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if rate != SAMPLE_RATE:
+        positions = np.arange(0, len(audio), rate / SAMPLE_RATE)
+        audio = np.interp(positions, np.arange(len(audio)), audio)
+    return audio.astype(np.float32)
+
+
+def bench(engine: WhisperEngine, audio: np.ndarray, runs: int) -> dict:
+    start = time.perf_counter()
+    engine.preload().result()
+    load_sec = time.perf_counter() - start
+
+    engine.transcribe(audio)  # warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        engine.transcribe(audio)
+        timings.append(time.perf_counter() - start)
+
+    duration = len(audio) / SAMPLE_RATE
+    return {
+        "load_sec": load_sec,
+        "median_sec": float(np.median(timings)),
+        "rtf": float(np.median(timings)) / duration,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--backends", nargs="+", default=["whisper", "faster-whisper"])
+    parser.add_argument("--compute-type", default=DEFAULT_COMPUTE_TYPE)
+    parser.add_argument("--audio", help="Audio file to transcribe")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    audio = load_audio(args.audio, args.seconds)
+    print(f"Audio: {len(audio) / SAMPLE_RATE:.2f}s, {args.runs} runs each\n")
+    print(f"{'backend':<16}{'model':<10}{'load s':>9}{'median s':>10}{'RTF':>8}")
+
+    for backend in args.backends:
+        for model_name in args.models:
+            engine = WhisperEngine(
+                model_name=model_name,
+                backend=backend,
+                compute_type=args.compute_type,
+            )
+            try:
+                r = bench(engine, audio, args.runs)
+            except ImportError:
+                print(f"{backend:<16}{model_name:<10}  (not installed)")
+                break
+            print(
+                f"{backend:<16}{model_name:<10}{r['load_sec']:>9.2f}"
+                f"{r['median_sec']:>10.3f}{r['rtf']:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
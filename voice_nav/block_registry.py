@@ -0,0 +1,112 @@
+"""Blocks from the latest detection, looked up by id or hint in O(1).
+
+Block ids are ``"<generation>:<index>"``: the detection they came from
+and their position in it. A lookup parses the id and indexes straight
+into the current snapshot, so an id from an earlier detection is
+rejected without searching. Each detection is published as a new
+immutable snapshot with one reference swap, so readers never see a
+half-built one.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+
+from child import ElementSet
+from schemas import Block
+
+
+class StaleBlockError(ValueError):
+    """Raised for a block id from an earlier detection."""
+
+
+@dataclass(frozen=True)
+class BlockSnapshot:
+    """The blocks of one detection."""
+
+    generation: int
+    blocks: tuple[Block, ...] = ()
+    by_hint: dict[str, Block] = field(default_factory=dict)
+
+
+def elements_to_blocks(elements: ElementSet, generation: int) -> list[Block]:
+    """Convert detected elements, with hints from ``get_hints``, to blocks."""
+    labels = elements.hint_labels
+    texts = elements.texts
+    scores = elements.scores.tolist()
+    # Boxes are int32, so they are converted to the float fields here
+    # rather than by validation, which model_construct skips.
+    return [
+        Block.model_construct(
+            id=f"{generation}:{i}",
+            x=x,
+            y=y,
+            w=w,
+            h=h,
+            label=f"element_{i}",
+            score=scores[i],
+            text=None if texts is None else texts[i],
+            hint=labels[hint_id] if hint_id >= 0 else None,
+        )
+        for i, ((x, y, w, h), hint_id) in enumerate(
+            zip(elements.boxes.astype(float).tolist(), elements.hint_ids.tolist())
+        )
+    ]
+
+
+class BlockRegistry:
+    """Current blocks by id and hint, replaced wholesale on each detection."""
+
+    def __init__(self):
+        self._snapshot = BlockSnapshot(generation=0)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> BlockSnapshot:
+        return self._snapshot
+
+    def publish(self, elements: ElementSet) -> BlockSnapshot:
+        """Make a detection current and return its snapshot.
+
+        If detections overlap, a later-started one is never replaced by an
+        earlier one that finishes after it.
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        blocks = elements_to_blocks(elements, generation)
+        snapshot = BlockSnapshot(
+            generation=generation,
+            blocks=tuple(blocks),
+            by_hint={block.hint: block for block in blocks if block.hint},
+        )
+        with self._lock:
+            if generation > self._snapshot.generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def get(self, block_id: str) -> Block:
+        """Find a current block by id.
+
+        Raises:
+            StaleBlockError: If the id is from an earlier detection
+            ValueError: If there is no such block
+        """
+        snapshot = self._snapshot
+        try:
+            generation, index = (int(part) for part in block_id.split(":"))
+        except (AttributeError, ValueError):
+            raise ValueError(f"Block not found: {block_id}") from None
+        if generation != snapshot.generation:
+            raise StaleBlockError(
+                f"Block {block_id} is from detection {generation}, "
+                f"current is {snapshot.generation}"
+            )
+        if not 0 <= index < len(snapshot.blocks):
+            raise ValueError(f"Block not found: {block_id}")
+        return snapshot.blocks[index]
+
+    def by_hint(self, hint: str) -> Optional[Block]:
+        """Find a current block by its hint, or None."""
+        return self._snapshot.by_hint.get(hint)
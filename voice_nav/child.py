@@ -1,5 +1,22 @@
 """Child to represent an application's element."""
 
+from __future__ import annotations
+
+from typing import Iterator, Optional
+
+from numpy import (
+    arange,
+    asarray,
+    empty,
+    float32,
+    full,
+    int32,
+    int64,
+    integer,
+    ndarray,
+    ones,
+)
+
 
 class Child:
     def __init__(
@@ -13,3 +30,166 @@ class Child:
         self.relative_position = relative_position
         self.width = width
         self.height = height
+
+
+class ElementSet:
+    """Detected elements stored column-wise in numpy arrays.
+
+    Indexing with an int gives an ``ElementView``; slices, masks and index
+    arrays give another ``ElementSet`` (a view for slices). Iterating yields
+    views, so code written against lists of ``Child`` keeps working.
+
+    Attributes:
+        boxes: (N, 4) int32 array of x, y, width, height in screen pixels
+        scores: (N,) float32 detection scores
+        hint_ids: (N,) int32 indices into ``hint_labels``, -1 for no hint
+        texts: Optional (N,) object array of element text
+        hint_labels: Hint strings shared by every view of the set
+        track_ids: (N,) int64 ids kept across detections by
+            ``ElementTracker``, -1 for untracked elements
+    """
+
+    __slots__ = ("boxes", "scores", "hint_ids", "texts", "hint_labels", "track_ids")
+
+    def __init__(
+        self,
+        boxes: ndarray,
+        scores: Optional[ndarray] = None,
+        hint_ids: Optional[ndarray] = None,
+        texts: Optional[ndarray] = None,
+        hint_labels: Optional[list[str]] = None,
+        track_ids: Optional[ndarray] = None,
+    ):
+        self.boxes = asarray(boxes, int32).reshape(-1, 4)
+        n = len(self.boxes)
+        self.scores = ones(n, float32) if scores is None else scores
+        self.hint_ids = full(n, -1, int32) if hint_ids is None else hint_ids
+        self.texts = texts
+        self.hint_labels = [] if hint_labels is None else hint_labels
+        self.track_ids = full(n, -1, int64) if track_ids is None else track_ids
+
+    @classmethod
+    def empty(cls) -> ElementSet:
+        return cls(empty((0, 4), int32))
+
+    def __len__(self) -> int:
+        return len(self.boxes)
+
+    def __iter__(self) -> Iterator[ElementView]:
+        for i in range(len(self.boxes)):
+            yield ElementView(self, i)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, integer)):
+            if not -len(self) <= key < len(self):
+                raise IndexError(f"Element {key} out of range")
+            return ElementView(self, int(key) % len(self))
+        return ElementSet(
+            self.boxes[key],
+            self.scores[key],
+            self.hint_ids[key],
+            None if self.texts is None else self.texts[key],
+            self.hint_labels,
+            self.track_ids[key],
+        )
+
+    def filter(self, mask: ndarray) -> ElementSet:
+        """Elements where mask is true."""
+        return self[asarray(mask, bool)]
+
+    @property
+    def x(self) -> ndarray:
+        return self.boxes[:, 0]
+
+    @property
+    def y(self) -> ndarray:
+        return self.boxes[:, 1]
+
+    @property
+    def width(self) -> ndarray:
+        return self.boxes[:, 2]
+
+    @property
+    def height(self) -> ndarray:
+        return self.boxes[:, 3]
+
+    def centers(self) -> ndarray:
+        """(N, 2) float array of element centers."""
+        return self.boxes[:, :2] + self.boxes[:, 2:] / 2
+
+    def set_hints(self, labels: list[str]):
+        """Give element i the hint ``labels[i]``; extra elements get none."""
+        self.hint_labels = list(labels)
+        self.hint_ids = full(len(self), -1, int32)
+        count = min(len(self), len(labels))
+        self.hint_ids[:count] = arange(count, dtype=int32)
+
+
+class ElementView:
+    """One element of an ``ElementSet``, with the attributes of ``Child``.
+
+    Views hold only the set and an index; values are read from the arrays
+    on access. Two views are equal when they point at the same element.
+    """
+
+    __slots__ = ("elements", "index")
+
+    def __init__(self, elements: ElementSet, index: int):
+        self.elements = elements
+        self.index = index
+
+    @property
+    def box(self) -> tuple[int, int, int, int]:
+        x, y, w, h = self.elements.boxes[self.index].tolist()
+        return x, y, w, h
+
+    @property
+    def absolute_position(self) -> tuple[int, int]:
+        x, y = self.elements.boxes[self.index, :2].tolist()
+        return x, y
+
+    relative_position = absolute_position
+
+    @property
+    def width(self) -> int:
+        return int(self.elements.boxes[self.index, 2])
+
+    @property
+    def height(self) -> int:
+        return int(self.elements.boxes[self.index, 3])
+
+    @property
+    def center(self) -> tuple[float, float]:
+        x, y, w, h = self.box
+        return x + w / 2, y + h / 2
+
+    @property
+    def score(self) -> float:
+        return float(self.elements.scores[self.index])
+
+    @property
+    def hint(self) -> Optional[str]:
+        hint_id = int(self.elements.hint_ids[self.index])
+        return self.elements.hint_labels[hint_id] if hint_id >= 0 else None
+
+    @property
+    def track_id(self) -> int:
+        return int(self.elements.track_ids[self.index])
+
+    @property
+    def text(self) -> Optional[str]:
+        texts = self.elements.texts
+        return None if texts is None else texts[self.index]
+
+    def __eq__(self, other) -> bool:
+        return (
+            isinstance(other, ElementView)
+            and other.elements is self.elements
+            and other.index == self.index
+        )
+
+    def __hash__(self) -> int:
+        return hash((id(self.elements), self.index))
+
+    def __repr__(self) -> str:
+        return f"ElementView({self.index}, box={self.box}, hint={self.hint!r})"
@@ -3,49 +3,238 @@
 from __future__ import annotations
 
 import logging
-from itertools import product
-from math import ceil, log
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from inspect import signature
 from typing import TYPE_CHECKING
 
-try:
-    import pyscreenshot as ImageGrab
-except ImportError:
-    import PIL.ImageGrab
 from cv2 import (
     CHAIN_APPROX_SIMPLE,
-    COLOR_BGR2GRAY,
+    FLOODFILL_MASK_ONLY,
     RETR_LIST,
     Canny,
     boundingRect,
-    cvtColor,
+    connectedComponentsWithStats,
     dilate,
     findContours,
+    floodFill,
+)
+from numpy import (
+    concatenate,
+    empty,
+    flatnonzero,
+    int32,
+    int64,
+    lexsort,
+    maximum,
+    minimum,
+    ndarray,
+    ones,
+    tri,
+    uint8,
+    zeros,
 )
-from numpy import array, ones, uint8
 
-from child import Child
+from child import ElementSet, ElementView
+from element_tracker import (
+    ElementTracker,
+    expected_keystrokes,
+    fixed_length_labels,
+    hint_weights,
+    huffman_labels,
+)
 from mouse import click
 from mouse_enums import MouseButton, MouseButtonState
+from screen_capture import capture_gray, capture_image, to_gray
 
 if TYPE_CHECKING:
     from PIL.Image import Image
 
 logger = logging.getLogger(__name__)
 
+DETECT_WORKERS = int(os.getenv("VOICE_NAV_DETECT_WORKERS", "1"))
+MIN_BAND_ROWS = 256  # thinner bands cost more in seam handling than they save
+SUPPRESS_CHUNK = 512  # rows of the pairwise box matrix computed at once
+
+_pools: dict[int, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
 
 def capture_screen() -> Image:
     """Capture full screen screenshot.
 
     :return: Screenshot image.
     """
-    try:
-        return ImageGrab.grab(backend="grim")
-    except Exception:
-        return PIL.ImageGrab.grab()
+    return capture_image()
+
+
+def _edge_mask(
+    gray: ndarray, canny_min_val: int, canny_max_val: int, kernel_size: int
+) -> ndarray:
+    """Canny edges, dilated so element outlines close into contours."""
+    edges = Canny(gray, canny_min_val, canny_max_val)
+    return dilate(edges, ones((kernel_size, kernel_size), uint8))
+
+
+def _contour_boxes(
+    mask: ndarray,
+    offset: tuple[int, int] = (0, 0),
+    exclude: ndarray | None = None,
+) -> ndarray:
+    """Bounding boxes (x, y, w, h) of every contour in the mask, as int32.
+
+    Contours of components set in ``exclude`` (same shape as mask) are skipped.
+    """
+    contours, _ = findContours(mask, RETR_LIST, CHAIN_APPROX_SIMPLE)
+    boxes = empty((len(contours), 4), int32)
+    firsts = empty((len(contours), 2), int32)
+    for i, contour in enumerate(contours):
+        boxes[i] = boundingRect(contour)
+        firsts[i] = contour[0, 0]
+    if exclude is not None:
+        # Every contour point is a pixel of the component it outlines.
+        boxes = boxes[exclude[firsts[:, 1], firsts[:, 0]] == 0]
+    boxes[:, 0] += offset[0]
+    boxes[:, 1] += offset[1]
+    return boxes
+
+
+def _get_pool(workers: int) -> ThreadPoolExecutor:
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="detect"
+            )
+        return _pools[workers]
+
+
+def _seam_components(mask: ndarray, cuts: list[int]) -> tuple[ndarray, tuple]:
+    """Mask of the components with a pixel on either row next to a cut.
+
+    Also returns the (first, last + 1) rows those components span.
+    """
+    h, w = mask.shape
+    seam = zeros((h + 2, w + 2), uint8)
+    top, bottom = h, 0
+    for cut in cuts:
+        for y in (cut - 1, cut):
+            row = mask[y] > 0
+            # Each run of set pixels lies in one component; seed its start.
+            starts = flatnonzero(row & ~concatenate(([False], row[:-1])))
+            for x in starts.tolist():
+                if not seam[y + 1, x + 1]:
+                    _, _, _, (_, fy, _, fh) = floodFill(
+                        mask, seam, (x, y), 255, 0, 0, 8 | FLOODFILL_MASK_ONLY | 1 << 8
+                    )
+                    top, bottom = min(top, fy), max(bottom, fy + fh)
+    return seam[1:-1, 1:-1], (top, bottom)
+
+
+def _banded_boxes(mask: ndarray, workers: int) -> ndarray:
+    """``_contour_boxes`` split into horizontal bands traced in parallel.
+
+    Components touching a cut between bands are traced once more on their
+    own, from a mask holding only them; each band skips them. Contours of
+    different components don't depend on each other, so the result is the
+    same set of boxes as a single ``_contour_boxes`` call.
+    """
+    h = mask.shape[0]
+    bands = min(workers, h // MIN_BAND_ROWS)
+    if bands <= 1:
+        return _contour_boxes(mask)
+    cuts = [h * i // bands for i in range(1, bands)]
+    seam, (top, bottom) = _seam_components(mask, cuts)
+
+    pool = _get_pool(workers)
+    jobs = [
+        pool.submit(_contour_boxes, mask[y0:y1], (0, y0), seam[y0:y1])
+        for y0, y1 in zip([0, *cuts], [*cuts, h])
+    ]
+    if bottom > top:
+        jobs.append(pool.submit(_contour_boxes, seam[top:bottom], (0, top)))
+    return concatenate([job.result() for job in jobs])
+
+
+def _filter_boxes(
+    boxes: ndarray,
+    min_width: int,
+    min_height: int,
+    max_width: int,
+    max_height: int,
+    max_aspect_ratio: float,
+) -> ndarray:
+    """Drop boxes that are too small, too large or too elongated."""
+    w, h = boxes[:, 2], boxes[:, 3]
+    aspect = maximum(w, h) / maximum(1, minimum(w, h))
+    keep = (
+        (w >= min_width)
+        & (h >= min_height)
+        & (w <= max_width)
+        & (h <= max_height)
+        & (aspect <= max_aspect_ratio)
+    )
+    return boxes[keep]
+
+
+def _suppress_boxes(boxes: ndarray, iou_threshold: float, max_inset: int) -> ndarray:
+    """Drop duplicate and nested-outline boxes, keeping the larger of each pair.
+
+    A box is suppressed by a larger kept box when their IoU is at least
+    ``iou_threshold``, or when it sits inside it with every edge within
+    ``max_inset`` pixels, like the inner contour of a widget's outline.
+    Suppression is greedy from the largest box down, so a suppressed box
+    doesn't suppress others.
+    """
+    n = len(boxes)
+    if n < 2:
+        return boxes
+    x0, y0, w, h = (boxes[:, i].astype(int64) for i in range(4))
+    # Largest first; coordinates break ties so the result is deterministic.
+    order = lexsort((h, w, x0, y0, -(w * h)))
+    x0, y0, w, h = x0[order], y0[order], w[order], h[order]
+    x1, y1, area = x0 + w, y0 + h, w * h
+
+    # suppressed_by[i, j]: box j (ranked before i) suppresses box i. Rows
+    # are filled in chunks, each only up to its own diagonal.
+    suppressed_by = zeros((n, n), bool)
+    for start in range(0, n, SUPPRESS_CHUNK):
+        end = min(n, start + SUPPRESS_CHUNK)
+        i, j = slice(start, end), slice(0, end)
+        ix0, iy0 = maximum(x0[i, None], x0[j]), maximum(y0[i, None], y0[j])
+        ix1, iy1 = minimum(x1[i, None], x1[j]), minimum(y1[i, None], y1[j])
+        inter = maximum(0, ix1 - ix0) * maximum(0, iy1 - iy0)
+        similar = inter >= iou_threshold * (area[i, None] + area[j] - inter)
+        nested = (
+            (inter == area[i, None])
+            & (x0[i, None] - x0[j] <= max_inset)
+            & (y0[i, None] - y0[j] <= max_inset)
+            & (x1[j] - x1[i, None] <= max_inset)
+            & (y1[j] - y1[i, None] <= max_inset)
+        )
+        suppressed_by[i, j] = similar | nested
+    suppressed_by &= tri(n, k=-1, dtype=bool)
+
+    keep = ones(n, bool)
+    for j in flatnonzero(suppressed_by.any(axis=0)).tolist():
+        if keep[j]:
+            keep &= ~suppressed_by[:, j]
+    return boxes[order[keep]]
+
+
+def _boxes_to_elements(boxes: ndarray, max_elements: int) -> ElementSet:
+    """Sort boxes into reading order, cap them and wrap them as an ElementSet."""
+    # Stable ordering keeps hint assignment deterministic; w and h break
+    # ties so the order doesn't depend on contour discovery order.
+    order = lexsort((boxes[:, 3], boxes[:, 2], boxes[:, 0], boxes[:, 1]))
+    if len(order) > max_elements:
+        logger.debug(f"Capping elements from {len(order)} to {max_elements}")
+        order = order[:max_elements]
+    return ElementSet(boxes[order])
 
 
 def detect_elements(
-    image: Image,
+    image: Image | ndarray,
     canny_min_val: int = 50,
     canny_max_val: int = 150,
     kernel_size: int = 3,
@@ -55,74 +244,326 @@ def detect_elements(
     max_height: int = 900,
     max_aspect_ratio: float = 6.0,
     max_elements: int = 150,
-) -> list[Child]:
+    iou_threshold: float = 0.7,
+    max_inset: int = 8,
+    workers: int = 1,
+) -> ElementSet:
     """Detect UI elements using OpenCV edge detection with simple filters.
 
     Filters trim obvious noise to keep hint lists reasonable; tweak thresholds per UI.
+    Duplicate and nested-outline boxes are then suppressed (see
+    ``_suppress_boxes``; ``max_inset=-1`` and ``iou_threshold`` above 1 turn
+    that off), so one widget gets one hint.
+    With ``workers`` above 1, contours are traced in that many horizontal bands
+    in parallel (0 uses every core); the result is the same as with one.
+    ``image`` may also be an RGB or grayscale array, e.g. from ``capture_gray``.
     """
-    children: list[Child] = []
+    gray_image = to_gray(image)
+    mask = _edge_mask(gray_image, canny_min_val, canny_max_val, kernel_size)
+    boxes = _filter_boxes(
+        _banded_boxes(mask, workers or os.cpu_count() or 1),
+        min_width,
+        min_height,
+        max_width,
+        max_height,
+        max_aspect_ratio,
+    )
+    unique = _suppress_boxes(boxes, iou_threshold, max_inset)
+    children = _boxes_to_elements(unique, max_elements)
 
-    gray_image = cvtColor(array(image), COLOR_BGR2GRAY)
+    logger.debug(
+        f"Detected {len(children)} elements after filtering "
+        f"({len(boxes) - len(unique)} duplicates suppressed)"
+    )
 
-    edges = Canny(gray_image, canny_min_val, canny_max_val)
+    return children
 
-    kernel = ones((kernel_size, kernel_size), uint8)
-    dilated_edges = dilate(edges, kernel)
 
-    contours, _ = findContours(dilated_edges, RETR_LIST, CHAIN_APPROX_SIMPLE)
+def _intersects(boxes: ndarray, rect: tuple[int, int, int, int]) -> ndarray:
+    """Mask of boxes (x, y, w, h) overlapping rect (x0, y0, x1, y1)."""
+    x0, y0, x1, y1 = rect
+    return (
+        (boxes[:, 0] < x1)
+        & (boxes[:, 0] + boxes[:, 2] > x0)
+        & (boxes[:, 1] < y1)
+        & (boxes[:, 1] + boxes[:, 3] > y0)
+    )
 
-    for contour in contours:
-        x, y, w, h = boundingRect(contour)
 
-        if w < min_width or h < min_height or w > max_width or h > max_height:
-            continue
+class IncrementalDetector:
+    """``detect_elements`` that only re-examines what changed on screen.
 
-        aspect = max(w, h) / max(1, min(w, h))
-        if aspect > max_aspect_ratio:
-            continue
+    Each frame is compared tile by tile with the previous one. Edges are
+    recomputed for changed tiles plus a small margin and patched into the
+    cached edge mask; contours are re-traced in a window around each
+    changed area, grown until no contour touching the change is cut off.
+    Cached boxes away from the changes are kept.
 
-        children.append(
-            Child(
-                absolute_position=(x, y),
-                relative_position=(x, y),
-                width=w,
-                height=h,
-            )
+    The result matches a full pass unless a change connects or splits
+    edges across the margin; a full pass runs on the first frame, on size
+    changes, when most tiles changed and every ``refresh_every`` frames.
+
+    Args:
+        tile_size: Tile edge in pixels
+        full_pass_fraction: Changed-tile share above which a full pass runs
+        refresh_every: Force a full pass after this many incremental frames
+        detect_kwargs: Same tuning arguments as ``detect_elements``
+    """
+
+    def __init__(
+        self,
+        tile_size: int = 64,
+        full_pass_fraction: float = 0.5,
+        refresh_every: int = 50,
+        **detect_kwargs,
+    ):
+        self.tile_size = tile_size
+        self.full_pass_fraction = full_pass_fraction
+        self.refresh_every = refresh_every
+        self.params = {**_DETECT_DEFAULTS, **detect_kwargs}
+        self.last_dirty_fraction = 1.0
+        self._gray: ndarray | None = None
+        self._mask: ndarray | None = None
+        self._boxes: ndarray | None = None
+        self._since_full = 0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget the cached frame so the next call does a full pass."""
+        self._gray = None
+
+    def detect(self, image: Image | ndarray) -> ElementSet:
+        """Detect elements, reusing work from the previous frame."""
+        gray = to_gray(image)
+        if gray is image:
+            # The frame is kept for the next diff; don't alias a reused buffer.
+            gray = gray.copy()
+        with self._lock:
+            return self._detect(gray)
+
+    def _detect(self, gray: ndarray) -> ElementSet:
+        p = self.params
+        dirty = self._dirty_tiles(gray)
+        if (
+            dirty is None
+            or dirty.mean() > self.full_pass_fraction
+            or self._since_full >= self.refresh_every
+        ):
+            self._full_pass(gray)
+        elif dirty.any():
+            self._since_full += 1
+            self.last_dirty_fraction = float(dirty.mean())
+            self._update(gray, dirty)
+        else:
+            self._since_full += 1
+            self.last_dirty_fraction = 0.0
+        self._gray = gray
+        logger.debug(
+            f"Incremental detection: {self.last_dirty_fraction:.0%} of tiles changed"
+        )
+        # Suppression looks at neighbouring boxes, so it runs on the whole
+        # set; the cached boxes stay unsuppressed for the next update.
+        unique = _suppress_boxes(self._boxes, p["iou_threshold"], p["max_inset"])
+        return _boxes_to_elements(unique, p["max_elements"])
+
+    def _full_pass(self, gray: ndarray):
+        p = self.params
+        self._mask = _edge_mask(
+            gray, p["canny_min_val"], p["canny_max_val"], p["kernel_size"]
+        )
+        workers = p["workers"] or os.cpu_count() or 1
+        self._boxes = self._filter(_banded_boxes(self._mask, workers))
+        self._since_full = 0
+        self.last_dirty_fraction = 1.0
+
+    def _filter(self, boxes: ndarray) -> ndarray:
+        p = self.params
+        return _filter_boxes(
+            boxes,
+            p["min_width"],
+            p["min_height"],
+            p["max_width"],
+            p["max_height"],
+            p["max_aspect_ratio"],
         )
 
-    # Stable ordering keeps hint assignment deterministic.
-    children.sort(
-        key=lambda c: (int(c.absolute_position[1]), int(c.absolute_position[0]))
+    def _dirty_tiles(self, gray: ndarray) -> ndarray | None:
+        if self._gray is None or self._gray.shape != gray.shape:
+            return None
+        t = self.tile_size
+        h, w = gray.shape
+        rows, cols = -(-h // t), -(-w // t)
+        changed = zeros((rows * t, cols * t), bool)
+        changed[:h, :w] = gray != self._gray
+        return changed.reshape(rows, t, cols, t).any(axis=(1, 3))
+
+    def _update(self, gray: ndarray, dirty: ndarray):
+        p = self.params
+        h, w = gray.shape
+        t = self.tile_size
+        # Sobel aperture and dilation both reach this far from a change.
+        pad = p["kernel_size"] + 2
+
+        count, _, stats, _ = connectedComponentsWithStats(dirty.astype(uint8), 8)
+        regions = []
+        for tx, ty, tw, th, _ in stats[1:count]:
+            region = _expand((tx * t, ty * t, (tx + tw) * t, (ty + th) * t), pad, w, h)
+            regions.append(self._patch_mask(gray, region, pad))
+
+        keep = ones(len(self._boxes), bool)
+        covers = []
+        for region in regions:
+            hit = _intersects(self._boxes, region)
+            keep &= ~hit
+            # The retrace window must hold every box it replaces, e.g. a
+            # large enclosing outline whose edges are far from the change.
+            covers.append(_union(region, _bounds(self._boxes[hit], pad=1)))
+        found = [self._boxes[keep]]
+        for i, region in enumerate(regions):
+            boxes = self._retrace(region, covers[i], w, h)
+            # A box touching several regions is only taken from the first.
+            for earlier in regions[:i]:
+                boxes = boxes[~_intersects(boxes, earlier)]
+            found.append(self._filter(boxes))
+        self._boxes = concatenate(found)
+
+    def _patch_mask(self, gray: ndarray, region: tuple, pad: int) -> tuple:
+        """Recompute the edge mask over region and return the area that changed.
+
+        Canny's hysteresis can carry a change along weak edges past the
+        region, so the patch is grown until a ring around it matches the
+        cached mask.
+        """
+        p = self.params
+        h, w = gray.shape
+        ring = pad
+        while True:
+            outer = _expand(region, ring, w, h)
+            # Canny needs context around the patch to match a full pass.
+            ctx = _expand(outer, pad, w, h)
+            fresh = _edge_mask(
+                gray[ctx[1] : ctx[3], ctx[0] : ctx[2]],
+                p["canny_min_val"],
+                p["canny_max_val"],
+                p["kernel_size"],
+            )[
+                outer[1] - ctx[1] : outer[3] - ctx[1],
+                outer[0] - ctx[0] : outer[2] - ctx[0],
+            ]
+            cached = self._mask[outer[1] : outer[3], outer[0] : outer[2]]
+            changed = fresh != cached
+            changed[
+                region[1] - outer[1] : region[3] - outer[1],
+                region[0] - outer[0] : region[2] - outer[0],
+            ] = False
+            if not changed.any() or outer == (0, 0, w, h):
+                cached[...] = fresh
+                return region if not changed.any() else outer
+            region = outer
+            ring *= 2
+
+    def _retrace(self, region: tuple, cover: tuple, w: int, h: int) -> ndarray:
+        """Raw boxes of contours touching region, none cut off by the window."""
+        margin = self.tile_size
+        while True:
+            win = _union(_expand(region, margin, w, h), _expand(cover, 0, w, h))
+            boxes = _contour_boxes(
+                self._mask[win[1] : win[3], win[0] : win[2]], (win[0], win[1])
+            )
+            boxes = boxes[_intersects(boxes, region)]
+            if win == (0, 0, w, h):
+                return boxes
+            cut = (
+                ((boxes[:, 0] <= win[0]) & (win[0] > 0))
+                | ((boxes[:, 1] <= win[1]) & (win[1] > 0))
+                | ((boxes[:, 0] + boxes[:, 2] >= win[2]) & (win[2] < w))
+                | ((boxes[:, 1] + boxes[:, 3] >= win[3]) & (win[3] < h))
+            )
+            if not cut.any():
+                return boxes
+            margin *= 2
+
+
+def _union(a: tuple, b: tuple | None) -> tuple:
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _bounds(boxes: ndarray, pad: int = 0) -> tuple | None:
+    """Rect (x0, y0, x1, y1) around all boxes, or None if there are none."""
+    if len(boxes) == 0:
+        return None
+    return (
+        int(boxes[:, 0].min()) - pad,
+        int(boxes[:, 1].min()) - pad,
+        int((boxes[:, 0] + boxes[:, 2]).max()) + pad,
+        int((boxes[:, 1] + boxes[:, 3]).max()) + pad,
     )
 
-    if len(children) > max_elements:
-        logger.debug(f"Capping elements from {len(children)} to {max_elements}")
-        children = children[:max_elements]
 
-    logger.debug(f"Detected {len(children)} elements after filtering")
+def _expand(rect: tuple[int, int, int, int], by: int, w: int, h: int):
+    x0, y0, x1, y1 = rect
+    return (max(0, x0 - by), max(0, y0 - by), min(w, x1 + by), min(h, y1 + by))
 
-    return children
 
+_DETECT_DEFAULTS = {
+    name: param.default
+    for name, param in signature(detect_elements).parameters.items()
+    if name != "image"
+}
 
-def get_hints(children: list[Child], alphabet: str = "asdfghjkl") -> dict[str, Child]:
-    """Generate hint mapping from alphabet to detected elements.
+_detector: IncrementalDetector | None = None
+_tracker: ElementTracker | None = None
 
-    :param children: List of detected Child elements.
-    :param alphabet: Characters to use for hints.
-    :return: Dictionary mapping hint strings to Child objects.
-    """
-    hints: dict[str, Child] = {}
 
-    if len(children) == 0:
-        return hints
+def get_detector() -> IncrementalDetector:
+    """Shared incremental detector for repeated selections on one screen."""
+    global _detector
+    if _detector is None:
+        _detector = IncrementalDetector(workers=DETECT_WORKERS)
+    return _detector
+
+
+def get_tracker() -> ElementTracker:
+    """Shared tracker keeping hints stable across selections on one screen."""
+    global _tracker
+    if _tracker is None:
+        _tracker = ElementTracker()
+    return _tracker
 
-    for child, hint in zip(
-        children,
-        product(alphabet, repeat=ceil(log(len(children)) / log(len(alphabet)))),
-    ):
-        hints["".join(hint)] = child
 
-    return hints
+def get_hints(
+    children: ElementSet,
+    alphabet: str = "asdfghjkl",
+    tracker: ElementTracker | None = None,
+) -> dict[str, ElementView]:
+    """Generate hint mapping from alphabet to detected elements.
+
+    Hints are a prefix-free code, shortest for the likeliest elements. They
+    are also stored on the set, so each element's ``hint`` is set.
+
+    :param children: Detected elements.
+    :param alphabet: Characters to use for hints.
+    :param tracker: Tracker carrying hints over from the previous detection;
+        its own alphabet is used.
+    :return: Dictionary mapping hint strings to element views.
+    """
+    if tracker is not None:
+        tracker.update(children)
+        keystrokes = tracker.keystrokes
+    else:
+        weights = hint_weights(children)
+        labels = huffman_labels(weights, alphabet)
+        children.set_hints(labels)
+        keystrokes = expected_keystrokes(labels, weights)
+    if len(children):
+        fixed = len(fixed_length_labels(len(children), alphabet)[0])
+        logger.info(
+            f"Hints for {len(children)} elements: {keystrokes:.2f} keys on "
+            f"average ({fixed} with fixed-length hints)"
+        )
+    return {view.hint: view for view in children}
 
 
 def on_element_selected(click_x: float, click_y: float):
@@ -132,6 +573,7 @@ def on_element_selected(click_x: float, click_y: float):
     :param click_y: Y coordinate to click.
     """
     logger.info(f"Clicking at ({click_x}, {click_y})")
+    get_tracker().record_click(click_x, click_y)
     click(
         int(click_x),
         int(click_y),
@@ -146,12 +588,11 @@ def run_element_selection():
     logger.info("Starting element selection mode")
 
     try:
-        screenshot = capture_screen()
-        children = detect_elements(screenshot)
+        children = get_detector().detect(capture_gray())
         if not children:
             logger.warning("No elements detected; aborting selection")
             return
-        hints = get_hints(children)
+        hints = get_hints(children, tracker=get_tracker())
 
         from gi import require_version
 
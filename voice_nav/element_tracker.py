@@ -0,0 +1,307 @@
+"""Hints that are short for likely targets and stable across re-detections.
+
+Hints form a prefix-free code built Huffman-style from each element's
+likelihood (size, position and click history), so likely targets get
+one-key hints and the average number of keystrokes is minimal.
+
+Each detection is matched against the previous one: identical boxes
+first, through a dict, then the rest by IoU among boxes close on x
+(sort and sweep). Matched elements keep their hint and track id; new
+elements take the shortest hints that keep the code prefix-free. A
+button that stays put keeps its hint however the rest of the screen
+changes, unless that costs too many keystrokes.
+"""
+
+import heapq
+import threading
+from collections import deque
+from itertools import islice, product
+from typing import Optional
+
+import numpy as np
+
+from child import ElementSet
+
+MATCH_IOU = 0.5  # overlap for a moved or resized box to count as the same element
+MIN_SIZE_PX = 20.0  # elements smaller than this (sqrt of area) are less likely targets
+MAX_SIZE_PX = 120.0  # larger elements are no more likely than this
+TOP_BAND = 0.1  # share of the layout height holding menus, tabs and toolbars
+TOP_BAND_BOOST = 0.5
+CLICK_BOOST = 2.0  # extra weight per past click on an element
+REHINT_SLACK = 0.2  # average extra keystrokes accepted to keep hints stable
+
+
+def fixed_length_labels(count: int, alphabet: str = "asdfghjkl") -> list[str]:
+    """The first ``count`` hints of the length needed to label them all."""
+    if count == 0:
+        return []
+    length = 1
+    while len(alphabet) ** length < count:
+        length += 1
+    return ["".join(hint) for hint in islice(product(alphabet, repeat=length), count)]
+
+
+def hint_weights(
+    elements: ElementSet, clicks: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Relative likelihood of each element being selected.
+
+    Proportional to the element's size (square root of its area, clipped
+    to ``MIN_SIZE_PX``..``MAX_SIZE_PX``), raised for elements in the top
+    band of the layout and for elements clicked before.
+
+    Args:
+        elements: Detected elements
+        clicks: Past clicks per element
+    """
+    boxes = elements.boxes.astype(np.float64)
+    weights = np.sqrt(boxes[:, 2] * boxes[:, 3]).clip(MIN_SIZE_PX, MAX_SIZE_PX)
+    if len(boxes):
+        height = (boxes[:, 1] + boxes[:, 3]).max()
+        centers = boxes[:, 1] + boxes[:, 3] / 2
+        weights[centers < TOP_BAND * height] *= 1 + TOP_BAND_BOOST
+    if clicks is not None:
+        weights *= 1 + CLICK_BOOST * clicks
+    return weights
+
+
+def huffman_labels(weights: np.ndarray, alphabet: str = "asdfghjkl") -> list[str]:
+    """Prefix-free hints minimizing the weighted average hint length.
+
+    A k-ary Huffman code over the alphabet; heavier elements get shorter
+    hints and, among siblings, earlier letters. Equal weights favour
+    earlier elements.
+    """
+    count, k = len(weights), len(alphabet)
+    if count <= 1:
+        return list(alphabet[:count])
+    # Zero-weight padding makes every merge take k nodes; it sinks to the
+    # deepest level, so each internal node keeps at least two real leaves.
+    padding = -(count - 1) % (k - 1)
+    heap = [(0.0, -1 - i, None) for i in range(padding)]
+    heap += [(w, count - i, i) for i, w in enumerate(np.asarray(weights).tolist())]
+    heapq.heapify(heap)
+    order = count
+    while len(heap) > 1:
+        children = [heapq.heappop(heap) for _ in range(k)]
+        order += 1
+        heapq.heappush(heap, (sum(c[0] for c in children), order, children[::-1]))
+
+    labels = [""] * count
+    stack = [(heap[0][2], "")]
+    while stack:
+        node, prefix = stack.pop()
+        if isinstance(node, int):
+            labels[node] = prefix
+        elif node is not None:
+            stack.extend((child[2], prefix + ch) for child, ch in zip(node, alphabet))
+    return labels
+
+
+def expected_keystrokes(labels: list[str], weights: np.ndarray) -> float:
+    """Average keys typed per selection, weighting elements by likelihood."""
+    total = float(np.sum(weights))
+    if not labels or total <= 0:
+        return float(np.mean([len(label) for label in labels])) if labels else 0.0
+    return float(np.dot([len(label) for label in labels], weights)) / total
+
+
+def _free_labels(held: set[str], count: int, alphabet: str) -> Optional[list[str]]:
+    """The ``count`` shortest hints that keep ``held`` prefix-free, or None."""
+    if count == 0:
+        return []
+    prefixes = {label[:i] for label in held for i in range(len(label))}
+    free = []
+    queue = deque([""])
+    while queue:
+        node = queue.popleft()
+        if node in prefixes:
+            queue.extend(node + ch for ch in alphabet)
+        elif node not in held:
+            free.append(node)
+    if not free:
+        return None
+    # Each split of the shortest free hint trades it for k longer ones.
+    while len(free) < count:
+        node = free.pop(0)
+        free.extend(node + ch for ch in alphabet)
+        free.sort(key=len)
+    return free[:count]
+
+
+def _box_keys(boxes: np.ndarray) -> list[bytes]:
+    """Each box as bytes, a cheaper dict key than a tuple."""
+    boxes = np.ascontiguousarray(boxes, np.int64).reshape(-1, 4)
+    return boxes.view(np.dtype((np.void, boxes.itemsize * 4))).ravel().tolist()
+
+
+def _candidate_pairs(
+    a: np.ndarray, b: np.ndarray, iou_threshold: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Index pairs of boxes in ``a`` and ``b`` that may reach the IoU threshold.
+
+    Sort and sweep on x: an IoU of ``t`` needs an x overlap of at least
+    ``t`` times either width, so ``b`` must start within
+    ``a.x0 - a.w * (1 - t) / t`` .. ``a.x0 + a.w * (1 - t)``.
+    """
+    order = np.argsort(b[:, 0], kind="stable")
+    if iou_threshold <= 0:
+        lo = np.zeros(len(a), np.int64)
+        hi = np.full(len(a), len(b), np.int64)
+    else:
+        slack = 1 - iou_threshold
+        xs = b[order, 0]
+        lo = np.searchsorted(xs, a[:, 0] - a[:, 2] * slack / iou_threshold, "left")
+        hi = np.searchsorted(xs, a[:, 0] + a[:, 2] * slack, "right")
+    counts = np.maximum(hi - lo, 0)
+    r = np.repeat(np.arange(len(a)), counts)
+    offsets = np.arange(len(r)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return r, order[np.repeat(lo, counts) + offsets]
+
+
+def match_boxes(
+    previous: np.ndarray, current: np.ndarray, iou_threshold: float = MATCH_IOU
+) -> np.ndarray:
+    """For each current box, the index of its previous box, or -1.
+
+    Identical boxes are paired first. The remaining pairs with IoU of at
+    least ``iou_threshold`` are then taken greedily, highest IoU first;
+    only pairs close enough on x to reach it are compared.
+
+    Args:
+        previous: (M, 4) x, y, width, height boxes of the last detection
+        current: (N, 4) boxes of this detection
+        iou_threshold: Minimum IoU to match a box that moved or resized
+    """
+    matches = np.full(len(current), -1, np.int64)
+    exact: dict[bytes, list[int]] = {}
+    for i, key in enumerate(_box_keys(previous)):
+        exact.setdefault(key, []).append(i)
+    prev_free = np.ones(len(previous), bool)
+    for j, key in enumerate(_box_keys(current)):
+        candidates = exact.get(key)
+        if candidates:
+            i = candidates.pop()
+            matches[j] = i
+            prev_free[i] = False
+
+    rows = np.flatnonzero(prev_free)
+    cols = np.flatnonzero(matches < 0)
+    if not len(rows) or not len(cols):
+        return matches
+    a = previous[rows].astype(np.int64)
+    b = current[cols].astype(np.int64)
+    r, c = _candidate_pairs(a, b, iou_threshold)
+    ax0, ay0, aw, ah = a.T
+    bx0, by0, bw, bh = b.T
+    ix = np.minimum((ax0 + aw)[r], (bx0 + bw)[c]) - np.maximum(ax0[r], bx0[c])
+    iy = np.minimum((ay0 + ah)[r], (by0 + bh)[c]) - np.maximum(ay0[r], by0[c])
+    inter = np.clip(ix, 0, None) * np.clip(iy, 0, None)
+    iou = inter / np.maximum((aw * ah)[r] + (bw * bh)[c] - inter, 1)
+    keep = iou >= iou_threshold
+    r, c, iou = r[keep], c[keep], iou[keep]
+    order = np.lexsort((c, r, -iou))
+    taken_rows: dict[int, int] = {}
+    taken_cols: set[int] = set()
+    for ri, ci in zip(r[order].tolist(), c[order].tolist()):
+        if ri not in taken_rows and ci not in taken_cols:
+            taken_rows[ri] = ci
+            taken_cols.add(ci)
+    taken_r = np.fromiter(taken_rows.keys(), np.int64, len(taken_rows))
+    taken_c = np.fromiter(taken_rows.values(), np.int64, len(taken_rows))
+    matches[cols[taken_c]] = rows[taken_r]
+    return matches
+
+
+class ElementTracker:
+    """Carries hints, track ids and click counts from one detection to the next.
+
+    Matched elements keep their hints and new elements get free hints,
+    as long as the average keystrokes stay within ``REHINT_SLACK`` of a
+    fresh ``huffman_labels`` code; otherwise every element is hinted
+    afresh. Track ids are kept for matched elements either way.
+
+    Args:
+        alphabet: Characters to use for hints
+        iou_threshold: Minimum IoU to match a box that moved or resized
+    """
+
+    def __init__(self, alphabet: str = "asdfghjkl", iou_threshold: float = MATCH_IOU):
+        self.alphabet = alphabet
+        self.iou_threshold = iou_threshold
+        self._boxes = np.empty((0, 4), np.int32)
+        self._labels: list[str] = []
+        self._track_ids = np.empty(0, np.int64)
+        self._next_id = 0
+        self._clicks: dict[int, int] = {}
+        self.keystrokes = 0.0
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget previous elements; the next update hints from scratch."""
+        with self._lock:
+            self._boxes = np.empty((0, 4), np.int32)
+            self._labels = []
+            self._track_ids = np.empty(0, np.int64)
+
+    def update(self, elements: ElementSet) -> np.ndarray:
+        """Set hints and track ids on a new detection.
+
+        Returns:
+            Index of each element's match in the previous detection, or -1
+        """
+        with self._lock:
+            matches = match_boxes(self._boxes, elements.boxes, self.iou_threshold)
+            matched = matches >= 0
+
+            track_ids = np.empty(len(elements), np.int64)
+            track_ids[matched] = self._track_ids[matches[matched]]
+            new = np.flatnonzero(~matched)
+            track_ids[new] = np.arange(self._next_id, self._next_id + len(new))
+            self._next_id += len(new)
+
+            clicks = np.array([self._clicks.get(t, 0) for t in track_ids.tolist()])
+            weights = hint_weights(elements, clicks)
+            labels = huffman_labels(weights, self.alphabet)
+            self.keystrokes = expected_keystrokes(labels, weights)
+            if matched.any():
+                kept = self._keep_labels(matches, weights)
+                if kept is not None:
+                    keystrokes = expected_keystrokes(kept, weights)
+                    if keystrokes <= self.keystrokes + REHINT_SLACK:
+                        labels, self.keystrokes = kept, keystrokes
+
+            elements.set_hints(labels)
+            elements.track_ids = track_ids
+            self._boxes = elements.boxes.copy()
+            self._labels = labels
+            self._track_ids = track_ids
+            return matches
+
+    def _keep_labels(
+        self, matches: np.ndarray, weights: np.ndarray
+    ) -> Optional[list[str]]:
+        """Previous hints for matched elements, free hints for the rest."""
+        labels = [self._labels[i] if i >= 0 else "" for i in matches.tolist()]
+        new = [j for j in np.argsort(-weights, kind="stable").tolist() if not labels[j]]
+        free = _free_labels(set(labels) - {""}, len(new), self.alphabet)
+        if free is None:
+            return None
+        for j, label in zip(new, free):
+            labels[j] = label
+        return labels
+
+    def record_click(self, x: float, y: float):
+        """Count a click on the innermost current element at a point."""
+        with self._lock:
+            boxes = self._boxes
+            inside = np.flatnonzero(
+                (boxes[:, 0] <= x)
+                & (x < boxes[:, 0] + boxes[:, 2])
+                & (boxes[:, 1] <= y)
+                & (y < boxes[:, 1] + boxes[:, 3])
+            )
+            if len(inside):
+                areas = boxes[inside, 2].astype(np.int64) * boxes[inside, 3]
+                track_id = int(self._track_ids[inside[np.argmin(areas)]])
+                self._clicks[track_id] = self._clicks.get(track_id, 0) + 1
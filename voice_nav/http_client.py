@@ -0,0 +1,241 @@
+"""Shared keep-alive HTTP client for the STT and LLM APIs.
+
+All outgoing API calls go through one pooled session so TCP and TLS
+handshakes are paid once per host, not once per request. ``prewarm`` opens
+those connections ahead of time, e.g. when a voice gesture starts, so they
+are ready by the time the audio or prompt is.
+"""
+
+import asyncio
+import logging
+import os
+import ssl
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+POOL_CONNECTIONS = 4  # distinct hosts kept in the pool
+POOL_MAXSIZE = 4  # idle connections kept per host
+PREWARM_TIMEOUT_SEC = 5.0
+HTTP2_ENABLED = os.getenv("VOICE_NAV_HTTP2") == "1"
+
+_session: Optional[requests.Session] = None
+_http2_clients: dict = {}  # verify setting -> httpx.Client
+_http2_unavailable = False
+_lock = threading.Lock()
+_warming: set[str] = set()
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_session() -> requests.Session:
+    """Get the shared keep-alive session."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE
+            )
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def _ssl_verify(verify):
+    """httpx ``verify`` for a requests one: a bool or a CA bundle path."""
+    if verify is None:
+        return True
+    if isinstance(verify, str):
+        if os.path.isdir(verify):
+            return ssl.create_default_context(capath=verify)
+        return ssl.create_default_context(cafile=verify)
+    return verify
+
+
+def _get_http2_client(verify=None):
+    """Get the shared HTTP/2 client for a ``verify`` setting.
+
+    Returns None if httpx[http2] is unavailable.
+    """
+    with _lock:
+        if not _http2_available():
+            return None
+        client = _http2_clients.get(verify)
+        if client is None:
+            import httpx
+
+            client = httpx.Client(
+                http2=True,
+                verify=_ssl_verify(verify),
+                limits=httpx.Limits(max_keepalive_connections=POOL_MAXSIZE),
+            )
+            _http2_clients[verify] = client
+        return client
+
+
+def _http2_available() -> bool:
+    """Whether httpx[http2] is installed; warns once if not."""
+    global _http2_unavailable
+    if not _http2_unavailable:
+        try:
+            import h2  # noqa: F401
+            import httpx  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP/2 needs httpx[http2]; using HTTP/1.1")
+            _http2_unavailable = True
+    return not _http2_unavailable
+
+
+def get_async_client():
+    """Get a pooled ``httpx.AsyncClient`` for the running event loop.
+
+    httpx async clients are bound to the loop they were first used on, so
+    one is kept per loop and dropped with it. HTTP/2 falls back to
+    HTTP/1.1 if httpx[http2] is not installed.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        with _lock:
+            http2 = HTTP2_ENABLED and _http2_available()
+        client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=POOL_CONNECTIONS * POOL_MAXSIZE,
+                max_keepalive_connections=POOL_MAXSIZE,
+            ),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def post(url: str, **kwargs):
+    """POST through the shared pool; same arguments as ``requests.post``.
+
+    With ``stream=True`` the body is left unread for ``iter_lines``; on the
+    HTTP/2 path error bodies are still read so ``.text`` works either way.
+
+    Raises:
+        requests.RequestException: On transport errors, for either protocol,
+            including those raised while iterating a streamed body
+    """
+    verify = kwargs.pop("verify", None)
+    client = _get_http2_client(verify) if HTTP2_ENABLED else None
+    if client is None:
+        if verify is not None:
+            kwargs["verify"] = verify
+        return get_session().post(url, **kwargs)
+
+    stream = kwargs.pop("stream", False)
+    with _requests_errors():
+        request = client.build_request("POST", url, **kwargs)
+        resp = client.send(request, stream=stream)
+        if stream and resp.status_code >= 400:
+            resp.read()
+    return _HTTPXResponse(resp)
+
+
+@contextmanager
+def _requests_errors():
+    """Re-raise httpx transport errors as the requests ones callers catch."""
+    import httpx
+
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise requests.Timeout(str(e)) from e
+    except httpx.HTTPError as e:
+        raise requests.ConnectionError(str(e)) from e
+
+
+class _HTTPXResponse:
+    """An httpx response whose body iterators raise requests exceptions.
+
+    ``status_code``, ``text``, ``json()`` and ``close()`` already match
+    requests and are passed through, like every other attribute.
+    """
+
+    def __init__(self, resp):
+        self._resp = resp
+
+    def __getattr__(self, name):
+        return getattr(self._resp, name)
+
+    def iter_lines(self):
+        with _requests_errors():
+            yield from self._resp.iter_lines()
+
+    def iter_content(self, chunk_size=None):
+        with _requests_errors():
+            yield from self._resp.iter_bytes(chunk_size)
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def _open_connection(url: str, verify):
+    # A bare connect isn't enough: TLS 1.3 servers send session tickets right
+    # after the handshake, and urllib3 discards idle connections with unread
+    # data as dropped. A HEAD on the origin reads them and leaves a live
+    # keep-alive connection (or HTTP/2 connection) in the pool.
+    client = _get_http2_client(verify) if HTTP2_ENABLED else None
+    if client is not None:
+        client.head(_origin(url), timeout=PREWARM_TIMEOUT_SEC)
+        return
+    session = get_session()
+    session.head(
+        _origin(url),
+        timeout=PREWARM_TIMEOUT_SEC,
+        verify=session.verify if verify is None else verify,
+    ).close()
+
+
+def prewarm(*urls: str, verify=None) -> threading.Thread:
+    """Open pooled connections to each URL's host in the background.
+
+    Each host gets a HEAD request on its root; the status is ignored. Hosts
+    with an idle pooled connection reuse it and hosts already being warmed
+    are skipped, so this is cheap to call on every gesture.
+
+    Args:
+        urls: URLs whose hosts will be contacted soon
+        verify: TLS verification setting the real requests will use
+
+    Returns:
+        The background thread, for callers that want to wait on it
+    """
+
+    def run():
+        for url in urls:
+            origin = _origin(url)
+            with _lock:
+                if origin in _warming:
+                    continue
+                _warming.add(origin)
+            start = time.perf_counter()
+            try:
+                _open_connection(url, verify)
+                logger.debug(
+                    f"Pre-warmed {origin} in {(time.perf_counter() - start) * 1000:.0f} ms"
+                )
+            except Exception as e:
+                logger.debug(f"Pre-warm of {origin} failed: {e}")
+            finally:
+                with _lock:
+                    _warming.discard(origin)
+
+    thread = threading.Thread(target=run, daemon=True, name="http-prewarm")
+    thread.start()
+    return thread
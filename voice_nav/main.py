@@ -7,26 +7,36 @@ import os
 import subprocess
 import sys
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 
 from PIL import Image
 
-try:
-    import pyscreenshot as ImageGrab
-except ImportError:
-    from PIL import ImageGrab
-
 from schemas import Block, Command, ResolveResult
 from stt import transcribe_audio_file
-from stt_elevenlabs import transcribe_from_mic, ElevenLabsSTTError
+from stt_elevenlabs import STT_URL, ElevenLabsSTTError
+from stt_router import get_router, transcribe_from_mic
 from planner import plan_command
-from element_selector import detect_elements, get_hints, run_element_selection
-from child import Child
+from element_selector import (
+    get_detector,
+    get_hints,
+    get_tracker,
+    run_element_selection,
+)
+from block_registry import BlockRegistry
 from mouse import click, move
 from mouse_enums import MouseButton, MouseButtonState
-from typing_control import type_text
+from typing_control import type_stream, type_text
 import evdev
 import select
-from ai_client import query_openrouter_with_vision, OpenRouterError
+from ai_client import (
+    OPENROUTER_API_URL,
+    stream_openrouter_with_vision,
+    OpenRouterError,
+)
+from http_client import prewarm
+from screen_capture import capture_gray, capture_image, get_source
+from vision_payload import encode_screenshot
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,18 +46,49 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def take_screenshot():
-    """Take a screenshot and save it."""
+_capture_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture")
+
+
+def grab_screen() -> Image.Image:
+    """Capture the screen without saving it."""
+    return capture_image()
+
+
+def save_screenshot(screenshot: Image.Image) -> str:
+    """Save a screenshot under screenshots/ and return its path."""
     os.makedirs("screenshots", exist_ok=True)
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     filename = os.path.join("screenshots", f"screenshot_{timestamp}.png")
-    try:
-        screenshot = ImageGrab.grab(backend="grim")
-    except Exception:
-        screenshot = ImageGrab.grab()
     screenshot.save(filename)
     logger.info(f"Screenshot saved as {filename}")
-    return filename, screenshot
+    return filename
+
+
+def take_screenshot():
+    """Take a screenshot and save it."""
+    screenshot = grab_screen()
+    return save_screenshot(screenshot), screenshot
+
+
+def start_speculative_screenshot() -> Future:
+    """Capture and start encoding the screen while the user is speaking.
+
+    The encode lands in the vision payload cache, so a vision query on this
+    screenshot only waits for whatever is left of it. If the command turns
+    out not to need the screen, dropping the future is all it costs.
+    """
+
+    def capture():
+        start = time.perf_counter()
+        screenshot = grab_screen()
+        encode_screenshot(screenshot)
+        logger.info(
+            f"Speculative screenshot captured in "
+            f"{(time.perf_counter() - start) * 1000:.0f} ms"
+        )
+        return screenshot
+
+    return _capture_pool.submit(capture)
 
 
 def on_hotkey():
@@ -63,36 +104,6 @@ def trigger_element_selection():
     print("Element selection disabled - screenshot functionality removed")
 
 
-def children_to_blocks(children: list[Child], hints: dict[str, Child]) -> list[Block]:
-    """Convert Child elements to Block format.
-
-    Args:
-        children: List of Child elements
-        hints: Hint mapping
-
-    Returns:
-        List of Block objects
-    """
-    import uuid
-
-    blocks = []
-    for i, child in enumerate(children):
-        hint_key = next((k for k, v in hints.items() if v == child), None)
-        block = Block(
-            id=str(uuid.uuid4()),
-            x=child.absolute_position[0],
-            y=child.absolute_position[1],
-            w=child.width,
-            h=child.height,
-            label=f"element_{i}",
-            score=1.0,
-            text=None,
-            hint=hint_key,
-        )
-        blocks.append(block)
-    return blocks
-
-
 async def execute_command(command: Command):
     """Execute a command.
 
@@ -109,6 +120,7 @@ async def execute_command(command: Command):
                 center_x = int(block.x + block.w / 2)
                 center_y = int(block.y + block.h / 2)
                 logger.info(f"Clicking at ({center_x}, {center_y})")
+                get_tracker().record_click(center_x, center_y)
                 click(
                     center_x,
                     center_y,
@@ -125,6 +137,7 @@ async def execute_command(command: Command):
                 center_x = int(block.x + block.w / 2)
                 center_y = int(block.y + block.h / 2)
                 logger.info(f"Double-clicking at ({center_x}, {center_y})")
+                get_tracker().record_click(center_x, center_y)
                 click(
                     center_x,
                     center_y,
@@ -158,26 +171,54 @@ async def execute_command(command: Command):
         logger.warning(f"Clarification needed: {command.reason}")
 
 
-_current_blocks: list[Block] = []
+_blocks = BlockRegistry()
 
 
 def _find_block_by_id(block_id: str) -> Block:
-    """Find a block by ID.
+    """Find a block of the current detection by ID.
 
     Args:
         block_id: Block ID to find
 
     Returns:
         Block object
+
+    Raises:
+        StaleBlockError: If the block is from an earlier detection
     """
-    for block in _current_blocks:
-        if block.id == block_id:
-            return block
-    raise ValueError(f"Block not found: {block_id}")
+    return _blocks.get(block_id)
+
+
+@contextmanager
+def _stage(timings: dict[str, float], name: str):
+    """Record how long the enclosed stage took, in ms."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = (time.perf_counter() - start) * 1000
+
+
+def _analyze_screen(timings: dict[str, float]) -> list[Block]:
+    """Screenshot → detect → hints → blocks; CPU-bound, run in an executor."""
+    with _stage(timings, "screenshot"):
+        gray = capture_gray()
+    with _stage(timings, "detect"):
+        children = get_detector().detect(gray)
+    with _stage(timings, "hints"):
+        get_hints(children, tracker=get_tracker())
+    with _stage(timings, "blocks"):
+        blocks = list(_blocks.publish(children).blocks)
+    logger.info(f"Screen: {len(children)} elements, {len(blocks)} blocks")
+    return blocks
 
 
 async def resolve_voice_command(audio_path: str) -> ResolveResult:
-    """Complete flow: screenshot → detect → transcribe → plan.
+    """Complete flow: (screenshot → detect) ∥ transcribe → plan.
+
+    Screen analysis runs in an executor while the audio is transcribed;
+    the two are joined for planning, so latency is max(screen, speech)
+    plus planning.
 
     Args:
         audio_path: Path to audio file with voice command
@@ -185,44 +226,42 @@ async def resolve_voice_command(audio_path: str) -> ResolveResult:
     Returns:
         ResolveResult with transcript and command
     """
-    global _current_blocks
-
     logger.info("=" * 60)
     logger.info("Starting Voice Command Resolution")
     logger.info("=" * 60)
 
-    _, image = take_screenshot()
-    logger.info("[Step 1] Captured screenshot")
+    loop = asyncio.get_running_loop()
+    timings: dict[str, float] = {}
 
-    children = detect_elements(image)
-    logger.info(f"[Step 2] Detected {len(children)} elements")
+    async def screen_stage():
+        with _stage(timings, "screen"):
+            return await loop.run_in_executor(None, _analyze_screen, timings)
 
-    hints = get_hints(children)
-    logger.info(f"[Step 3] Generated {len(hints)} hints")
+    async def speech_stage():
+        with _stage(timings, "speech"):
+            return await transcribe_audio_file(audio_path)
 
-    blocks = children_to_blocks(children, hints)
-    _current_blocks = blocks
-    logger.info(f"[Step 4] Created {len(blocks)} blocks")
+    with _stage(timings, "total"):
+        blocks, transcript = await asyncio.gather(screen_stage(), speech_stage())
+        logger.info(f"Transcribed audio: '{transcript}'")
 
-    transcript = await transcribe_audio_file(audio_path)
-    logger.info(f"[Step 5] Transcribed audio: '{transcript}'")
+        with _stage(timings, "plan"):
+            command = await plan_command(transcript, blocks)
+        logger.info(
+            f"Planned command: {command.action} (confidence: {command.confidence})"
+        )
 
-    command = await plan_command(transcript, blocks)
     logger.info(
-        f"[Step 6] Planned command: {command.action} (confidence: {command.confidence})"
+        "Stage timings: "
+        + ", ".join(f"{name} {ms:.0f} ms" for name, ms in timings.items())
     )
-
     logger.info("=" * 60)
     logger.info("Voice Command Resolution Complete")
     logger.info("=" * 60)
 
-    return ResolveResult(transcript=transcript, command=command, blocks=blocks)
-
-    logger.info("=" * 60)
-    logger.info("Voice Command Resolution Complete")
-    logger.info("=" * 60)
-
-    return ResolveResult(transcript=transcript, command=command, blocks=blocks)
+    return ResolveResult(
+        transcript=transcript, command=command, blocks=blocks, timings=timings
+    )
 
 
 async def resolve_screenshot_only(screenshot_path: str | None = None) -> ResolveResult:
@@ -234,17 +273,14 @@ async def resolve_screenshot_only(screenshot_path: str | None = None) -> Resolve
     Returns:
         ResolveResult with blocks
     """
-    global _current_blocks
-
     if screenshot_path:
         image = Image.open(screenshot_path)
     else:
-        _, image = take_screenshot()
+        image = capture_gray()
 
-    children = detect_elements(image)
-    hints = get_hints(children)
-    blocks = children_to_blocks(children, hints)
-    _current_blocks = blocks
+    children = get_detector().detect(image)
+    get_hints(children, tracker=get_tracker())
+    blocks = list(_blocks.publish(children).blocks)
 
     logger.info(f"Detected {len(blocks)} blocks from screenshot")
 
@@ -258,6 +294,9 @@ async def resolve_screenshot_only(screenshot_path: str | None = None) -> Resolve
 def on_voice_hotkey():
     """Hotkey handler to capture speech and type it or query AI with screenshot."""
     logging.info("Voice hotkey pressed; recording...")
+    pressed_at = time.perf_counter()
+    prewarm(STT_URL, OPENROUTER_API_URL)
+    speculative = start_speculative_screenshot()
     try:
         transcript = transcribe_from_mic()
         logging.info(f"Heard: {transcript}")
@@ -270,17 +309,21 @@ def on_voice_hotkey():
             if query:
                 logging.info(f"Querying AI with screenshot: {query}")
                 try:
-                    _, screenshot = take_screenshot()
-                    response = query_openrouter_with_vision(query, screenshot)
+                    screenshot = speculative.result()
+                    _capture_pool.submit(save_screenshot, screenshot)
+                    response = type_stream(
+                        stream_openrouter_with_vision(query, screenshot),
+                        start=pressed_at,
+                    )
                     logging.info(f"AI response: {response}")
                     print(f"AI: {response}")
-                    type_text(response)
                 except OpenRouterError as e:
                     logging.error(f"AI query failed: {e}")
                     print(f"Error: {e}")
             else:
                 logging.info("Heard 'AI' but no query provided")
         else:
+            speculative.cancel()
             payload = _extract_type_payload(transcript)
             if payload:
                 logging.info(f"Typing: {payload}")
@@ -424,6 +467,8 @@ def main():
     print("  - Say 'AI <query>' to query OpenRouter AI and type the response")
     print("Press Ctrl+C to exit")
 
+    get_router()  # starts loading local Whisper if the router uses it
+    get_source()  # starts the capture stream if VOICE_NAV_CAPTURE=stream
     listener = start_hotkey_listener()
     logging.debug("Hotkey listener started")
 
@@ -15,7 +15,7 @@ from gi.repository import Gdk, Gtk
 if TYPE_CHECKING:
     from cairo import Context
 
-    from child import Child
+    from child import ElementView
 
 
 class MinimalOverlayWindow(Gtk.Window):
@@ -24,13 +24,13 @@ class MinimalOverlayWindow(Gtk.Window):
     def __init__(
         self,
         config: dict[str, Any],
-        hints: dict[str, Child],
+        hints: dict[str, ElementView],
         on_select: callable,
     ):
         """Minimal overlay constructor.
 
         :param config: Overlay configuration settings.
-        :param hints: Dictionary of hint strings to Child objects.
+        :param hints: Dictionary of hint strings to elements.
         :param on_select: Callback function called when element is selected.
         """
         super().__init__(Gtk.WindowType.POPUP)
@@ -196,8 +196,8 @@ class MinimalOverlayWindow(Gtk.Window):
         self.update_hints(hint_chr)
 
         if len(self.hints) == 1:
-            selected_hint = self.hint_selector_state
-            child = self.hints[selected_hint]
+            # Select as soon as the typed prefix is unambiguous.
+            selected_hint, child = next(iter(self.hints.items()))
             x, y = child.absolute_position
             x_offset, y_offset = self.hints_drawn_offsets[selected_hint]
             click_x = x + x_offset
@@ -0,0 +1,266 @@
+"""Latency- and health-aware selection between interchangeable LLMs."""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait
+from typing import Callable, Optional, TypeVar
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WINDOW = 50  # recent calls kept per model
+MIN_SAMPLES = 3  # calls before a model's latency is trusted for ranking
+BREAKER_FAILURES = 3  # consecutive failures that open the circuit
+BREAKER_COOLDOWN_SEC = 30.0
+EXPLORE_EVERY = 20  # one ranking in this many probes the least-measured model
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_SEC = 0.25
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call runs past its wall-clock budget."""
+
+
+def run_with_timeout(fn: Callable[..., T], timeout_sec: float, *args) -> T:
+    """Call ``fn(*args)`` on a worker thread, waiting at most ``timeout_sec``.
+
+    HTTP client timeouts bound each socket read, not the whole call, so a
+    response trickling in can take far longer. This bounds the wait; a call
+    left behind runs on until its own timeouts end it and its result is
+    dropped.
+
+    Raises:
+        DeadlineExceeded: If the call has not returned in time
+    """
+    future: Future = Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True, name="model-call").start()
+    done, _ = wait([future], timeout=max(0.0, timeout_sec))
+    if not done:
+        raise DeadlineExceeded(f"No answer within {timeout_sec:.1f}s")
+    return future.result()
+
+
+class ModelStats:
+    """Rolling latency, error and throughput figures plus a circuit breaker.
+
+    The breaker opens after ``BREAKER_FAILURES`` consecutive failures.
+    Once ``BREAKER_COOLDOWN_SEC`` has passed it is half-open: the first
+    caller to claim the trial gets the model, and the breaker counts as
+    open for everyone else until that call is recorded (or another
+    cooldown passes without it). A success closes the breaker; a failure
+    opens it again.
+    """
+
+    def __init__(self, window: int = WINDOW):
+        self.latencies_ms: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.tokens_per_sec: deque[float] = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def record(self, ok: bool, latency_ms: Optional[float], tokens: Optional[int]):
+        self.outcomes.append(ok)
+        if ok:
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            if latency_ms is not None:
+                self.latencies_ms.append(latency_ms)
+                if tokens:
+                    self.tokens_per_sec.append(tokens / max(latency_ms, 1.0) * 1000)
+            return
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= BREAKER_FAILURES:
+            self.open_until = time.monotonic() + BREAKER_COOLDOWN_SEC
+
+    def is_open(self, now: float) -> bool:
+        return now < self.open_until
+
+    def is_half_open(self, now: float) -> bool:
+        return self.consecutive_failures >= BREAKER_FAILURES and not self.is_open(now)
+
+    def claim_trial(self, now: float):
+        """Take the half-open trial; others see the breaker open meanwhile."""
+        self.open_until = now + BREAKER_COOLDOWN_SEC
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self.latencies_ms) < MIN_SAMPLES:
+            return None
+        return float(np.percentile(np.array(self.latencies_ms), q))
+
+    def summary(self) -> dict:
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        return {
+            "calls": len(self.outcomes),
+            "error_rate": (
+                1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+            ),
+            "p50_ms": p50,
+            "p95_ms": p95,
+            "tokens_per_sec": (
+                float(np.median(self.tokens_per_sec)) if self.tokens_per_sec else None
+            ),
+            "breaker_open": self.is_open(time.monotonic()),
+        }
+
+
+class ModelSelector:
+    """Route each request to the fastest healthy model of its class.
+
+    Models in a class are listed in preference order. Healthy models with
+    enough samples are ranked by p50 latency; a model without enough
+    samples ranks by its list position, and the first model of the class
+    counts as fastest until measured so cold start behaves like a fixed
+    default. Models with an open circuit go last.
+
+    So that a faster model can be found at all, every ``EXPLORE_EVERY``-th
+    ranking of a class puts its least-measured healthy model first.
+
+    Args:
+        classes: Class name -> models, e.g. ``{"text": [...], "vision": [...]}``
+    """
+
+    def __init__(self, classes: dict[str, list[str]]):
+        self.classes = classes
+        self.stats: dict[str, ModelStats] = {}
+        self._rankings: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, model: str) -> ModelStats:
+        if model not in self.stats:
+            self.stats[model] = ModelStats()
+        return self.stats[model]
+
+    def candidates(self, model_class: str) -> list[str]:
+        """Models of a class, best first.
+
+        A half-open model that comes out first has its trial claimed by
+        this caller.
+        """
+        now = time.monotonic()
+        models = self.classes[model_class]
+        with self._lock:
+
+            def rank(item):
+                position, model = item
+                stats = self._stats(model)
+                p50 = stats.percentile(50)
+                if p50 is None:
+                    p50 = 0.0 if position == 0 else float("inf")
+                return (stats.is_open(now), p50, position)
+
+            ranked = [model for _, model in sorted(enumerate(models), key=rank)]
+            count = self._rankings.get(model_class, 0) + 1
+            self._rankings[model_class] = count
+            if count % EXPLORE_EVERY == 0:
+                healthy = [m for m in ranked[1:] if not self._stats(m).is_open(now)]
+                if healthy:
+                    probe = min(healthy, key=lambda m: len(self._stats(m).latencies_ms))
+                    ranked.remove(probe)
+                    ranked.insert(0, probe)
+            if ranked and self._stats(ranked[0]).is_half_open(now):
+                self._stats(ranked[0]).claim_trial(now)
+            return ranked
+
+    def record(
+        self,
+        model: str,
+        ok: bool,
+        latency_ms: Optional[float] = None,
+        tokens: Optional[int] = None,
+    ):
+        """Record one call's outcome; latency is left out for failures."""
+        with self._lock:
+            stats = self._stats(model)
+            was_open = stats.is_open(time.monotonic())
+            stats.record(ok, latency_ms, tokens)
+            if stats.is_open(time.monotonic()) and not was_open:
+                logger.warning(
+                    f"Circuit opened for {model} after "
+                    f"{stats.consecutive_failures} failures"
+                )
+
+    def call(
+        self,
+        model_class: str,
+        fn: Callable[[str, float], tuple[T, Optional[int]]],
+        deadline_sec: float,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff_sec: float = DEFAULT_BACKOFF_SEC,
+        retry_on: tuple[type[BaseException], ...] = (Exception,),
+    ) -> T:
+        """Call ``fn(model, timeout)`` with retries inside a deadline budget.
+
+        Each attempt goes to the best candidate not yet tried (wrapping
+        around if all have been), with the timeout cut to what is left of
+        the budget. The budget is wall-clock time: an attempt still running
+        when it is used up is abandoned and counted as a failure. Failed
+        attempts back off exponentially with jitter. ``fn`` returns
+        ``(result, completion_tokens)``.
+
+        Raises:
+            DeadlineExceeded: If the budget ran out during an attempt
+            The last attempt's exception, or TimeoutError if the budget ran
+            out before any attempt could be made
+        """
+        start = time.monotonic()
+        tried: list[str] = []
+        last_error: Optional[BaseException] = None
+        for attempt in range(max_attempts):
+            remaining = deadline_sec - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            ranked = self.candidates(model_class)
+            model = next((m for m in ranked if m not in tried), ranked[0])
+            tried.append(model)
+            logger.info(
+                f"Routing {model_class} request to {model} "
+                f"(attempt {attempt + 1}, {remaining:.1f}s left, "
+                f"p50 {self._format_p50(model)})"
+            )
+
+            call_start = time.perf_counter()
+            try:
+                result, tokens = run_with_timeout(fn, remaining, model, remaining)
+            except DeadlineExceeded:
+                self.record(model, ok=False)
+                logger.warning(f"{model} ran past the {deadline_sec:.0f}s budget")
+                raise
+            except retry_on as e:
+                self.record(model, ok=False)
+                last_error = e
+                logger.warning(f"{model} failed: {e}")
+                if attempt + 1 < max_attempts:
+                    delay = backoff_sec * 2**attempt * random.uniform(0.5, 1.0)
+                    remaining = deadline_sec - (time.monotonic() - start)
+                    time.sleep(max(0.0, min(delay, remaining)))
+                continue
+            self.record(model, True, (time.perf_counter() - call_start) * 1000, tokens)
+            return result
+
+        if last_error is not None:
+            raise last_error
+        raise TimeoutError(f"No {model_class} model answered within {deadline_sec}s")
+
+    def summary(self) -> dict[str, dict]:
+        """Per-model rolling stats, for logs and debugging."""
+        with self._lock:
+            return {model: s.summary() for model, s in self.stats.items()}
+
+    def _format_p50(self, model: str) -> str:
+        with self._lock:
+            p50 = self._stats(model).percentile(50)
+        return "unknown" if p50 is None else f"{p50:.0f} ms"
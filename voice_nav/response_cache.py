@@ -0,0 +1,120 @@
+"""LRU + TTL cache for LLM responses, optionally persisted with sqlite."""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("VOICE_NAV_LLM_CACHE_SIZE", "256"))
+DEFAULT_TTL_SEC = float(os.getenv("VOICE_NAV_LLM_CACHE_TTL", "86400"))
+DEFAULT_PATH = os.getenv("VOICE_NAV_LLM_CACHE_PATH") or None
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().rstrip(".?!").strip().casefold()
+
+
+def make_key(query: str, model: str, system_prompt: str) -> str:
+    """Cache key for a query against a model and system prompt."""
+    raw = "\0".join((normalize_query(query), model, system_prompt))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Size-bounded LRU of responses that expire after ``ttl_sec``.
+
+    With ``path`` set, entries are also written to a sqlite database and
+    looked up there on a memory miss, so they survive restarts. Expiry uses
+    wall-clock time for that reason.
+
+    Args:
+        max_entries: Entries kept in memory (and on disk)
+        ttl_sec: Seconds an entry stays valid
+        path: sqlite file for persistence, or None for memory only
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_sec: float = DEFAULT_TTL_SEC,
+        path: Optional[str] = DEFAULT_PATH,
+    ):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT, expires_at REAL)"
+            )
+            self._db.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, value FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._store(key, entry)
+            if entry is not None and entry[0] <= now:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: str):
+        """Store a response, evicting the least recently used if full."""
+        entry = (time.time() + self.ttl_sec, value)
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                    (key, value, entry[0]),
+                )
+                self._db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counts, hit rate and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
+
+    def _store(self, key: str, entry: tuple[float, str]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
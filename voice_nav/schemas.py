@@ -1,7 +1,7 @@
 """Data models for voice navigation system."""
 
 from pydantic import BaseModel
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 
 
 class Block(BaseModel):
@@ -44,3 +44,4 @@ class ResolveResult(BaseModel):
     transcript: str
     command: Command
     blocks: Optional[List[Block]] = None
+    timings: Optional[Dict[str, float]] = None  # Stage durations in ms
@@ -0,0 +1,323 @@
+"""Screen capture straight into numpy arrays.
+
+grim writes binary PPM to a pipe; the pixel bytes are wrapped as an RGB
+array without decoding or copying, and grayscale for element detection is
+one ``cvtColor`` away. This skips the PNG encode/decode round-trip of
+going through a PIL screenshot.
+
+With ``VOICE_NAV_CAPTURE=stream`` a long-lived wf-recorder process streams
+raw frames instead, and a capture just returns the latest one.
+"""
+
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from typing import Optional, Protocol
+
+from cv2 import COLOR_RGB2GRAY, COLOR_RGBA2GRAY, cvtColor
+from numpy import asarray, frombuffer, ndarray, uint8
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_FILE = os.getenv("VOICE_NAV_CAPTURE_FILE") or None
+CAPTURE_BACKEND = os.getenv("VOICE_NAV_CAPTURE", "auto")
+CAPTURE_OUTPUT = os.getenv("VOICE_NAV_CAPTURE_OUTPUT") or None
+GRIM_TIMEOUT_SEC = 5.0
+STREAM_BUFFERS = 4
+FIRST_FRAME_TIMEOUT_SEC = 5.0
+
+# Magic, width, height and maxval, separated by whitespace and comments.
+_SEP = rb"(?:\s+|#[^\n]*\n)+"
+_PPM_HEADER = re.compile(
+    rb"P6" + _SEP + rb"(\d+)" + _SEP + rb"(\d+)" + _SEP + rb"(\d+)\s"
+)
+
+
+class CaptureError(RuntimeError):
+    """Raised when a screen capture source fails."""
+
+
+class CaptureSource(Protocol):
+    def grab(self) -> ndarray:
+        """Return the current screen as an (H, W, 3) RGB uint8 array.
+
+        The array may be a read-only view of a reused buffer; it stays
+        valid until the next ``grab`` on the same source.
+        """
+        ...
+
+
+def parse_ppm(data: bytes) -> ndarray:
+    """Wrap binary PPM (P6, 8-bit) pixel data as a read-only RGB array.
+
+    Raises:
+        CaptureError: If the data is not an 8-bit P6 image
+    """
+    match = _PPM_HEADER.match(data)
+    if match is None:
+        raise CaptureError("Not a binary PPM image")
+    width, height, maxval = (int(v) for v in match.groups())
+    if maxval != 255:
+        raise CaptureError(f"Unsupported PPM maxval {maxval}")
+    size = width * height * 3
+    if len(data) - match.end() < size:
+        raise CaptureError("Truncated PPM image")
+    return frombuffer(data, uint8, size, match.end()).reshape(height, width, 3)
+
+
+class GrimSource:
+    """Capture Wayland outputs with ``grim -t ppm``; all of them by default."""
+
+    def __init__(self, output: Optional[str] = CAPTURE_OUTPUT):
+        self.output = output
+
+    def grab(self) -> ndarray:
+        try:
+            result = subprocess.run(
+                [
+                    "grim",
+                    "-t",
+                    "ppm",
+                    *(["-o", self.output] if self.output else []),
+                    "-",
+                ],
+                capture_output=True,
+                timeout=GRIM_TIMEOUT_SEC,
+                check=True,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            raise CaptureError(f"grim failed: {e}") from e
+        return parse_ppm(result.stdout)
+
+
+class PILSource:
+    """Capture through ``PIL.ImageGrab``, for X11, macOS and Windows."""
+
+    def grab(self) -> ndarray:
+        from PIL import ImageGrab
+
+        return asarray(ImageGrab.grab().convert("RGB"))
+
+
+class FileSource:
+    """Serve one image file as the screen; for tests and headless runs."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.startswith(b"P6"):
+            self.frame = parse_ppm(data)
+        else:
+            self.frame = asarray(Image.open(path).convert("RGB"))
+
+    def grab(self) -> ndarray:
+        return self.frame
+
+
+def wf_recorder_command(output: Optional[str] = CAPTURE_OUTPUT) -> list[str]:
+    """wf-recorder arguments that write raw RGB frames to stdout."""
+    command = [
+        "wf-recorder",
+        "-y",
+        "--muxer=rawvideo",
+        "--codec=rawvideo",
+        "--pixel-format=rgb24",
+        "--file=/dev/stdout",
+    ]
+    if output:
+        command.append(f"--output={output}")
+    return command
+
+
+class StreamSource:
+    """Latest frame of a long-lived process streaming raw RGB frames.
+
+    A reader thread reads each frame into one of ``STREAM_BUFFERS``
+    preallocated buffers, skipping the latest frame and the two most
+    recently handed out, so ``grab`` never copies and a grabbed view
+    is not overwritten while it is being converted. wf-recorder only
+    sends a frame when the screen changes, so the latest frame is also
+    the current screen.
+
+    If the size is not given, one grim capture of the same output provides
+    it and serves as the frame until the stream delivers. If the process
+    exits, captures fall back to ``fallback``.
+
+    wf-recorder records a single output while grim captures all of them,
+    so the default command needs ``output`` for the two to agree on the
+    frame size.
+
+    Args:
+        command: Process writing packed (H, W, 3) RGB frames to stdout
+            (defaults to ``wf_recorder_command(output)``)
+        size: Frame (width, height)
+        fallback: Source used for sizing and after the stream ends
+            (defaults to ``GrimSource(output)``)
+        output: Output to record
+
+    Raises:
+        CaptureError: If wf-recorder would have to pick the output itself
+    """
+
+    def __init__(
+        self,
+        command: Optional[list[str]] = None,
+        size: Optional[tuple[int, int]] = None,
+        fallback: Optional[CaptureSource] = None,
+        output: Optional[str] = CAPTURE_OUTPUT,
+    ):
+        if command is None and not output:
+            raise CaptureError(
+                "Stream capture needs VOICE_NAV_CAPTURE_OUTPUT to name an output"
+            )
+        self.command = command or wf_recorder_command(output)
+        self.fallback = fallback or GrimSource(output)
+        self.frames = 0
+        self._latest: Optional[int] = None
+        self._handed: list[int] = []
+        self._seed: Optional[ndarray] = None
+        if size is None:
+            self._seed = self.fallback.grab()
+            size = (self._seed.shape[1], self._seed.shape[0])
+        self.width, self.height = size
+        frame_bytes = self.width * self.height * 3
+        self._buffers = [bytearray(frame_bytes) for _ in range(STREAM_BUFFERS)]
+        self._views = [
+            frombuffer(b, uint8).reshape(self.height, self.width, 3)
+            for b in self._buffers
+        ]
+        for view in self._views:
+            view.flags.writeable = False
+        self._cond = threading.Condition()
+        self._proc = subprocess.Popen(
+            self.command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        self._thread = threading.Thread(
+            target=self._read, daemon=True, name="capture-stream"
+        )
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def grab(self) -> ndarray:
+        with self._cond:
+            if self._latest is None and self._seed is None:
+                self._cond.wait_for(
+                    lambda: self._latest is not None or not self.alive,
+                    FIRST_FRAME_TIMEOUT_SEC,
+                )
+            if self.alive:
+                if self._latest is not None:
+                    self._handed = [self._latest, *self._handed][:2]
+                    return self._views[self._latest]
+                if self._seed is not None:
+                    return self._seed
+                raise CaptureError("Capture stream produced no frame")
+        return self.fallback.grab()
+
+    def close(self):
+        """Stop the streaming process."""
+        self._proc.terminate()
+        try:
+            self._proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+        self._thread.join(timeout=1)
+
+    def _read(self):
+        stream = self._proc.stdout
+        try:
+            while True:
+                with self._cond:
+                    busy = {self._latest, *self._handed}
+                index = next(i for i in range(len(self._buffers)) if i not in busy)
+                view = memoryview(self._buffers[index])
+                filled = 0
+                while filled < len(view):
+                    n = stream.readinto(view[filled:])
+                    if not n:
+                        logger.warning("Capture stream ended; falling back")
+                        return
+                    filled += n
+                with self._cond:
+                    self._latest = index
+                    self.frames += 1
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._cond.notify_all()
+
+
+_source: Optional[CaptureSource] = None
+_lock = threading.Lock()
+
+
+def get_source() -> CaptureSource:
+    """Get the capture source: a file if configured, else by ``CAPTURE_BACKEND``.
+
+    ``stream`` keeps wf-recorder running; ``auto`` uses grim if installed.
+    """
+    global _source
+    with _lock:
+        if _source is None:
+            start = time.perf_counter()
+            if CAPTURE_FILE:
+                _source = FileSource(CAPTURE_FILE)
+            elif CAPTURE_BACKEND == "stream":
+                try:
+                    _source = StreamSource()
+                except (OSError, CaptureError) as e:
+                    logger.warning(f"Capture stream unavailable ({e}); using grim")
+                    _source = GrimSource()
+            elif CAPTURE_BACKEND != "pil" and shutil.which("grim"):
+                _source = GrimSource()
+            else:
+                _source = PILSource()
+            logger.info(
+                f"Screen capture source: {type(_source).__name__} "
+                f"(started in {(time.perf_counter() - start) * 1000:.0f} ms)"
+            )
+        return _source
+
+
+def set_source(source: Optional[CaptureSource]):
+    """Replace the capture source; None goes back to the default."""
+    global _source
+    with _lock:
+        if isinstance(_source, StreamSource):
+            _source.close()
+        _source = source
+
+
+def capture_rgb() -> ndarray:
+    """Capture the screen as an (H, W, 3) RGB array; may be read-only."""
+    return get_source().grab()
+
+
+def to_gray(image) -> ndarray:
+    """Grayscale pixels of a PIL image or an RGB, RGBA or gray array."""
+    if isinstance(image, Image.Image):
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGB")
+        image = asarray(image)
+    if image.ndim == 2:
+        return image
+    return cvtColor(image, COLOR_RGBA2GRAY if image.shape[2] == 4 else COLOR_RGB2GRAY)
+
+
+def capture_gray() -> ndarray:
+    """Capture the screen as a grayscale array, ready for detection."""
+    return to_gray(capture_rgb())
+
+
+def capture_image() -> Image.Image:
+    """Capture the screen as a PIL image, e.g. for saving or upload."""
+    return Image.fromarray(capture_rgb())
@@ -0,0 +1,241 @@
+"""Grid index over element boxes, and pointer snapping built on it.
+
+``SpatialIndex`` answers "which element is under / near / inside this"
+in microseconds, so pointer-driven modes (nose or gaze tracking) can
+hit-test every frame. It is built once per detection.
+"""
+
+from __future__ import annotations
+
+from math import ceil, hypot, inf
+from typing import Optional
+
+import numpy as np
+
+MIN_CELL = 16
+MAX_CELL = 256
+SNAP_RADIUS_PX = 80.0  # how far from an element the pointer may be to snap
+SNAP_MAX_SPEED_PX = 12.0  # pointing-target movement per frame that counts as dwelling
+SNAP_DWELL_FRAMES = 4
+
+
+class SpatialIndex:
+    """Uniform grid over (x, y, w, h) boxes.
+
+    Each box is listed in every cell it overlaps. The cell size defaults to
+    the median box edge, so a typical box spans a few cells and a cell
+    holds a few boxes. Queries return box indices.
+
+    Args:
+        boxes: (N, 4) array of x, y, width, height, e.g. ``ElementSet.boxes``
+        cell_size: Grid cell edge in pixels
+    """
+
+    def __init__(self, boxes, cell_size: Optional[float] = None):
+        boxes = np.asarray(boxes, np.float64).reshape(-1, 4)
+        self.boxes = boxes
+        x0, y0 = boxes[:, 0], boxes[:, 1]
+        x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+        if cell_size is None:
+            edge = np.median(np.maximum(boxes[:, 2], boxes[:, 3])) if len(boxes) else 64
+            cell_size = float(np.clip(edge, MIN_CELL, MAX_CELL))
+        self.cell = cell_size
+        self.origin = (float(x0.min()), float(y0.min())) if len(boxes) else (0.0, 0.0)
+        self.cols = (
+            max(1, ceil((x1.max() - self.origin[0]) / cell_size)) if len(boxes) else 1
+        )
+        self.rows = (
+            max(1, ceil((y1.max() - self.origin[1]) / cell_size)) if len(boxes) else 1
+        )
+
+        # Cell ranges per box, inclusive; a box ending on a cell edge stays out
+        # of the next cell.
+        cx0 = ((x0 - self.origin[0]) // cell_size).astype(np.int64)
+        cy0 = ((y0 - self.origin[1]) // cell_size).astype(np.int64)
+        cx1 = np.maximum(cx0, np.ceil((x1 - self.origin[0]) / cell_size) - 1).astype(
+            np.int64
+        )
+        cy1 = np.maximum(cy0, np.ceil((y1 - self.origin[1]) / cell_size) - 1).astype(
+            np.int64
+        )
+        ncols = cx1 - cx0 + 1
+        counts = ncols * (cy1 - cy0 + 1)
+        ids = np.repeat(np.arange(len(boxes)), counts)
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (np.repeat(cy0, counts) + k // np.repeat(ncols, counts)) * self.cols + (
+            np.repeat(cx0, counts) + k % np.repeat(ncols, counts)
+        )
+        order = np.argsort(cells, kind="stable")
+        cells, ids = cells[order], ids[order]
+        starts = (
+            np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]]) if len(cells) else []
+        )
+        self._cells: dict[int, list[int]] = {
+            int(cells[s]): chunk.tolist()
+            for s, chunk in zip(starts, np.split(ids, starts[1:]))
+        }
+        self._rects = np.stack([x0, y0, x1, y1], axis=1).tolist()
+        self._areas = (boxes[:, 2] * boxes[:, 3]).tolist()
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def _cell_of(self, x: float, y: float) -> tuple[int, int]:
+        cx = int((x - self.origin[0]) // self.cell)
+        cy = int((y - self.origin[1]) // self.cell)
+        return min(max(cx, 0), self.cols - 1), min(max(cy, 0), self.rows - 1)
+
+    def distance(self, i: int, x: float, y: float) -> float:
+        """Distance from a point to box i; 0 inside it."""
+        x0, y0, x1, y1 = self._rects[i]
+        return hypot(max(x0 - x, 0.0, x - x1), max(y0 - y, 0.0, y - y1))
+
+    def center(self, i: int) -> tuple[float, float]:
+        x0, y0, x1, y1 = self._rects[i]
+        return (x0 + x1) / 2, (y0 + y1) / 2
+
+    def at(self, x: float, y: float) -> list[int]:
+        """Boxes containing the point, innermost (smallest) first."""
+        cx = int((x - self.origin[0]) // self.cell)
+        cy = int((y - self.origin[1]) // self.cell)
+        if not (0 <= cx < self.cols and 0 <= cy < self.rows):
+            return []
+        rects = self._rects
+        hits = [
+            i
+            for i in self._cells.get(cy * self.cols + cx, ())
+            if rects[i][0] <= x < rects[i][2] and rects[i][1] <= y < rects[i][3]
+        ]
+        return sorted(hits, key=lambda i: (self._areas[i], i))
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        """Boxes overlapping the rectangle [x0, x1) x [y0, y1), by index."""
+        cx0, cy0 = self._cell_of(x0, y0)
+        cx1, cy1 = self._cell_of(x1, y1)
+        rects = self._rects
+        found = set()
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                for i in self._cells.get(cy * self.cols + cx, ()):
+                    r = rects[i]
+                    if r[0] < x1 and r[2] > x0 and r[1] < y1 and r[3] > y0:
+                        found.add(i)
+        return sorted(found)
+
+    def nearest(
+        self, x: float, y: float, k: int = 1, max_dist: float = inf
+    ) -> list[int]:
+        """Up to k boxes closest to the point (0 inside), within max_dist.
+
+        Searches rings of cells outward and stops once every box not yet
+        seen must be farther than the k-th found. Ties go to the smaller
+        box, so the innermost of nested boxes wins.
+        """
+        cx, cy = self._cell_of(x, y)
+        cell, cols, rows = self.cell, self.cols, self.rows
+        ox, oy = self.origin
+        seen: set[int] = set()
+        best: list[tuple[float, float, int]] = []
+        r = 0
+        while True:
+            for gy in range(max(cy - r, 0), min(cy + r, rows - 1) + 1):
+                edge_row = abs(gy - cy) == r
+                step = 1 if edge_row else 2 * r
+                for gx in range(cx - r, cx + r + 1, max(step, 1)):
+                    if not 0 <= gx < cols:
+                        continue
+                    for i in self._cells.get(gy * cols + gx, ()):
+                        if i not in seen:
+                            seen.add(i)
+                            d = self.distance(i, x, y)
+                            if d <= max_dist:
+                                best.append((d, self._areas[i], i))
+            # Unseen boxes lie in cells outside this square; they are at
+            # least as far as its nearest side that still has grid beyond it.
+            sides = []
+            if cx - r > 0:
+                sides.append(x - (ox + (cx - r) * cell))
+            if cx + r + 1 < cols:
+                sides.append(ox + (cx + r + 1) * cell - x)
+            if cy - r > 0:
+                sides.append(y - (oy + (cy - r) * cell))
+            if cy + r + 1 < rows:
+                sides.append(oy + (cy + r + 1) * cell - y)
+            if not sides:
+                break
+            bound = min(sides)
+            best.sort()
+            if bound > max_dist or (len(best) >= k and best[k - 1][0] <= bound):
+                break
+            r += 1
+        best.sort()
+        return [i for _, _, i in best[:k]]
+
+
+class PointerSnapper:
+    """Attract a head or gaze pointer to the nearest element while it dwells.
+
+    Once the pointing target has moved less than ``max_speed`` pixels per
+    frame for ``dwell_frames`` frames, the pointer locks onto the center
+    of the nearest element within ``radius``. It stays there until the
+    target moves fast again or leaves the element by more than ``radius``.
+
+    Args:
+        radius: Max distance from the target to an element to snap or stay
+        max_speed: Target movement per frame still counted as dwelling
+        dwell_frames: Slow frames in a row before snapping
+    """
+
+    def __init__(
+        self,
+        radius: float = SNAP_RADIUS_PX,
+        max_speed: float = SNAP_MAX_SPEED_PX,
+        dwell_frames: int = SNAP_DWELL_FRAMES,
+    ):
+        self.radius = radius
+        self.max_speed = max_speed
+        self.dwell_frames = dwell_frames
+        self.index: Optional[SpatialIndex] = None
+        self.locked: Optional[tuple[SpatialIndex, int]] = None
+        self._slow_frames = 0
+        self._prev_target: Optional[tuple[float, float]] = None
+
+    def set_index(self, index: Optional[SpatialIndex]):
+        """Snap to a new detection's elements; drops any current lock."""
+        self.index = index
+        self.locked = None
+
+    def apply(
+        self, x: float, y: float, target_x: float, target_y: float
+    ) -> tuple[float, float]:
+        """Where the pointer should go this frame.
+
+        Args:
+            x, y: Pointer position the tracker would move to
+            target_x, target_y: Raw (unsmoothed) pointing target
+        """
+        prev = self._prev_target
+        speed = 0.0 if prev is None else hypot(target_x - prev[0], target_y - prev[1])
+        self._prev_target = (target_x, target_y)
+        index = self.index
+        if index is None or not len(index):
+            return x, y
+
+        locked = self.locked
+        if locked is not None and locked[0] is index:
+            i = locked[1]
+            if (
+                speed <= self.max_speed
+                and index.distance(i, target_x, target_y) <= self.radius
+            ):
+                return index.center(i)
+            self.locked = None
+            self._slow_frames = 0
+
+        self._slow_frames = self._slow_frames + 1 if speed <= self.max_speed else 0
+        if self._slow_frames >= self.dwell_frames:
+            hits = index.nearest(target_x, target_y, 1, self.radius)
+            if hits:
+                self.locked = (index, hits[0])
+                return index.center(hits[0])
+        return x, y
@@ -1,55 +1,169 @@
 """Speech-to-text transcription module."""
 
 import asyncio
+import io
 import logging
 import os
 import subprocess
-import tempfile
-from typing import Optional
+import threading
+import time
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Union
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
-_whisper_model = None
+SAMPLE_RATE = 16000
+# backend -> pip package providing it
+BACKENDS = {"whisper": "openai-whisper", "faster-whisper": "faster-whisper"}
+DEFAULT_BACKEND = os.getenv("VOICE_NAV_STT_BACKEND", "whisper")
+DEFAULT_MODEL_NAME = os.getenv("VOICE_NAV_WHISPER_MODEL", "base")
+DEFAULT_COMPUTE_TYPE = os.getenv("VOICE_NAV_WHISPER_COMPUTE_TYPE", "int8")
 
+AudioInput = Union[str, np.ndarray]
 
-def get_model(model_name: str = "base"):
-    """Get or load the Whisper model.
 
-    Args:
-        model_name: Name of the Whisper model (tiny, base, small, medium, large)
+class WhisperEngine:
+    """Local Whisper transcription with background loading.
 
-    Returns:
-        Loaded Whisper model
+    Loading and inference run on a dedicated worker thread so async callers
+    never block the event loop. ``backend="faster-whisper"`` uses the
+    CTranslate2 runtime, where ``compute_type="int8"`` quantizes the model
+    for much faster CPU inference than fp32 PyTorch.
     """
-    global _whisper_model
-    if _whisper_model is None:
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL_NAME,
+        backend: str = DEFAULT_BACKEND,
+        compute_type: str = DEFAULT_COMPUTE_TYPE,
+        device: str = "cpu",
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown STT backend: {backend}")
+        self.model_name = model_name
+        self.backend = backend
+        self.compute_type = compute_type
+        self.device = device
+        self._load_future: Optional[Future] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+
+    def preload(self) -> Future:
+        """Start loading the model in the background; safe to call repeatedly."""
+        with self._lock:
+            if self._load_future is None:
+                self._load_future = self._executor.submit(self._load)
+            return self._load_future
+
+    @property
+    def model(self):
+        """The loaded model, waiting for a pending load if needed."""
+        return self.preload().result()
+
+    def _load(self):
+        start = time.perf_counter()
+        logger.info(f"Loading {self.backend} model: {self.model_name}")
         try:
-            import whisper
+            if self.backend == "faster-whisper":
+                from faster_whisper import WhisperModel
+
+                model = WhisperModel(
+                    self.model_name,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                )
+            else:
+                import whisper
 
-            logger.info(f"Loading Whisper model: {model_name}")
-            _whisper_model = whisper.load_model(model_name)
-            logger.info("Whisper model loaded successfully")
+                model = whisper.load_model(self.model_name, device=self.device)
         except ImportError:
             logger.error(
-                "Whisper not installed. Install with: pip install openai-whisper"
+                f"{self.backend} not installed. "
+                f"Install with: pip install {BACKENDS[self.backend]}"
             )
             raise
-    return _whisper_model
+        logger.info(f"Model loaded in {time.perf_counter() - start:.2f}s")
+        return model
 
+    def transcribe(
+        self, audio: AudioInput, cancel: Optional[threading.Event] = None
+    ) -> str:
+        """Transcribe on the calling thread.
 
-async def transcribe_audio_file(audio_path: str) -> str:
-    """Transcribe audio file to text.
+        Args:
+            audio: Path to an audio file, or mono float32 samples at 16 kHz
+            cancel: Set to stop decoding early (faster-whisper decodes
+                segment by segment; PyTorch whisper runs to completion)
+
+        Returns:
+            Transcribed text
+        """
+        model = self.model
+        if self.backend == "faster-whisper":
+            segments, _ = model.transcribe(audio, beam_size=1)
+            parts = []
+            for segment in segments:
+                if cancel is not None and cancel.is_set():
+                    break
+                parts.append(segment.text)
+            text = "".join(parts)
+        else:
+            result = model.transcribe(audio, fp16=self.device != "cpu")
+            text = result.get("text") or ""
+        return text.strip()
+
+    async def transcribe_async(self, audio: AudioInput) -> str:
+        """Transcribe on the engine's worker thread without blocking the loop."""
+        self.preload()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.transcribe, audio)
+
+
+_engine: Optional[WhisperEngine] = None
+
+
+def get_engine() -> WhisperEngine:
+    """Get the shared engine configured from the environment."""
+    global _engine
+    if _engine is None:
+        _engine = WhisperEngine()
+    return _engine
+
+
+def preload_model() -> Future:
+    """Start loading the shared Whisper model in the background."""
+    return get_engine().preload()
+
+
+def get_model(model_name: str = DEFAULT_MODEL_NAME):
+    """Get or load the Whisper model.
 
     Args:
-        audio_path: Path to the audio file
+        model_name: Name of the Whisper model (tiny, base, small, medium, large)
+
+    Returns:
+        Loaded Whisper model
+    """
+    global _engine
+    if _engine is None:
+        _engine = WhisperEngine(model_name=model_name)
+    return _engine.model
+
+
+async def transcribe_audio(audio: np.ndarray) -> str:
+    """Transcribe 16 kHz mono float32 samples without touching disk.
+
+    Args:
+        audio: Audio samples
 
     Returns:
         Transcribed text
     """
     try:
-        model = get_model()
-        result = model.transcribe(audio_path)
-        text = (result.get("text") or "").strip()
+        text = await get_engine().transcribe_async(audio)
         logger.info(f"Transcribed: {text}")
         return text
     except Exception as e:
@@ -57,58 +171,125 @@ async def transcribe_audio_file(audio_path: str) -> str:
         return ""
 
 
-async def transcribe_audio_bytes(audio_bytes: bytes) -> str:
-    """Transcribe audio bytes to text.
+async def transcribe_audio_file(audio_path: str) -> str:
+    """Transcribe audio file to text.
 
     Args:
-        audio_bytes: Audio file bytes
+        audio_path: Path to the audio file
 
     Returns:
         Transcribed text
     """
-    import io
+    try:
+        text = await get_engine().transcribe_async(audio_path)
+        logger.info(f"Transcribed: {text}")
+        return text
+    except Exception as e:
+        logger.error(f"Transcription error: {e}")
+        return ""
+
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".input") as f:
-        f.write(audio_bytes)
-        in_path = f.name
+def _pcm16_to_float(data: bytes) -> np.ndarray:
+    # A truncated stream can end mid-sample; the odd byte is dropped.
+    samples = np.frombuffer(data, dtype="<i2", count=len(data) // 2)
+    return samples.astype(np.float32) / 32768.0
 
+
+def _decode_wav(audio_bytes: bytes) -> Optional[np.ndarray]:
+    """Decode 16 kHz PCM16 WAV in-process; None if it needs resampling."""
     try:
-        out_path = in_path + ".wav"
-        subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i",
-                in_path,
-                "-ac",
-                "1",
-                "-ar",
-                "16000",
-                "-vn",
-                out_path,
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+        with wave.open(io.BytesIO(audio_bytes)) as wav:
+            if wav.getsampwidth() != 2 or wav.getframerate() != SAMPLE_RATE:
+                return None
+            channels = wav.getnchannels()
+            frames = wav.readframes(wav.getnframes())
+    except (wave.Error, EOFError):
+        return None
+    audio = _pcm16_to_float(frames)
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return audio
+
+
+def _ffmpeg_decode(audio_bytes: bytes, input_args: list[str]) -> np.ndarray:
+    """Decode any ffmpeg-readable input from stdin to 16 kHz mono PCM on stdout."""
+    proc = subprocess.run(
+        [
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel",
+            "error",
+            *input_args,
+            "-i",
+            "pipe:0",
+            "-vn",
+            "-f",
+            "s16le",
+            "-ac",
+            "1",
+            "-ar",
+            str(SAMPLE_RATE),
+            "pipe:1",
+        ],
+        input=audio_bytes,
+        capture_output=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"ffmpeg failed: {proc.stderr.decode(errors='replace').strip()}"
         )
+    return _pcm16_to_float(proc.stdout)
 
-        text = await transcribe_audio_file(out_path)
 
-        for p in [in_path, out_path]:
-            try:
-                os.remove(p)
-            except:
-                pass
+def decode_audio_bytes(
+    audio_bytes: bytes, pcm_sample_rate: Optional[int] = None
+) -> np.ndarray:
+    """Decode audio bytes to 16 kHz mono float32 without temp files.
 
-        return text
-    except Exception as e:
+    16 kHz PCM16 WAV and raw PCM are decoded in-process; anything else is
+    piped through ffmpeg.
+
+    Args:
+        audio_bytes: Encoded audio, or raw little-endian PCM16 mono samples
+        pcm_sample_rate: Sample rate of raw PCM input; None for encoded audio
+
+    Returns:
+        Audio samples
+    """
+    if pcm_sample_rate is not None:
+        if pcm_sample_rate == SAMPLE_RATE:
+            return _pcm16_to_float(audio_bytes)
+        return _ffmpeg_decode(
+            audio_bytes, ["-f", "s16le", "-ar", str(pcm_sample_rate), "-ac", "1"]
+        )
+    if audio_bytes[:4] == b"RIFF" and audio_bytes[8:12] == b"WAVE":
+        audio = _decode_wav(audio_bytes)
+        if audio is not None:
+            return audio
+    return _ffmpeg_decode(audio_bytes, [])
+
+
+async def transcribe_audio_bytes(
+    audio_bytes: bytes, pcm_sample_rate: Optional[int] = None
+) -> str:
+    """Transcribe audio bytes to text.
+
+    Args:
+        audio_bytes: Audio file bytes, or raw PCM16 mono samples
+        pcm_sample_rate: Sample rate of raw PCM input; None for encoded audio
+
+    Returns:
+        Transcribed text
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        audio = await loop.run_in_executor(
+            None, decode_audio_bytes, audio_bytes, pcm_sample_rate
+        )
+    except (OSError, RuntimeError, ValueError) as e:
         logger.error(f"Audio processing error: {e}")
-        for p in [in_path, in_path + ".wav"]:
-            try:
-                if os.path.exists(p):
-                    os.remove(p)
-            except:
-                pass
         return ""
+    return await transcribe_audio(audio)
 
 
 def transcribe_sync(audio_path: str) -> str:
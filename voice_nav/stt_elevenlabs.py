@@ -1,19 +1,30 @@
+import io
 import os
 import tempfile
 from typing import Optional
 
-import requests
-import sounddevice as sd
+import numpy as np
 import soundfile as sf
 
 import logging
 
+import http_client
+from audio_capture import PrerollCapture, record_utterance
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 DEFAULT_SAMPLE_RATE = 16000
-DEFAULT_DURATION_SEC = 4
 DEFAULT_MODEL_ID = "scribe_v2"
+STT_URL = "https://api.elevenlabs.io/v1/speech-to-text"
+
+# name -> (soundfile format, subtype, MIME type, file extension)
+UPLOAD_FORMATS = {
+    "pcm16": ("WAV", "PCM_16", "audio/wav", "wav"),
+    "flac": ("FLAC", "PCM_16", "audio/flac", "flac"),
+    "opus": ("OGG", "OPUS", "audio/ogg", "ogg"),
+}
+DEFAULT_UPLOAD_FORMAT = "flac"
 
 
 class ElevenLabsSTTError(Exception):
@@ -21,21 +32,18 @@ class ElevenLabsSTTError(Exception):
 
 
 def record_microphone(
-    duration_sec: float = DEFAULT_DURATION_SEC, sample_rate: int = DEFAULT_SAMPLE_RATE
+    duration_sec: Optional[float] = None, sample_rate: int = DEFAULT_SAMPLE_RATE
 ) -> str:
-    """Record audio from the default microphone and return a temp wav file path."""
-    logger.info(f"Recording for {duration_sec} seconds at {sample_rate}Hz...")
+    """Record audio from the default microphone and return a temp wav file path.
+
+    With ``duration_sec`` unset, recording stops as soon as the speaker
+    finishes and silence is trimmed; otherwise a fixed-length clip is taken.
+    """
     try:
-        audio = sd.rec(
-            int(duration_sec * sample_rate),
-            samplerate=sample_rate,
-            channels=1,
-            dtype="float32",
-        )
-        sd.wait()
+        audio = capture_audio(duration_sec, sample_rate)
         fd, path = tempfile.mkstemp(suffix=".wav")
         os.close(fd)
-        sf.write(path, audio, sample_rate)
+        sf.write(path, audio, sample_rate, subtype="PCM_16")
         logger.info(f"Recording saved to {path}")
         return path
     except Exception as e:
@@ -43,24 +51,85 @@ def record_microphone(
         raise
 
 
+def capture_audio(
+    duration_sec: Optional[float] = None,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    preroll: Optional[PrerollCapture] = None,
+) -> np.ndarray:
+    """Record mono float32 audio, until silence unless ``duration_sec`` is set."""
+    if duration_sec is None:
+        logger.info(f"Recording until silence at {sample_rate}Hz...")
+        return record_utterance(sample_rate=sample_rate, preroll=preroll)
+
+    import sounddevice as sd
+
+    logger.info(f"Recording for {duration_sec} seconds at {sample_rate}Hz...")
+    audio = sd.rec(
+        int(duration_sec * sample_rate),
+        samplerate=sample_rate,
+        channels=1,
+        dtype="float32",
+    )
+    sd.wait()
+    return audio[:, 0]
+
+
+def encode_audio(
+    audio: np.ndarray,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    audio_format: str = DEFAULT_UPLOAD_FORMAT,
+) -> io.BytesIO:
+    """Encode mono float audio into an in-memory file ready for upload."""
+    if audio_format not in UPLOAD_FORMATS:
+        raise ValueError(f"Unknown audio format: {audio_format}")
+    fmt, subtype, _, _ = UPLOAD_FORMATS[audio_format]
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format=fmt, subtype=subtype)
+    buffer.seek(0)
+    return buffer
+
+
+def transcribe_audio(
+    audio: np.ndarray,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    api_key: Optional[str] = None,
+    model_id: str = DEFAULT_MODEL_ID,
+    audio_format: str = DEFAULT_UPLOAD_FORMAT,
+) -> str:
+    """Encode audio in memory, send it to ElevenLabs STT and return the text."""
+    buffer = encode_audio(audio, sample_rate, audio_format)
+    _, _, mime, ext = UPLOAD_FORMATS[audio_format]
+    logger.info(
+        f"Uploading {buffer.getbuffer().nbytes} bytes "
+        f"({audio_format}, {len(audio) / sample_rate:.2f}s of audio)"
+    )
+    return _post_audio(buffer, f"audio.{ext}", mime, api_key, model_id)
+
+
 def transcribe_file(
     path: str, api_key: Optional[str] = None, model_id: str = DEFAULT_MODEL_ID
 ) -> str:
     """Send an audio file to ElevenLabs STT and return the transcript text."""
+    logger.info(f"Sending {path} ({os.path.getsize(path)} bytes) to ElevenLabs STT...")
+    with open(path, "rb") as f:
+        return _post_audio(f, os.path.basename(path), "audio/wav", api_key, model_id)
+
+
+def _post_audio(
+    fileobj, filename: str, mime: str, api_key: Optional[str], model_id: str
+) -> str:
     key = api_key or os.getenv("ELEVENLABS_API_KEY")
     if not key:
         raise ElevenLabsSTTError("Missing ELEVENLABS_API_KEY")
 
-    logger.info(f"Sending {path} to ElevenLabs STT (model: {model_id})...")
-    url = "https://api.elevenlabs.io/v1/speech-to-text"
+    logger.info(f"Requesting ElevenLabs transcription (model: {model_id})...")
     headers = {
         "Accept": "application/json",
         "xi-api-key": key,
     }
-    with open(path, "rb") as f:
-        files = {"file": (os.path.basename(path), f, "audio/wav")}
-        data = {"model_id": model_id}
-        resp = requests.post(url, headers=headers, files=files, data=data, timeout=30)
+    files = {"file": (filename, fileobj, mime)}
+    data = {"model_id": model_id}
+    resp = http_client.post(STT_URL, headers=headers, files=files, data=data, timeout=30)
     logger.info(f"ElevenLabs response status: {resp.status_code}")
     if resp.status_code != 200:
         logger.error(f"ElevenLabs error response: {resp.text}")
@@ -72,16 +141,18 @@ def transcribe_file(
 
 
 def transcribe_from_mic(
-    duration_sec: float = DEFAULT_DURATION_SEC,
+    duration_sec: Optional[float] = None,
     sample_rate: int = DEFAULT_SAMPLE_RATE,
     api_key: Optional[str] = None,
+    preroll: Optional[PrerollCapture] = None,
 ) -> str:
-    """Convenience: record from mic then transcribe."""
-    path = record_microphone(duration_sec=duration_sec, sample_rate=sample_rate)
-    try:
-        return transcribe_file(path, api_key=api_key)
-    finally:
-        try:
-            os.remove(path)
-        except OSError:
-            pass
+    """Convenience: record from mic then transcribe.
+
+    Returns an empty transcript without calling the API if nothing was said.
+    A running ``preroll`` capture supplies audio from before the call.
+    """
+    audio = capture_audio(duration_sec, sample_rate, preroll)
+    if audio.size == 0:
+        logger.info("No speech detected; skipping transcription")
+        return ""
+    return transcribe_audio(audio, sample_rate, api_key=api_key)
@@ -0,0 +1,248 @@
+"""Hedged speech-to-text routing between local Whisper and ElevenLabs."""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+import numpy as np
+
+from audio_capture import DEFAULT_SAMPLE_RATE, PrerollCapture
+
+logger = logging.getLogger(__name__)
+
+STT_MODES = ("cloud", "local", "hedged")
+STT_MODE = os.getenv("VOICE_NAV_STT_MODE", "cloud")
+STT_PREFER = os.getenv("VOICE_NAV_STT_PREFER") or None
+DEFAULT_PREFER_DEADLINE_SEC = 1.0
+DEFAULT_TIMEOUT_SEC = 30.0
+
+# (audio, sample_rate, cancel) -> transcript
+Backend = Callable[[np.ndarray, int, threading.Event], str]
+
+
+class BackendStats:
+    """Rolling latency and win counts for one backend."""
+
+    def __init__(self, window: int = 200):
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+        self.latencies_ms: deque[float] = deque(maxlen=window)
+
+    def summary(self, races: int) -> dict:
+        p50 = p95 = None
+        if self.latencies_ms:
+            p50, p95 = np.percentile(np.array(self.latencies_ms), [50, 95]).tolist()
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wins": self.wins,
+            "win_rate": self.wins / races if races else 0.0,
+            "p50_ms": p50,
+            "p95_ms": p95,
+        }
+
+
+class STTRouter:
+    """Send audio to several STT backends at once and keep the best answer.
+
+    With ``prefer`` set, that backend's result is used if it arrives within
+    ``prefer_deadline_sec``; otherwise the first acceptable result from any
+    backend wins. Losers are cancelled: queued calls are dropped and running
+    ones see their ``cancel`` event set, and their results are discarded.
+
+    Args:
+        backends: Name -> backend callable; order decides which error is
+            raised when every backend fails
+        prefer: Backend to wait for up to the deadline
+        prefer_deadline_sec: How long to hold out for ``prefer``
+        timeout_sec: Overall limit for a routed call
+        accept: Predicate a transcript must pass to win (default: non-empty)
+    """
+
+    def __init__(
+        self,
+        backends: dict[str, Backend],
+        prefer: Optional[str] = None,
+        prefer_deadline_sec: float = DEFAULT_PREFER_DEADLINE_SEC,
+        timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+        accept: Optional[Callable[[str], bool]] = None,
+    ):
+        if not backends:
+            raise ValueError("STTRouter needs at least one backend")
+        if prefer is not None and prefer not in backends:
+            raise ValueError(f"Unknown preferred backend: {prefer}")
+        self.backends = backends
+        self.prefer = prefer
+        self.prefer_deadline_sec = prefer_deadline_sec
+        self.timeout_sec = timeout_sec
+        self.accept = accept or (lambda text: bool(text.strip()))
+        self.races = 0
+        self.stats = {name: BackendStats() for name in backends}
+        self._stats_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=2 * len(backends), thread_name_prefix="stt"
+        )
+
+    def _run(
+        self, name: str, audio: np.ndarray, sample_rate: int, cancel: threading.Event
+    ) -> str:
+        start = time.perf_counter()
+        try:
+            text = self.backends[name](audio, sample_rate, cancel)
+        except Exception:
+            with self._stats_lock:
+                self.stats[name].calls += 1
+                self.stats[name].errors += 1
+            raise
+        with self._stats_lock:
+            self.stats[name].calls += 1
+            self.stats[name].latencies_ms.append((time.perf_counter() - start) * 1000)
+        return text
+
+    def _pick(
+        self, order: list[str], results: dict[str, str], deadline_passed: bool
+    ) -> Optional[str]:
+        acceptable = [name for name in order if self.accept(results.get(name, ""))]
+        if self.prefer in acceptable:
+            return self.prefer
+        if self.prefer is not None and not deadline_passed and self.prefer not in order:
+            return None
+        return acceptable[0] if acceptable else None
+
+    def transcribe(
+        self, audio: np.ndarray, sample_rate: int = DEFAULT_SAMPLE_RATE
+    ) -> str:
+        """Route one clip and return the winning transcript.
+
+        Raises:
+            The first backend's exception if every backend failed
+        """
+        if audio.size == 0:
+            return ""
+
+        start = time.perf_counter()
+        cancel = threading.Event()
+        futures: dict[Future, str] = {
+            self._pool.submit(self._run, name, audio, sample_rate, cancel): name
+            for name in self.backends
+        }
+        pending = set(futures)
+        order: list[str] = []
+        results: dict[str, str] = {}
+        errors: dict[str, Exception] = {}
+        winner = None
+
+        while pending and winner is None:
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.timeout_sec:
+                break
+            timeout = self.timeout_sec - elapsed
+            deadline_passed = elapsed >= self.prefer_deadline_sec
+            if self.prefer is not None and not deadline_passed:
+                timeout = min(timeout, self.prefer_deadline_sec - elapsed)
+
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                order.append(name)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    errors[name] = e
+                    logger.warning(f"STT backend {name} failed: {e}")
+            deadline_passed = time.perf_counter() - start >= self.prefer_deadline_sec
+            winner = self._pick(order, results, deadline_passed or not pending)
+
+        cancel.set()
+        for future in pending:
+            future.cancel()
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self.races += 1
+            if winner is not None:
+                self.stats[winner].wins += 1
+
+        if winner is not None:
+            logger.info(
+                f"STT winner: {winner} in {latency_ms:.0f} ms "
+                f"(finished: {', '.join(order)})"
+            )
+            return results[winner]
+        if results:
+            # Every backend that answered heard nothing usable.
+            return next(results[name] for name in order if name in results)
+        for name in self.backends:
+            if name in errors:
+                raise errors[name]
+        raise TimeoutError(f"No STT backend answered within {self.timeout_sec}s")
+
+    def summary(self) -> dict[str, dict]:
+        """Per-backend call counts, win rates and p50/p95 latency."""
+        with self._stats_lock:
+            return {name: s.summary(self.races) for name, s in self.stats.items()}
+
+
+def _cloud_backend(audio: np.ndarray, sample_rate: int, cancel: threading.Event) -> str:
+    from stt_elevenlabs import transcribe_audio
+
+    # requests can't abort an in-flight upload; a cancelled result is dropped.
+    return transcribe_audio(audio, sample_rate)
+
+
+def _local_backend(audio: np.ndarray, sample_rate: int, cancel: threading.Event) -> str:
+    from stt import SAMPLE_RATE, get_engine
+
+    if sample_rate != SAMPLE_RATE:
+        raise ValueError(f"Local Whisper needs {SAMPLE_RATE} Hz audio")
+    return get_engine().transcribe(audio, cancel=cancel)
+
+
+_router: Optional[STTRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> STTRouter:
+    """Get the shared router configured by ``VOICE_NAV_STT_MODE``.
+
+    ``cloud`` uses ElevenLabs only, ``local`` uses Whisper only and
+    ``hedged`` races both (optionally preferring ``VOICE_NAV_STT_PREFER``).
+    Local Whisper starts loading as soon as the router is created.
+    """
+    global _router
+    with _router_lock:
+        if _router is None:
+            if STT_MODE not in STT_MODES:
+                raise ValueError(f"Unknown VOICE_NAV_STT_MODE: {STT_MODE}")
+            backends: dict[str, Backend] = {}
+            if STT_MODE in ("cloud", "hedged"):
+                backends["cloud"] = _cloud_backend
+            if STT_MODE in ("local", "hedged"):
+                from stt import preload_model
+
+                preload_model()
+                backends["local"] = _local_backend
+            prefer = STT_PREFER if STT_MODE == "hedged" else None
+            _router = STTRouter(backends, prefer=prefer)
+            logger.info(f"STT router mode: {STT_MODE} ({', '.join(backends)})")
+        return _router
+
+
+def transcribe_from_mic(
+    duration_sec: Optional[float] = None,
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    preroll: Optional[PrerollCapture] = None,
+) -> str:
+    """Record from the mic and transcribe through the shared router."""
+    from stt_elevenlabs import capture_audio
+
+    audio = capture_audio(duration_sec, sample_rate, preroll)
+    if audio.size == 0:
+        logger.info("No speech detected; skipping transcription")
+        return ""
+    return get_router().transcribe(audio, sample_rate)
@@ -0,0 +1,176 @@
+"""Streaming ElevenLabs speech-to-text over the realtime websocket API."""
+
+import base64
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, Optional
+from urllib.parse import urlencode
+
+import numpy as np
+
+from audio_capture import DEFAULT_SAMPLE_RATE, PrerollCapture, stream_utterance
+from stt_elevenlabs import ElevenLabsSTTError
+
+logger = logging.getLogger(__name__)
+
+REALTIME_URL = "wss://api.elevenlabs.io/v1/speech-to-text/realtime"
+DEFAULT_REALTIME_MODEL_ID = "scribe_v2_realtime"
+DEFAULT_TIMEOUT_SEC = 30.0
+
+
+@dataclass
+class TranscriptEvent:
+    """A partial or final transcript from the streaming session."""
+
+    text: str
+    is_final: bool
+
+
+def _pcm16(chunk: np.ndarray) -> bytes:
+    return (np.clip(chunk, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def stream_transcribe(
+    chunks: Iterable[np.ndarray],
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    api_key: Optional[str] = None,
+    model_id: str = DEFAULT_REALTIME_MODEL_ID,
+    url: str = REALTIME_URL,
+    timeout_sec: float = DEFAULT_TIMEOUT_SEC,
+) -> Iterator[TranscriptEvent]:
+    """Send audio chunks while they are produced and yield transcripts.
+
+    Chunks are uploaded from a background thread as soon as ``chunks``
+    yields them; the session is committed when it is exhausted and ends
+    after the final transcript.
+
+    Args:
+        chunks: Mono float32 audio chunks, e.g. from ``stream_utterance``
+        sample_rate: Sample rate of the chunks in Hz
+        api_key: ElevenLabs API key (defaults to env variable)
+        model_id: Realtime model to use
+        url: Websocket endpoint
+        timeout_sec: Max wait for any server message
+
+    Raises:
+        ElevenLabsSTTError: On missing key, connection or server errors
+    """
+    from websockets.exceptions import WebSocketException
+    from websockets.sync.client import connect
+
+    key = api_key or os.getenv("ELEVENLABS_API_KEY")
+    if not key:
+        raise ElevenLabsSTTError("Missing ELEVENLABS_API_KEY")
+
+    query = urlencode(
+        {
+            "model_id": model_id,
+            "audio_format": f"pcm_{sample_rate}",
+            "commit_strategy": "manual",
+        }
+    )
+    try:
+        ws = connect(
+            f"{url}?{query}",
+            additional_headers={"xi-api-key": key},
+            open_timeout=timeout_sec,
+        )
+    except (OSError, WebSocketException) as e:
+        raise ElevenLabsSTTError(f"Streaming connection failed: {e}")
+
+    send_error: list[BaseException] = []
+    committed = threading.Event()
+
+    def send_audio():
+        try:
+            for chunk in chunks:
+                ws.send(
+                    json.dumps(
+                        {
+                            "message_type": "input_audio_chunk",
+                            "audio_base_64": base64.b64encode(_pcm16(chunk)).decode(),
+                            "commit": False,
+                            "sample_rate": sample_rate,
+                        }
+                    )
+                )
+            # Set before sending: the final transcript can arrive before
+            # send() returns.
+            committed.set()
+            ws.send(
+                json.dumps(
+                    {
+                        "message_type": "input_audio_chunk",
+                        "audio_base_64": "",
+                        "commit": True,
+                        "sample_rate": sample_rate,
+                    }
+                )
+            )
+        except BaseException as e:
+            send_error.append(e)
+            ws.close()
+
+    with ws:
+        sender = threading.Thread(target=send_audio, daemon=True)
+        sender.start()
+        try:
+            yield from _receive(ws, sender, send_error, committed, timeout_sec)
+        finally:
+            ws.close()
+            sender.join(timeout=1.0)
+
+
+def _receive(ws, sender, send_error, committed, timeout_sec):
+    from websockets.exceptions import WebSocketException
+
+    while True:
+        try:
+            msg = json.loads(ws.recv(timeout=timeout_sec))
+        except TimeoutError:
+            raise ElevenLabsSTTError("Timed out waiting for transcript")
+        except WebSocketException as e:
+            if send_error:
+                raise ElevenLabsSTTError(f"Audio upload failed: {send_error[0]}")
+            raise ElevenLabsSTTError(f"Streaming connection lost: {e}")
+
+        kind = msg.get("message_type", "")
+        if "error" in kind or msg.get("error"):
+            raise ElevenLabsSTTError(
+                f"STT stream failed ({kind}): {msg.get('error') or msg}"
+            )
+        if kind == "partial_transcript":
+            yield TranscriptEvent(text=msg.get("text") or "", is_final=False)
+        elif kind.startswith("committed_transcript"):
+            yield TranscriptEvent(text=(msg.get("text") or "").strip(), is_final=True)
+            if committed.is_set():
+                return
+
+
+def transcribe_streaming_from_mic(
+    sample_rate: int = DEFAULT_SAMPLE_RATE,
+    api_key: Optional[str] = None,
+    preroll: Optional[PrerollCapture] = None,
+    on_partial: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Stream mic audio to ElevenLabs while speaking and return the final text.
+
+    Args:
+        sample_rate: Capture sample rate in Hz
+        api_key: ElevenLabs API key
+        preroll: Running pre-roll capture to read from
+        on_partial: Called with each partial transcript
+    """
+    frames = stream_utterance(sample_rate=sample_rate, preroll=preroll)
+    finals = []
+    for event in stream_transcribe(frames, sample_rate=sample_rate, api_key=api_key):
+        if event.is_final:
+            finals.append(event.text)
+        elif on_partial is not None:
+            on_partial(event.text)
+    transcript = " ".join(t for t in finals if t)
+    logger.info(f"Streaming transcription result: {repr(transcript)}")
+    return transcript
@@ -1,8 +1,25 @@
 """Test OpenRouter AI client integration."""
 
+import asyncio
+import json
 import os
 import re
-from ai_client import query_openrouter, OpenRouterError, DEFAULT_MODEL
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import ai_client
+import http_client
+from ai_client import (
+    query_openrouter_hedged,
+    query_openrouter,
+    stream_openrouter,
+    OpenRouterError,
+    DEFAULT_MODEL,
+)
+from model_selector import ModelSelector
+from typing_control import IncrementalTyper, type_stream
 
 
 def _extract_ai_query(transcript: str) -> str:
@@ -85,6 +102,250 @@ def test_type_payload_extraction():
         print(f"{status} '{input_text}' → '{result}' (expected: '{expected}')")
 
 
+class _SSEHandler(BaseHTTPRequestHandler):
+    deltas = ["Hel", "lo wor", "ld. How", " are", " you?"]
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert body["stream"] is True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        self.wfile.write(b": OPENROUTER PROCESSING\n\n")
+        for delta in self.deltas:
+            chunk = {"choices": [{"delta": {"content": delta}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_stream_parses_sse():
+    """Test that streamed deltas are yielded in order, skipping comments."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    original = ai_client.OPENROUTER_API_URL
+    ai_client.OPENROUTER_API_URL = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        deltas = list(stream_openrouter("hi", api_key="test-key", use_cache=False))
+    finally:
+        ai_client.OPENROUTER_API_URL = original
+        server.shutdown()
+        server.server_close()
+    assert deltas == _SSEHandler.deltas
+
+
+class _BrokenSSEHandler(BaseHTTPRequestHandler):
+    """Sends one delta, then drops the connection mid-body."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", "10000")
+        self.end_headers()
+        chunk = {"choices": [{"delta": {"content": "Hel"}}]}
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def test_dropped_stream_raises_openrouter_error():
+    """Test that a stream cut off mid-body fails cleanly on both protocols."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BrokenSSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    original_url = ai_client.OPENROUTER_API_URL
+    original_http2 = http_client.HTTP2_ENABLED
+    ai_client.OPENROUTER_API_URL = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        for http2 in (False, True):
+            http_client.HTTP2_ENABLED = http2
+            try:
+                list(stream_openrouter("hi", api_key="k", use_cache=False))
+            except OpenRouterError as e:
+                assert "Stream interrupted" in str(e)
+            else:
+                raise AssertionError(f"expected OpenRouterError (http2={http2})")
+    finally:
+        ai_client.OPENROUTER_API_URL = original_url
+        http_client.HTTP2_ENABLED = original_http2
+        server.shutdown()
+        server.server_close()
+
+
+def test_incremental_typer_types_whole_words():
+    """Test that only complete words are typed and the result is trimmed."""
+    typed = []
+
+    def slow_type(text):
+        typed.append(text)
+        time.sleep(0.02)
+
+    def tokens():
+        for token in [" Hel", "lo wor", "ld. How", " are", " you?\n"]:
+            yield token
+            time.sleep(0.01)
+
+    result = type_stream(tokens(), slow_type)
+    assert result == "Hello world. How are you?"
+    assert "".join(typed) == result
+    assert typed[0] == "Hello"
+    assert all(not chunk.endswith(("Hel", "wor")) for chunk in typed)
+
+
+def test_incremental_typer_reports_first_char():
+    """Test that time-to-first-character is measured from the given start."""
+    typer = IncrementalTyper(lambda text: None, start=time.perf_counter() - 1.0)
+    typer.push("word ")
+    typer.finish()
+    assert typer.first_char_ms is not None and typer.first_char_ms >= 1000
+
+
+class _ModelsHandler(BaseHTTPRequestHandler):
+    """Chat completions stand-in whose behaviour depends on the model name.
+
+    ``slow-N`` answers after N tenths of a second, ``broken`` returns 500,
+    ``empty`` returns an empty message and ``drip`` sends its answer one
+    byte every 50 ms.
+    """
+
+    def do_POST(self):
+        model = json.loads(self.rfile.read(int(self.headers["Content-Length"])))[
+            "model"
+        ]
+        stats = self.server
+        with stats.lock:
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+        try:
+            if model.startswith("slow-"):
+                time.sleep(int(model[5:]) / 10)
+            if model == "broken":
+                self._reply(500, {"error": "upstream down"})
+            elif model == "drip":
+                self._reply(200, {"choices": [{"message": {"content": "late"}}]}, 0.05)
+            else:
+                content = "" if model == "empty" else f"answer from {model}"
+                self._reply(200, {"choices": [{"message": {"content": content}}]})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with stats.lock:
+                stats.in_flight -= 1
+
+    def _reply(self, status, body, byte_delay=0.0):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if not byte_delay:
+            self.wfile.write(data)
+            return
+        for i in range(len(data)):
+            self.wfile.write(data[i : i + 1])
+            self.wfile.flush()
+            time.sleep(byte_delay)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def _models_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ModelsHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.in_flight = server.max_in_flight = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    original = ai_client.OPENROUTER_API_URL
+    ai_client.OPENROUTER_API_URL = f"http://127.0.0.1:{server.server_address[1]}/"
+    try:
+        yield server
+    finally:
+        ai_client.OPENROUTER_API_URL = original
+        server.shutdown()
+        server.server_close()
+
+
+def _hedged(models, **kwargs):
+    with _models_server() as server:
+        start = time.perf_counter()
+        result = asyncio.run(
+            query_openrouter_hedged(
+                "hi", models=models, api_key="test-key", use_cache=False, **kwargs
+            )
+        )
+        return result, time.perf_counter() - start, server.max_in_flight
+
+
+def test_hedged_returns_fastest_valid_answer():
+    """Test that the first non-empty answer wins and slower ones are dropped."""
+    result, elapsed, _ = _hedged(
+        ["slow-20", "empty", "broken", "slow-1"], max_concurrency=4
+    )
+    assert result == "answer from slow-1"
+    assert elapsed < 1.0
+
+
+def test_hedged_bounds_concurrency_and_falls_through():
+    """Test that failures free a slot for the next model in order."""
+    result, _, max_in_flight = _hedged(["broken", "empty", "slow-1"], max_concurrency=1)
+    assert result == "answer from slow-1"
+    assert max_in_flight == 1
+
+
+def test_hedged_model_timeout_and_total_failure():
+    """Test per-model timeouts and the error when every model fails."""
+    try:
+        _hedged(["slow-20", "broken"], model_timeout_sec=0.3)
+    except OpenRouterError as e:
+        assert "slow-20: Timed out" in str(e) and "broken: API error 500" in str(e)
+    else:
+        raise AssertionError("expected OpenRouterError")
+
+
+def test_hedged_model_timeout_covers_slow_body():
+    """Test that a model sending its body slowly is cut off at the timeout."""
+    start = time.perf_counter()
+    try:
+        _hedged(["drip", "broken"], model_timeout_sec=0.5)
+    except OpenRouterError as e:
+        assert "drip: Timed out" in str(e)
+    else:
+        raise AssertionError("expected OpenRouterError")
+    # The whole body takes about 3 s to arrive.
+    assert time.perf_counter() - start < 1.5
+
+
+def test_budget_runs_out_mid_response():
+    """Test that the deadline budget is wall-clock time, not per read."""
+    original = ai_client._selector, ai_client.TEXT_DEADLINE_SEC
+    ai_client._selector = ModelSelector({"text": ["drip", "slow-1"]})
+    ai_client.TEXT_DEADLINE_SEC = 0.5
+    try:
+        with _models_server():
+            # Routed (no retry once the budget is gone) and explicit model.
+            for model in (None, "drip"):
+                start = time.perf_counter()
+                try:
+                    query_openrouter("hi", model=model, api_key="k", use_cache=False)
+                except OpenRouterError as e:
+                    assert "within 0.5s" in str(e)
+                else:
+                    raise AssertionError("expected OpenRouterError")
+                # The whole body takes about 3 s to arrive.
+                assert time.perf_counter() - start < 1.0
+        assert ai_client._selector.summary()["drip"]["error_rate"] == 1.0
+    finally:
+        ai_client._selector, ai_client.TEXT_DEADLINE_SEC = original
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("OpenRouter AI Client Tests")
@@ -92,6 +353,15 @@ if __name__ == "__main__":
 
     test_query_extraction()
     test_type_payload_extraction()
+    test_stream_parses_sse()
+    test_dropped_stream_raises_openrouter_error()
+    test_incremental_typer_types_whole_words()
+    test_incremental_typer_reports_first_char()
+    test_hedged_returns_fastest_valid_answer()
+    test_hedged_bounds_concurrency_and_falls_through()
+    test_hedged_model_timeout_and_total_failure()
+    test_hedged_model_timeout_covers_slow_body()
+    test_budget_runs_out_mid_response()
     test_ai_query()
 
     print("\n" + "=" * 60)
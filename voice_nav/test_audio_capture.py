@@ -0,0 +1,162 @@
+"""Test VAD endpointing and silence trimming with synthetic audio."""
+
+import numpy as np
+
+from audio_capture import (
+    DEFAULT_SAMPLE_RATE,
+    AudioRingBuffer,
+    EnergyVAD,
+    Endpointer,
+    PrerollCapture,
+    frame_length,
+    record_utterance,
+    trim_silence,
+)
+
+SR = DEFAULT_SAMPLE_RATE
+
+
+def _clip(lead_sec: float, speech_sec: float, tail_sec: float) -> np.ndarray:
+    """Low noise, a 300 Hz tone standing in for speech, then low noise."""
+    rng = np.random.default_rng(0)
+    total = int((lead_sec + speech_sec + tail_sec) * SR)
+    audio = (rng.standard_normal(total) * 0.001).astype(np.float32)
+    start = int(lead_sec * SR)
+    t = np.arange(int(speech_sec * SR)) / SR
+    audio[start : start + len(t)] += 0.3 * np.sin(2 * np.pi * 300 * t)
+    return audio
+
+
+def _frames(audio: np.ndarray):
+    n = frame_length(SR)
+    for i in range(0, len(audio), n):
+        yield audio[i : i + n]
+
+
+def test_vad_separates_tone_from_noise():
+    """Test the energy detector on loud and quiet frames."""
+    vad = EnergyVAD()
+    n = frame_length(SR)
+    assert not vad.is_speech(np.zeros(n, dtype=np.float32))
+    assert vad.is_speech(_clip(0, 0.02, 0)[:n])
+
+
+def test_endpoint_stops_after_trailing_silence():
+    """Test that capture ends shortly after speech instead of running to the cap."""
+    audio = _clip(0.3, 0.6, 5.0)
+    consumed = []
+
+    def source():
+        for frame in _frames(audio):
+            consumed.append(len(frame))
+            yield frame
+
+    trimmed = record_utterance(sample_rate=SR, silence_sec=0.4, frames=source())
+    consumed_sec = sum(consumed) / SR
+    assert consumed_sec < 0.3 + 0.6 + 0.4 + 0.1
+    assert 0.6 <= len(trimmed) / SR <= 0.6 + 0.25
+
+
+def test_no_speech_times_out():
+    """Test that silence alone ends with an empty clip."""
+    endpointer = Endpointer(sample_rate=SR, start_timeout_sec=1.0)
+    for frame in _frames(_clip(2.0, 0, 0)):
+        if endpointer.push(frame):
+            break
+    assert endpointer.reason == "no speech"
+    assert trim_silence(_clip(2.0, 0, 0), SR).size == 0
+
+
+def test_trim_returns_view():
+    """Test that trimming does not copy the audio."""
+    audio = _clip(0.5, 0.5, 0.5)
+    trimmed = trim_silence(audio, SR)
+    assert trimmed.base is audio or np.shares_memory(trimmed, audio)
+    assert 0.5 <= len(trimmed) / SR <= 0.75
+
+
+def test_ring_buffer_wraps_in_order():
+    """Test that the ring returns the newest samples oldest-first as views."""
+    ring = AudioRingBuffer(10)
+    ring.write(np.arange(7, dtype=np.float32))
+    ring.write(np.arange(7, 13, dtype=np.float32))
+    views = ring.latest(10)
+    assert np.array_equal(np.concatenate(views), np.arange(3, 13))
+    assert all(np.shares_memory(v, ring._data) for v in views)
+    ring.write(np.arange(100, 125, dtype=np.float32))
+    assert np.array_equal(np.concatenate(ring.latest(4)), np.arange(121, 125))
+
+
+def test_preroll_prepends_buffered_speech():
+    """Test that speech fed before the trigger ends up in the utterance."""
+    capture = PrerollCapture(preroll_sec=1.0, sample_rate=SR)
+    audio = _clip(0.2, 0.6, 0.6)
+    split = int(0.6 * SR)
+    for frame in _frames(audio[:split]):
+        capture._on_frame(frame)
+
+    frames = capture.utterance_frames()
+    preroll = [next(frames)]
+    for frame in _frames(audio[split:]):
+        capture._on_frame(frame)
+    # Ring is frozen while the utterance is open.
+    assert np.shares_memory(preroll[0], capture.ring._data)
+    assert capture.ring._written == split
+
+    def source():
+        yield from preroll
+        yield from frames
+
+    trimmed = record_utterance(sample_rate=SR, frames=source())
+    frames.close()
+    assert capture._tap is None
+    assert 0.6 <= len(trimmed) / SR <= 0.6 + 0.25
+
+
+def test_preroll_is_not_replayed_by_the_next_utterance():
+    """Test that a quick second trigger only gets audio from after the first."""
+    capture = PrerollCapture(preroll_sec=1.0, sample_rate=SR)
+    for frame in _frames(_clip(0, 0.8, 0)):
+        capture._on_frame(frame)
+    frames = capture.utterance_frames()
+    first = next(frames)
+    capture._on_frame(np.zeros(frame_length(SR), dtype=np.float32))
+    live = next(frames)
+    assert capture.is_preroll(first) and not capture.is_preroll(live)
+    frames.close()
+
+    later = _clip(0.3, 0, 0)
+    for frame in _frames(later):
+        capture._on_frame(frame)
+    frames = capture.utterance_frames()
+    preroll = next(frames)
+    frames.close()
+    assert np.array_equal(preroll, later)
+
+
+def test_preroll_does_not_count_toward_start_timeout():
+    """Test that the wait for speech starts at the trigger, not before it."""
+    endpointer = Endpointer(sample_rate=SR, start_timeout_sec=0.5)
+    assert not any(endpointer.push(f, live=False) for f in _frames(_clip(1.0, 0, 0)))
+    assert not any(endpointer.push(f) for f in _frames(_clip(0.4, 0, 0)))
+    assert any(endpointer.push(f) for f in _frames(_clip(0.2, 0, 0)))
+    assert endpointer.reason == "no speech"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Audio Capture Tests")
+    print("=" * 60)
+
+    for test in (
+        test_vad_separates_tone_from_noise,
+        test_endpoint_stops_after_trailing_silence,
+        test_no_speech_times_out,
+        test_trim_returns_view,
+        test_ring_buffer_wraps_in_order,
+        test_preroll_prepends_buffered_speech,
+        test_preroll_is_not_replayed_by_the_next_utterance,
+        test_preroll_does_not_count_toward_start_timeout,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,90 @@
+"""Test the generation-keyed block registry."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import block_registry
+from block_registry import BlockRegistry, StaleBlockError
+from child import ElementSet
+from schemas import Block
+
+
+def _elements(count: int, hints: bool = True) -> ElementSet:
+    boxes = np.array([(i * 10, i * 5, 20, 20) for i in range(count)])
+    elements = ElementSet(boxes)
+    if hints:
+        elements.set_hints([f"h{i}" for i in range(count)])
+    return elements
+
+
+def test_lookup_by_id_and_hint():
+    """Test that blocks are found by id and hint and carry their boxes."""
+    registry = BlockRegistry()
+    snapshot = registry.publish(_elements(3))
+    assert [b.id for b in snapshot.blocks] == ["1:0", "1:1", "1:2"]
+    block = registry.get("1:2")
+    assert (block.x, block.y, block.w, block.h, block.hint) == (20, 10, 20, 20, "h2")
+    assert registry.by_hint("h1") is snapshot.blocks[1]
+    assert registry.by_hint("zz") is None
+
+
+def test_blocks_match_validated_blocks():
+    """Test that unvalidated blocks have the same field types as validated ones."""
+    for block in block_registry.elements_to_blocks(_elements(2), generation=1):
+        validated = Block.model_validate(block.model_dump())
+        assert block == validated
+        for name in ("x", "y", "w", "h", "score"):
+            assert type(getattr(block, name)) is float, name
+        assert block.model_dump_json() == validated.model_dump_json()
+
+
+def test_stale_and_unknown_ids_rejected():
+    """Test ids from an earlier detection and malformed ids."""
+    registry = BlockRegistry()
+    registry.publish(_elements(3))
+    registry.publish(_elements(1, hints=False))
+    assert registry.get("2:0").hint is None
+    with pytest.raises(StaleBlockError):
+        registry.get("1:0")
+    for bad in ("2:5", "2:-1", "nope", "1:2:3", None):
+        with pytest.raises(ValueError):
+            registry.get(bad)
+
+
+def test_slow_older_detection_does_not_win(monkeypatch):
+    """Test that a detection finishing late doesn't replace a newer one."""
+    registry = BlockRegistry()
+    release = threading.Event()
+    convert = block_registry.elements_to_blocks
+
+    def slow_first(elements, generation):
+        if generation == 1:
+            release.wait(5)
+        return convert(elements, generation)
+
+    monkeypatch.setattr(block_registry, "elements_to_blocks", slow_first)
+    older = threading.Thread(target=registry.publish, args=(_elements(5),))
+    older.start()
+    while registry._generation < 1:
+        time.sleep(0.001)
+    registry.publish(_elements(2))
+    release.set()
+    older.join()
+    assert registry.snapshot.generation == 2
+    assert len(registry.snapshot.blocks) == 2
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Block Registry Tests")
+    print("=" * 60)
+
+    test_lookup_by_id_and_hint()
+    print("✓ test_lookup_by_id_and_hint")
+    test_blocks_match_validated_blocks()
+    print("✓ test_blocks_match_validated_blocks")
+    test_stale_and_unknown_ids_rejected()
+    print("✓ test_stale_and_unknown_ids_rejected")
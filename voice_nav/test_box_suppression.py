@@ -0,0 +1,80 @@
+"""Test duplicate and nested-outline box suppression."""
+
+import numpy as np
+from cv2 import rectangle
+from PIL import Image
+
+from element_selector import _suppress_boxes, detect_elements
+from test_incremental_detection import synthetic_screen
+
+
+def _suppress(boxes, iou_threshold=0.7, max_inset=8):
+    kept = _suppress_boxes(
+        np.array(boxes, np.int32).reshape(-1, 4), iou_threshold, max_inset
+    )
+    return sorted(map(tuple, kept.tolist()))
+
+
+def test_inner_outline_and_duplicates_dropped():
+    """Test that one widget's contours collapse to its outer box."""
+    outer = (100, 100, 30, 20)
+    inner = (103, 103, 24, 14)  # IoU 0.56, but only 3 px inset
+    shifted = (101, 100, 30, 21)  # IoU > 0.9
+    assert _suppress([inner, outer, shifted, outer]) == [shifted]
+
+
+def test_distinct_nested_elements_kept():
+    """Test that a button inside a toolbar is not suppressed."""
+    toolbar = (0, 0, 400, 40)
+    button = (20, 8, 60, 24)
+    overlapping = (200, 0, 400, 40)
+    assert _suppress([toolbar, button, overlapping]) == sorted(
+        [toolbar, button, overlapping]
+    )
+
+
+def test_suppressed_box_does_not_suppress():
+    """Test greedy order: only kept boxes suppress smaller ones."""
+    a = (0, 0, 100, 100)
+    b = (6, 6, 88, 88)  # nested in a
+    c = (12, 12, 78, 78)  # nested in b, 12 px inside a
+    assert _suppress([a, b, c]) == [a, c]
+    assert _suppress([], 0.7, 8) == []
+    assert _suppress([a, a], iou_threshold=2.0, max_inset=-1) == [a, a]
+
+
+def test_outlined_widget_gets_one_element():
+    """Test end to end that a drawn outline yields a single element."""
+    frame = np.full((200, 300, 3), 240, np.uint8)
+    rectangle(frame, (50, 50), (150, 90), (40, 40, 40), 2)
+    image = Image.fromarray(frame)
+    raw = detect_elements(image, iou_threshold=2.0, max_inset=-1)
+    assert len(raw) == 2
+    (child,) = detect_elements(image)
+    assert (child.absolute_position, child.width, child.height) == max(
+        ((c.absolute_position, c.width, c.height) for c in raw),
+        key=lambda b: b[1] * b[2],
+    )
+
+
+def test_fewer_elements_on_busy_screen():
+    """Test that suppression trims a desktop-like screen."""
+    image = Image.fromarray(synthetic_screen(seed=10))
+    raw = detect_elements(image, max_elements=10_000, iou_threshold=2.0, max_inset=-1)
+    assert len(detect_elements(image, max_elements=10_000)) < len(raw)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Box Suppression Tests")
+    print("=" * 60)
+
+    for test in (
+        test_inner_outline_and_duplicates_dropped,
+        test_distinct_nested_elements_kept,
+        test_suppressed_box_does_not_suppress,
+        test_outlined_widget_gets_one_element,
+        test_fewer_elements_on_busy_screen,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,61 @@
+"""Test the column-wise ElementSet and its element views."""
+
+import numpy as np
+from PIL import Image
+
+from child import ElementSet, ElementView
+from element_selector import detect_elements, get_hints
+from test_incremental_detection import synthetic_screen
+
+BOXES = [(10, 20, 30, 40), (100, 20, 50, 25), (10, 200, 80, 30)]
+
+
+def test_views_duck_type_child():
+    """Test per-element access through views."""
+    elements = ElementSet(np.array(BOXES))
+    assert len(elements) == 3
+    view = elements[1]
+    assert view.absolute_position == view.relative_position == (100, 20)
+    assert (view.width, view.height) == (50, 25)
+    assert view.center == (125.0, 32.5)
+    assert view.score == 1.0 and view.hint is None and view.text is None
+    assert elements[-1] == elements[2] and elements[0] != elements[1]
+    assert len({elements[0], elements[0], elements[1]}) == 2
+    assert [v.box for v in elements] == BOXES
+
+
+def test_slices_share_arrays_and_filter():
+    """Test that slicing is a view and masks filter every column."""
+    texts = np.array(["File", "Edit", "Save"], dtype=object)
+    elements = ElementSet(np.array(BOXES), texts=texts)
+    head = elements[:2]
+    assert np.shares_memory(head.boxes, elements.boxes)
+    wide = elements.filter(elements.width >= 50)
+    assert [v.text for v in wide] == ["Edit", "Save"]
+    assert np.array_equal(wide.centers(), [[125.0, 32.5], [50.0, 215.0]])
+    assert len(ElementSet.empty()) == 0
+
+
+def test_get_hints_stores_hint_ids():
+    """Test that hints are recorded on the set for later stages."""
+    elements = detect_elements(Image.fromarray(synthetic_screen(seed=11)))
+    hints = get_hints(elements, alphabet="asdf")
+    assert len(hints) == len(elements)
+    assert all(isinstance(v, ElementView) for v in hints.values())
+    assert all(view.hint == label for label, view in hints.items())
+    assert np.array_equal(elements.hint_ids, np.arange(len(elements)))
+    assert get_hints(ElementSet.empty()) == {}
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Element Set Tests")
+    print("=" * 60)
+
+    for test in (
+        test_views_duck_type_child,
+        test_slices_share_arrays_and_filter,
+        test_get_hints_stores_hint_ids,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
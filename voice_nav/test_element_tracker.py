@@ -0,0 +1,131 @@
+"""Test hint and id tracking across re-detections."""
+
+import numpy as np
+
+from child import ElementSet
+from element_selector import get_hints
+from element_tracker import (
+    MATCH_IOU,
+    ElementTracker,
+    _candidate_pairs,
+    expected_keystrokes,
+    hint_weights,
+    huffman_labels,
+    match_boxes,
+)
+
+
+def _prefix_free(labels) -> bool:
+    return not any(a != b and b.startswith(a) for a in labels for b in labels) and len(
+        set(labels)
+    ) == len(labels)
+
+
+def _grid(count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    cols = int(np.ceil(np.sqrt(count)))
+    boxes = [
+        (40 + (i % cols) * 90, 40 + (i // cols) * 60, 70, 40) for i in range(count)
+    ]
+    boxes = np.array(boxes, np.int32)
+    boxes[:, 2:] += rng.integers(-5, 6, (count, 2)).astype(np.int32)
+    return boxes
+
+
+def test_match_boxes_exact_moved_and_new():
+    """Test exact matches, small moves and unmatched boxes."""
+    previous = np.array([(0, 0, 50, 20), (100, 0, 50, 20), (200, 0, 50, 20)])
+    current = np.array(
+        [(102, 1, 50, 20), (0, 0, 50, 20), (400, 400, 30, 30), (202, 0, 49, 20)]
+    )
+    assert match_boxes(previous, current).tolist() == [1, 0, -1, 2]
+    assert match_boxes(previous[:0], current).tolist() == [-1] * 4
+    assert match_boxes(previous, current[:0]).tolist() == []
+
+
+def test_hints_survive_screen_changes():
+    """Test that kept elements keep hints and ids while others come and go."""
+    tracker = ElementTracker()
+    boxes = _grid(40)
+    first = ElementSet(boxes)
+    hints = get_hints(first, tracker=tracker)
+    assert len(hints) == 40 and _prefix_free(hints)
+    before = {tuple(v.box): (v.hint, v.track_id) for v in first}
+
+    # Drop a few elements, nudge one, add two new ones and re-sort.
+    changed = np.concatenate([boxes[5:], [(2000, 40, 60, 30), (2000, 120, 60, 30)]])
+    changed[0, 0] += 2
+    second = ElementSet(changed[::-1].copy())
+    hints = get_hints(second, tracker=tracker)
+    assert len(hints) == len(second) and _prefix_free(hints)
+    for view in second:
+        box = tuple(view.box)
+        if box in before:
+            assert (view.hint, view.track_id) == before[box]
+    nudged = next(v for v in second if v.box == tuple(changed[0]))
+    assert (nudged.hint, nudged.track_id) == before[tuple(boxes[5])]
+    new_ids = [v.track_id for v in second if v.box[0] == 2000]
+    assert new_ids == [40, 41]
+
+
+def test_full_code_rehints():
+    """Test that new elements get fresh hints when every hint is held."""
+    tracker = ElementTracker(alphabet="ab")
+    boxes = _grid(3)
+    small = ElementSet(boxes[:2])
+    get_hints(small, tracker=tracker)
+    assert sorted(v.hint for v in small) == ["a", "b"]
+    large = ElementSet(boxes)
+    get_hints(large, tracker=tracker)
+    assert sorted(len(v.hint) for v in large) == [1, 2, 2]
+    assert [v.track_id for v in large] == [0, 1, 2]
+
+
+def test_huffman_hints_save_keystrokes():
+    """Test prefix-free hints that beat fixed-length ones on average."""
+    assert huffman_labels(np.ones(0)) == []
+    assert huffman_labels(np.ones(1)) == ["a"]
+    assert huffman_labels(np.ones(9)) == list("asdfghjkl")
+
+    elements = ElementSet(_grid(150))
+    weights = hint_weights(elements)
+    labels = huffman_labels(weights)
+    assert _prefix_free(labels)
+    assert expected_keystrokes(labels, weights) < 3
+
+    # A few much likelier targets get single keys.
+    weights[:5] *= 50
+    labels = huffman_labels(weights)
+    assert all(len(labels[i]) == 1 for i in range(5))
+    assert _prefix_free(labels)
+
+
+def test_clicks_shorten_hints():
+    """Test that a clicked element's hint gets shorter on the next detection."""
+    tracker = ElementTracker()
+    boxes = _grid(100)
+    elements = ElementSet(boxes)
+    get_hints(elements, tracker=tracker)
+    target = elements[57]
+    assert len(target.hint) > 1
+    for _ in range(20):
+        tracker.record_click(*target.center)
+    again = ElementSet(boxes)
+    get_hints(again, tracker=tracker)
+    assert len(again[57].hint) == 1
+    assert _prefix_free([v.hint for v in again])
+
+
+def test_match_compares_only_nearby_pairs():
+    """Test that matching a screenful of moved boxes skips far-apart pairs."""
+    # A scroll moves every box, so none is paired through the exact dict.
+    boxes = _grid(300)
+    moved = boxes.copy()
+    moved[:, 1] += 4
+    moved[::7, 0] += 3
+    order = np.random.default_rng(1).permutation(len(moved))
+    moved = moved[order]
+    assert match_boxes(boxes, moved).tolist() == order.tolist()
+    # About 17 per box, one grid column, against 300 comparing every pair.
+    rows, _ = _candidate_pairs(boxes, moved, MATCH_IOU)
+    assert len(rows) < 20 * len(boxes)
@@ -1,10 +1,16 @@
 """Test script for ElevenLabs STT integration."""
 
 import asyncio
+import io
 import logging
 import os
 
+import numpy as np
+import soundfile as sf
+
 from stt_elevenlabs import (
+    UPLOAD_FORMATS,
+    encode_audio,
     transcribe_from_mic,
     transcribe_file,
     record_microphone,
@@ -38,6 +44,39 @@ async def test_microphone_recording():
         return False
 
 
+def _encode_float32_wav(audio, sample_rate):
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sample_rate, format="WAV", subtype="FLOAT")
+    return buffer.getvalue()
+
+
+async def test_in_memory_encoding():
+    """Test in-memory upload encodings and report their payload sizes."""
+    logger.info("\nTesting in-memory audio encoding...")
+
+    sample_rate = 16000
+    t = np.arange(2 * sample_rate) / sample_rate
+    audio = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+    float_wav = len(_encode_float32_wav(audio, sample_rate))
+    logger.info(f"  float32 wav: {float_wav} bytes")
+    try:
+        sizes = {}
+        for name in UPLOAD_FORMATS:
+            buffer = encode_audio(audio, sample_rate, name)
+            sizes[name] = buffer.getbuffer().nbytes
+            decoded, rate = sf.read(buffer, dtype="float32")
+            assert rate == sample_rate and abs(len(decoded) - len(audio)) < 1000
+            logger.info(f"  {name}: {sizes[name]} bytes")
+        assert sizes["pcm16"] < float_wav
+        assert sizes["flac"] < sizes["pcm16"]
+        logger.info("✓ In-memory encodings are smaller than float32 wav")
+        return True
+    except Exception as e:
+        logger.error(f"✗ In-memory encoding failed: {e}")
+        return False
+
+
 async def test_transcribe_file():
     """Test file transcription."""
     logger.info("\nTesting file transcription...")
@@ -105,6 +144,7 @@ async def run_all_tests():
 
     results = []
 
+    results.append(await test_in_memory_encoding())
     results.append(await test_microphone_recording())
     results.append(await test_transcribe_file())
     results.append(await test_transcribe_from_mic())
@@ -0,0 +1,171 @@
+"""Test pooled HTTP sessions and pre-warming against a local HTTPS server."""
+
+import asyncio
+import os
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_client
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalHTTPSServer(ThreadingHTTPServer):
+    """HTTPS stand-in for an API host that counts accepted connections."""
+
+    daemon_threads = True
+
+    def __init__(self, cert_path: str, key_path: str):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_path, key_path)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+        self.connections = 0
+        self.url = f"https://localhost:{self.server_address[1]}/v1/test"
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        return request
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    # The server finishes its side of the TLS handshake slightly after the
+    # client, so accepted-connection counts lag by a moment.
+    end = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _self_signed_cert(directory: str):
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-keyout",
+            key,
+            "-out",
+            cert,
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    return cert, key
+
+
+def _check_prewarm_reuse(http2: bool):
+    if shutil.which("openssl") is None:
+        print("openssl not installed, skipping")
+        return
+    original = http_client.HTTP2_ENABLED
+    http_client.HTTP2_ENABLED = http2
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = _self_signed_cert(tmp)
+        server = LocalHTTPSServer(cert, key)
+        try:
+            http_client.prewarm(server.url, verify=cert).join(timeout=5)
+            assert _wait_for(lambda: server.connections == 1)
+
+            for _ in range(3):
+                resp = http_client.post(server.url, json={"q": 1}, verify=cert)
+                assert resp.status_code == 200 and resp.json() == {"ok": True}
+            assert server.connections == 1
+
+            # Already warm: the idle connection is reused.
+            http_client.prewarm(server.url, verify=cert).join(timeout=5)
+            assert not _wait_for(lambda: server.connections > 1, timeout=0.2)
+        finally:
+            http_client.HTTP2_ENABLED = original
+            server.shutdown()
+            server.server_close()
+
+
+def test_async_client_falls_back_without_h2():
+    """Test that HTTP/2 mode without the h2 package uses HTTP/1.1."""
+    original = http_client.HTTP2_ENABLED, sys.modules.get("h2")
+    http_client.HTTP2_ENABLED = True
+    http_client._http2_unavailable = False
+    sys.modules["h2"] = None  # makes ``import h2`` raise ImportError
+    try:
+
+        async def build():
+            return http_client.get_async_client()
+
+        client = asyncio.run(build())
+        assert client is not None
+        assert http_client._get_http2_client() is None
+    finally:
+        http_client.HTTP2_ENABLED = original[0]
+        http_client._http2_unavailable = False
+        if original[1] is None:
+            del sys.modules["h2"]
+        else:
+            sys.modules["h2"] = original[1]
+
+
+def test_prewarm_then_requests_reuse_one_connection():
+    """Test that pre-warmed TLS connections are reused by later posts."""
+    _check_prewarm_reuse(http2=False)
+
+
+def test_http2_mode_uses_caller_verify():
+    """Test the httpx path with a custom CA, for pre-warming and posts.
+
+    The local server doesn't offer h2 over ALPN, so httpx settles on
+    HTTP/1.1, but the client, pool and certificate handling are httpx's.
+    """
+    _check_prewarm_reuse(http2=True)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("HTTP Client Tests")
+    print("=" * 60)
+
+    test_prewarm_then_requests_reuse_one_connection()
+    print("✓ test_prewarm_then_requests_reuse_one_connection")
+    test_http2_mode_uses_caller_verify()
+    print("✓ test_http2_mode_uses_caller_verify")
+    test_async_client_falls_back_without_h2()
+    print("✓ test_async_client_falls_back_without_h2")
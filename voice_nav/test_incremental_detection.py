@@ -0,0 +1,79 @@
+"""Test incremental element detection against full passes."""
+
+import numpy as np
+from cv2 import FONT_HERSHEY_SIMPLEX, putText, rectangle
+from PIL import Image
+
+from element_selector import IncrementalDetector, detect_elements
+
+
+def synthetic_screen(width: int = 1600, height: int = 1000, seed: int = 0):
+    """A desktop-like frame: flat background, filled and outlined widgets."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 240, np.uint8)
+    for _ in range(100):
+        x, y = int(rng.integers(0, width - 300)), int(rng.integers(0, height - 100))
+        w, h = int(rng.integers(30, 280)), int(rng.integers(24, 90))
+        color = tuple(int(c) for c in rng.integers(0, 200, 3))
+        rectangle(frame, (x, y), (x + w, y + h), color, -1 if rng.random() < 0.5 else 2)
+        putText(frame, "Ok", (x + 5, y + 20), FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+    return frame
+
+
+def _boxes(children):
+    return [(c.absolute_position, c.width, c.height) for c in children]
+
+
+def test_matches_full_pass_after_edits():
+    """Test that small edits give the same elements as a full pass."""
+    frame = synthetic_screen()
+    detector = IncrementalDetector(max_elements=10_000)
+    detector.detect(Image.fromarray(frame))
+
+    rng = np.random.default_rng(1)
+    for i in range(20):
+        frame = frame.copy()
+        x, y = int(rng.integers(0, 1400)), int(rng.integers(0, 900))
+        w, h = int(rng.integers(30, 200)), int(rng.integers(20, 80))
+        color = (int(rng.integers(0, 255)), 0, 0)
+        rectangle(frame, (x, y), (x + w, y + h), color, -1 if i % 2 else 2)
+
+        image = Image.fromarray(frame)
+        incremental = detector.detect(image)
+        assert detector.last_dirty_fraction < 0.5
+        assert _boxes(incremental) == _boxes(
+            detect_elements(image, max_elements=10_000)
+        )
+
+
+def test_unchanged_frame_reuses_result():
+    """Test that an identical frame marks no tiles dirty."""
+    image = Image.fromarray(synthetic_screen(seed=2))
+    detector = IncrementalDetector()
+    first = detector.detect(image)
+    again = detector.detect(image.copy())
+    assert detector.last_dirty_fraction == 0.0
+    assert _boxes(first) == _boxes(again) == _boxes(detect_elements(image))
+
+
+def test_size_change_forces_full_pass():
+    """Test that a new resolution is handled by a full pass."""
+    detector = IncrementalDetector()
+    detector.detect(Image.fromarray(synthetic_screen(seed=3)))
+    image = Image.fromarray(synthetic_screen(800, 600, seed=4))
+    assert _boxes(detector.detect(image)) == _boxes(detect_elements(image))
+    assert detector.last_dirty_fraction == 1.0
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Incremental Detection Tests")
+    print("=" * 60)
+
+    for test in (
+        test_matches_full_pass_after_edits,
+        test_unchanged_frame_reuses_result,
+        test_size_change_forces_full_pass,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
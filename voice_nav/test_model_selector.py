@@ -0,0 +1,162 @@
+"""Test latency-based model selection, circuit breaking and retries."""
+
+import time
+
+import model_selector
+from model_selector import ModelSelector
+
+
+class _Failed(Exception):
+    pass
+
+
+def _selector():
+    return ModelSelector({"text": ["default", "alt-a", "alt-b"]})
+
+
+def test_cold_start_prefers_default_then_ranks_by_p50():
+    """Test that measured latency overrides the configured order."""
+    selector = _selector()
+    assert selector.candidates("text")[0] == "default"
+
+    for _ in range(5):
+        selector.record("default", True, latency_ms=900)
+        selector.record("alt-b", True, latency_ms=200, tokens=100)
+    assert selector.candidates("text") == ["alt-b", "default", "alt-a"]
+    summary = selector.summary()["alt-b"]
+    assert summary["p50_ms"] == 200 and summary["tokens_per_sec"] == 500
+    assert summary["error_rate"] == 0.0
+
+
+def test_circuit_breaker_opens_and_recovers():
+    """Test that repeated failures demote a model until the cooldown ends."""
+    original = model_selector.BREAKER_COOLDOWN_SEC
+    model_selector.BREAKER_COOLDOWN_SEC = 0.05
+    try:
+        selector = _selector()
+        for _ in range(model_selector.BREAKER_FAILURES):
+            selector.record("default", ok=False)
+        assert selector.candidates("text")[-1] == "default"
+        assert selector.summary()["default"]["breaker_open"]
+
+        time.sleep(0.06)
+        assert selector.candidates("text")[0] == "default"
+        # Half-open: one more failure re-opens straight away.
+        selector.record("default", ok=False)
+        assert selector.candidates("text")[-1] == "default"
+    finally:
+        model_selector.BREAKER_COOLDOWN_SEC = original
+
+
+def test_call_retries_next_model_within_deadline():
+    """Test retries move to untried models and timeouts shrink to the budget."""
+    selector = _selector()
+    calls = []
+
+    def fn(model, timeout):
+        calls.append((model, timeout))
+        if model == "default":
+            raise _Failed("boom")
+        return f"from {model}", 10
+
+    result = selector.call("text", fn, deadline_sec=5.0, backoff_sec=0.01)
+    assert result == "from alt-a"
+    assert [m for m, _ in calls] == ["default", "alt-a"]
+    assert calls[1][1] < calls[0][1] <= 5.0
+    assert selector.summary()["default"]["error_rate"] == 1.0
+
+
+def test_call_raises_last_error_when_all_fail():
+    """Test that exhausting attempts re-raises the last failure."""
+    selector = _selector()
+
+    def fn(model, timeout):
+        raise _Failed(model)
+
+    try:
+        selector.call("text", fn, deadline_sec=5.0, backoff_sec=0.0)
+    except _Failed as e:
+        assert str(e) == "alt-b"
+    else:
+        raise AssertionError("expected _Failed")
+
+
+def test_call_deadline_is_wall_clock():
+    """Test that an attempt still running when the budget ends is abandoned."""
+    selector = _selector()
+
+    def fn(model, timeout):
+        time.sleep(1.0)
+        return "late", None
+
+    start = time.perf_counter()
+    try:
+        selector.call("text", fn, deadline_sec=0.2)
+    except model_selector.DeadlineExceeded:
+        pass
+    else:
+        raise AssertionError("expected DeadlineExceeded")
+    assert time.perf_counter() - start < 0.5
+    assert selector.summary()["default"]["error_rate"] == 1.0
+
+
+def test_probes_find_a_faster_model():
+    """Test that occasional probes measure other models so a faster one wins."""
+    selector = _selector()
+    latency_ms = {"default": 900, "alt-a": 600, "alt-b": 150}
+    firsts = []
+    for _ in range(10 * model_selector.EXPLORE_EVERY):
+        model = selector.candidates("text")[0]
+        firsts.append(model)
+        selector.record(model, True, latency_ms=latency_ms[model])
+    # Probes go to the least-measured model, so both alternatives get sampled.
+    assert firsts[model_selector.EXPLORE_EVERY - 1] == "alt-a"
+    assert firsts[2 * model_selector.EXPLORE_EVERY - 1] == "alt-b"
+    recent = firsts[-2 * model_selector.EXPLORE_EVERY :]
+    assert recent.count("alt-b") >= len(recent) - 2
+
+
+def test_half_open_breaker_allows_one_trial():
+    """Test that after the cooldown only one caller gets the trial call."""
+    original = model_selector.BREAKER_COOLDOWN_SEC
+    model_selector.BREAKER_COOLDOWN_SEC = 0.05
+    try:
+        selector = _selector()
+        for _ in range(model_selector.BREAKER_FAILURES):
+            selector.record("default", ok=False)
+        time.sleep(0.06)
+        assert selector.candidates("text")[0] == "default"
+        # The trial is in flight: concurrent callers are routed elsewhere.
+        assert selector.candidates("text")[-1] == "default"
+        assert selector.candidates("text")[-1] == "default"
+        selector.record("default", True, latency_ms=100)
+        assert selector.candidates("text")[0] == "default"
+        assert not selector.summary()["default"]["breaker_open"]
+
+        # A trial that never reports is given up after another cooldown.
+        for _ in range(model_selector.BREAKER_FAILURES):
+            selector.record("default", ok=False)
+        time.sleep(0.06)
+        assert selector.candidates("text")[0] == "default"
+        time.sleep(0.06)
+        assert selector.candidates("text")[0] == "default"
+    finally:
+        model_selector.BREAKER_COOLDOWN_SEC = original
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Model Selector Tests")
+    print("=" * 60)
+
+    for test in (
+        test_cold_start_prefers_default_then_ranks_by_p50,
+        test_circuit_breaker_opens_and_recovers,
+        test_probes_find_a_faster_model,
+        test_half_open_breaker_allows_one_trial,
+        test_call_retries_next_model_within_deadline,
+        test_call_raises_last_error_when_all_fail,
+        test_call_deadline_is_wall_clock,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
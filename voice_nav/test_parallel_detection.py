@@ -0,0 +1,57 @@
+"""Test banded parallel contour tracing against a single pass."""
+
+import numpy as np
+from PIL import Image
+
+from element_selector import _banded_boxes, _contour_boxes, detect_elements
+from test_incremental_detection import synthetic_screen
+
+
+def _sorted(boxes):
+    return sorted(map(tuple, boxes.tolist()))
+
+
+def test_parallel_matches_single_thread():
+    """Test that every worker count finds the same elements."""
+    image = Image.fromarray(synthetic_screen(2560, 1440, seed=5))
+    expected = [
+        (c.absolute_position, c.width, c.height)
+        for c in detect_elements(image, max_elements=10_000)
+    ]
+    for workers in (2, 3, 4, 0):
+        children = detect_elements(image, max_elements=10_000, workers=workers)
+        assert [(c.absolute_position, c.width, c.height) for c in children] == expected
+
+
+def test_seam_components_traced_once():
+    """Test contours crossing band cuts, nested ones included."""
+    mask = np.zeros((1024, 600), np.uint8)
+    mask[10:1000, 10:590] = 255  # spans every band
+    mask[20:990, 20:580] = 0
+    mask[500:530, 100:200] = 255  # sits on the 2-band cut
+    mask[505:525, 110:190] = 0
+    rng = np.random.default_rng(6)
+    mask[300:700, 250:550] = (rng.random((400, 300)) < 0.45) * 255
+    for workers in (2, 4):
+        assert _sorted(_banded_boxes(mask, workers)) == _sorted(_contour_boxes(mask))
+
+
+def test_small_screen_stays_single_band():
+    """Test that bands below MIN_BAND_ROWS are not split."""
+    mask = np.zeros((300, 300), np.uint8)
+    mask[100:200, 100:200] = 255
+    assert _sorted(_banded_boxes(mask, 8)) == [(100, 100, 100, 100)]
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Parallel Detection Tests")
+    print("=" * 60)
+
+    for test in (
+        test_parallel_matches_single_thread,
+        test_seam_components_traced_once,
+        test_small_screen_stays_single_band,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,88 @@
+"""Test the LRU + TTL response cache."""
+
+import os
+import tempfile
+import time
+
+from response_cache import ResponseCache, make_key
+
+
+def test_key_normalization():
+    """Test that case, spacing and trailing punctuation don't change the key."""
+    a = make_key("What is  Python?", "m", "sys")
+    assert a == make_key("what is python", "m", "sys")
+    assert a != make_key("what is python", "other-model", "sys")
+    assert a != make_key("what is python", "m", "other prompt")
+
+
+def test_lru_eviction_and_stats():
+    """Test that the least recently used entry is evicted first."""
+    cache = ResponseCache(max_entries=2, ttl_sec=60, path=None)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75, "size": 2}
+
+
+def test_ttl_expiry():
+    """Test that entries expire after the TTL."""
+    cache = ResponseCache(max_entries=4, ttl_sec=0.05, path=None)
+    cache.put("a", "1")
+    assert cache.get("a") == "1"
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_persists_across_instances():
+    """Test that an on-disk cache survives a restart."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "responses.sqlite")
+        ResponseCache(max_entries=4, ttl_sec=60, path=path).put("k", "answer")
+        assert ResponseCache(max_entries=4, ttl_sec=60, path=path).get("k") == "answer"
+
+
+class _CountingDB:
+    """Wraps a sqlite connection and counts the queries run on it."""
+
+    def __init__(self, db):
+        self.db = db
+        self.queries = 0
+
+    def execute(self, *args):
+        self.queries += 1
+        return self.db.execute(*args)
+
+    def commit(self):
+        self.db.commit()
+
+
+def test_memory_hit_skips_disk():
+    """Test that a hit in memory makes no sqlite query; see bench_lookups.py."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(path=os.path.join(tmp, "responses.sqlite"))
+        key = make_key("write a polite out of office reply", "m", "sys")
+        cache.put(key, "I'm out of the office.")
+        cache._db = _CountingDB(cache._db)
+        for _ in range(100):
+            assert cache.get(key) == "I'm out of the office."
+        assert cache._db.queries == 0
+        cache._db.db.close()
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Response Cache Tests")
+    print("=" * 60)
+
+    for test in (
+        test_key_normalization,
+        test_lru_eviction_and_stats,
+        test_ttl_expiry,
+        test_persists_across_instances,
+        test_memory_hit_skips_disk,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,188 @@
+"""Test raw PPM screen capture and grayscale conversion."""
+
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import screen_capture
+from element_selector import detect_elements
+from screen_capture import CaptureError, FileSource, StreamSource, parse_ppm, to_gray
+from test_incremental_detection import synthetic_screen
+
+
+def _ppm_file(frame: np.ndarray) -> str:
+    path = tempfile.NamedTemporaryFile(suffix=".ppm", delete=False).name
+    Image.fromarray(frame).save(path)
+    return path
+
+
+def test_file_source_reads_ppm_without_copying():
+    """Test that PPM pixels come back unchanged as a view of the file data."""
+    frame = synthetic_screen(640, 400, seed=7)
+    source = FileSource(_ppm_file(frame))
+    grabbed = source.grab()
+    assert grabbed.shape == frame.shape
+    assert np.array_equal(grabbed, frame)
+    assert not grabbed.flags.owndata and not grabbed.flags.writeable
+
+
+def test_parse_ppm_header_and_errors():
+    """Test header comments and malformed input."""
+    pixels = bytes(range(12))
+    frame = parse_ppm(b"P6\n# made by grim\n2 2\n255\n" + pixels)
+    assert frame.tolist()[1][0] == [6, 7, 8]
+    with pytest.raises(CaptureError):
+        parse_ppm(b"\x89PNG\r\n")
+    with pytest.raises(CaptureError):
+        parse_ppm(b"P6 2 2 255\n" + pixels[:-1])
+    with pytest.raises(CaptureError):
+        parse_ppm(b"P6 2 2 65535\n" + pixels * 2)
+
+
+def test_to_gray_uses_rgb_order():
+    """Test that red is weighted as red, for arrays and PIL images."""
+    red = np.zeros((1, 1, 3), np.uint8)
+    red[..., 0] = 255
+    assert to_gray(red)[0, 0] == 76
+    assert to_gray(Image.fromarray(red))[0, 0] == 76
+    assert to_gray(Image.fromarray(red).convert("RGBA"))[0, 0] == 76
+    gray = np.zeros((4, 4), np.uint8)
+    assert to_gray(gray) is gray
+
+
+def test_capture_gray_feeds_detection():
+    """Test the fake source end to end against detecting a PIL screenshot."""
+    frame = synthetic_screen(800, 600, seed=8)
+    screen_capture.set_source(FileSource(_ppm_file(frame)))
+    try:
+        children = detect_elements(screen_capture.capture_gray())
+    finally:
+        screen_capture.set_source(None)
+    expected = detect_elements(Image.fromarray(frame))
+    assert [(c.absolute_position, c.width, c.height) for c in children] == [
+        (c.absolute_position, c.width, c.height) for c in expected
+    ]
+
+
+# Writes frames 1, 2, ... (every byte set to the frame number) to stdout.
+_PRODUCER = """
+import sys, time
+count, delay, linger = {count}, {delay}, {linger}
+time.sleep({startup})
+for k in range(1, count + 1):
+    sys.stdout.buffer.write(bytes([k % 256]) * ({width} * {height} * 3))
+    sys.stdout.buffer.flush()
+    time.sleep(delay)
+time.sleep(linger)
+"""
+
+
+def _stream(count, size, delay=0.0, linger=30.0, startup=0.0, seeded=False, **kwargs):
+    script = _PRODUCER.format(
+        count=count,
+        delay=delay,
+        linger=linger,
+        startup=startup,
+        width=size[0],
+        height=size[1],
+    )
+    command = [sys.executable, "-c", script]
+    return StreamSource(command, size=None if seeded else size, **kwargs)
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_stream_serves_latest_frame_without_copying():
+    """Test that grab returns a view of the newest streamed frame."""
+    source = _stream(3, (32, 16))
+    try:
+        _wait_for(lambda: source.frames == 3)
+        frame = source.grab()
+        assert frame.shape == (16, 32, 3)
+        assert (frame == 3).all()
+        assert not frame.flags.writeable
+        assert source.grab() is frame
+    finally:
+        source.close()
+
+
+def test_stream_keeps_grabbed_frame_intact():
+    """Test that a grabbed buffer is not reused while frames keep coming."""
+    source = _stream(1000, (64, 64), delay=0.001)
+    try:
+        _wait_for(lambda: source.frames >= 5)
+        frame = source.grab()
+        value = int(frame[0, 0, 0])
+        before = source.frames
+        _wait_for(lambda: source.frames >= before + 20)
+        assert (frame == value).all()
+    finally:
+        source.close()
+
+
+def test_stream_seeds_and_falls_back():
+    """Test the fallback frame before the first and after the last frame."""
+    still = np.random.default_rng(9).integers(0, 256, (30, 40, 3), np.uint8)
+    fallback = FileSource(_ppm_file(still))
+    source = _stream(
+        1, (40, 30), linger=0.0, startup=0.5, seeded=True, fallback=fallback
+    )
+    try:
+        assert (source.width, source.height) == (40, 30)
+        assert np.array_equal(source.grab(), still)
+        _wait_for(lambda: not source.alive)
+        assert source.frames == 1
+        assert np.array_equal(source.grab(), still)
+    finally:
+        source.close()
+
+
+def test_stream_records_and_sizes_one_output():
+    """Test that stream mode needs an output and uses it for both processes."""
+    with pytest.raises(CaptureError):
+        StreamSource(output=None)
+
+    outputs = []
+    original = screen_capture.wf_recorder_command
+
+    def command(output):
+        outputs.append(output)
+        return [sys.executable, "-c", "pass"]
+
+    screen_capture.wf_recorder_command = command
+    try:
+        source = StreamSource(size=(8, 8), output="DP-2")
+        source.close()
+    finally:
+        screen_capture.wf_recorder_command = original
+    assert outputs == ["DP-2"]
+    assert source.fallback.output == "DP-2"
+    assert "--output=DP-2" in original("DP-2")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Screen Capture Tests")
+    print("=" * 60)
+
+    for test in (
+        test_file_source_reads_ppm_without_copying,
+        test_parse_ppm_header_and_errors,
+        test_to_gray_uses_rgb_order,
+        test_capture_gray_feeds_detection,
+        test_stream_serves_latest_frame_without_copying,
+        test_stream_keeps_grabbed_frame_intact,
+        test_stream_seeds_and_falls_back,
+        test_stream_records_and_sizes_one_output,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
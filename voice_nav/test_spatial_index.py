@@ -0,0 +1,99 @@
+"""Test the element grid index and pointer snapping against brute force."""
+
+import numpy as np
+
+from spatial_index import PointerSnapper, SpatialIndex
+
+
+def _boxes(count: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    xy = rng.integers(0, 1500, (count, 2))
+    wh = rng.integers(4, 160, (count, 2))
+    return np.concatenate([xy, wh], axis=1)
+
+
+def _distances(boxes, x, y):
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+    dx = np.maximum.reduce([x0 - x, np.zeros(len(boxes)), x - x1])
+    dy = np.maximum.reduce([y0 - y, np.zeros(len(boxes)), y - y1])
+    return np.hypot(dx, dy)
+
+
+def test_queries_match_brute_force():
+    """Test point, rectangle and nearest queries on random boxes."""
+    boxes = _boxes(300)
+    index = SpatialIndex(boxes)
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+    areas = boxes[:, 2] * boxes[:, 3]
+    rng = np.random.default_rng(1)
+    for x, y in rng.uniform(-100, 1800, (200, 2)):
+        inside = np.flatnonzero((x0 <= x) & (x < x1) & (y0 <= y) & (y < y1))
+        assert index.at(x, y) == sorted(inside, key=lambda i: (areas[i], i))
+
+        rx1, ry1 = x + 120, y + 80
+        overlap = (x0 < rx1) & (x1 > x) & (y0 < ry1) & (y1 > y)
+        assert index.in_rect(x, y, rx1, ry1) == np.flatnonzero(overlap).tolist()
+
+        d = _distances(boxes, x, y)
+        for k, max_dist in ((1, np.inf), (5, np.inf), (3, 40.0)):
+            got = index.nearest(x, y, k, max_dist)
+            expected = [i for i in np.lexsort((areas, d)) if d[i] <= max_dist][:k]
+            assert np.allclose(d[got], d[expected])
+
+
+def test_empty_index():
+    """Test that an index without boxes answers every query with nothing."""
+    index = SpatialIndex(np.empty((0, 4)))
+    assert len(index) == 0
+    assert index.at(5, 5) == []
+    assert index.in_rect(0, 0, 100, 100) == []
+    assert index.nearest(5, 5, 3) == []
+
+
+def test_nearest_examines_few_boxes():
+    """Test that a nearest query measures only the boxes around the point."""
+    index = SpatialIndex(_boxes(500))
+    distance = index.distance
+    examined = []
+
+    def counting(i, x, y):
+        examined[-1] += 1
+        return distance(i, x, y)
+
+    index.distance = counting
+    for x, y in np.random.default_rng(2).uniform(0, 1600, (1000, 2)).tolist():
+        examined.append(0)
+        index.nearest(x, y)
+    assert max(examined) < len(index) // 5
+    assert sum(examined) / len(examined) < 25
+
+
+def test_snapper_dwell_lock_and_release():
+    """Test snapping after a dwell, holding while slow, and releasing."""
+    index = SpatialIndex(np.array([(100, 100, 40, 20), (400, 400, 40, 40)]))
+    snapper = PointerSnapper(radius=50, max_speed=10, dwell_frames=3)
+    snapper.set_index(index)
+
+    # Moving fast: never snaps.
+    for x in range(0, 300, 30):
+        assert snapper.apply(x, 90, x, 90) == (x, 90)
+
+    # Dwelling next to the first box snaps to its center on the third slow
+    # frame; the jump there is not slow.
+    assert snapper.apply(95, 95, 95, 95) == (95, 95)
+    assert snapper.apply(95, 95, 95, 95) == (95, 95)
+    assert snapper.apply(96, 95, 96, 95) == (96, 95)
+    assert snapper.apply(97, 95, 97, 95) == (120, 110)
+    assert snapper.apply(99, 97, 99, 97) == (120, 110)
+
+    # A fast move releases the lock.
+    assert snapper.apply(300, 300, 300, 300) == (300, 300)
+
+    # A new index drops the lock.
+    for _ in range(3):
+        result = snapper.apply(420, 420, 420, 420)
+    assert result == (420, 420)
+    snapper.set_index(SpatialIndex(np.array([(0, 0, 10, 10)])))
+    assert snapper.apply(421, 420, 421, 420) == (421, 420)
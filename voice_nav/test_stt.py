@@ -0,0 +1,124 @@
+"""Test in-memory audio decoding for local transcription."""
+
+import asyncio
+import io
+import shutil
+import wave
+
+import numpy as np
+
+import stt
+from stt import SAMPLE_RATE, decode_audio_bytes
+
+
+def _tone(seconds: float = 0.5, rate: int = SAMPLE_RATE) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return (0.25 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def _wav_bytes(audio: np.ndarray, rate: int = SAMPLE_RATE, channels: int = 1):
+    pcm = (audio * 32767).astype("<i2")
+    if channels > 1:
+        pcm = np.repeat(pcm, channels)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+class _NoSubprocess:
+    """Fail loudly if decoding shells out."""
+
+    def __enter__(self):
+        self.original = stt.subprocess.run
+        stt.subprocess.run = self._fail
+        return self
+
+    def __exit__(self, *exc):
+        stt.subprocess.run = self.original
+
+    @staticmethod
+    def _fail(*args, **kwargs):
+        raise AssertionError("ffmpeg should not be called")
+
+
+def test_wav_skips_ffmpeg():
+    """Test that 16 kHz WAV (mono and stereo) decodes in-process."""
+    audio = _tone()
+    with _NoSubprocess():
+        mono = decode_audio_bytes(_wav_bytes(audio))
+        stereo = decode_audio_bytes(_wav_bytes(audio, channels=2))
+    assert mono.dtype == np.float32 and len(mono) == len(audio)
+    assert np.allclose(mono, audio, atol=1e-3)
+    assert np.allclose(stereo, audio, atol=1e-3)
+
+
+def test_raw_pcm_skips_ffmpeg():
+    """Test that raw 16 kHz PCM16 is read straight into an array."""
+    audio = _tone()
+    with _NoSubprocess():
+        decoded = decode_audio_bytes(
+            (audio * 32767).astype("<i2").tobytes(), pcm_sample_rate=SAMPLE_RATE
+        )
+    assert np.allclose(decoded, audio, atol=1e-3)
+
+
+def test_truncated_raw_pcm_is_transcribed():
+    """Test that raw PCM cut off mid-sample still decodes and transcribes."""
+    pcm = (_tone() * 32767).astype("<i2").tobytes()[:-1]
+    with _NoSubprocess():
+        decoded = decode_audio_bytes(pcm, pcm_sample_rate=SAMPLE_RATE)
+    assert len(decoded) == len(pcm) // 2
+
+    class _Engine:
+        async def transcribe_async(self, audio):
+            return f"{len(audio)} samples"
+
+    original = stt._engine
+    stt._engine = _Engine()
+    try:
+        text = asyncio.run(stt.transcribe_audio_bytes(pcm, pcm_sample_rate=SAMPLE_RATE))
+    finally:
+        stt._engine = original
+    assert text == f"{len(pcm) // 2} samples"
+
+
+def test_resampled_wav_goes_through_ffmpeg_pipe():
+    """Test the ffmpeg stdin/stdout path when resampling is needed."""
+    if shutil.which("ffmpeg") is None:
+        print("ffmpeg not installed, skipping")
+        return
+    decoded = decode_audio_bytes(_wav_bytes(_tone(rate=44100), rate=44100))
+    assert abs(len(decoded) - len(_tone())) < 200
+
+
+def test_ffmpeg_failure_raises():
+    """Test that undecodable input raises instead of returning silence."""
+    if shutil.which("ffmpeg") is None:
+        print("ffmpeg not installed, skipping")
+        return
+    try:
+        decode_audio_bytes(b"definitely not audio")
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("STT Decoding Tests")
+    print("=" * 60)
+
+    for test in (
+        test_wav_skips_ffmpeg,
+        test_raw_pcm_skips_ffmpeg,
+        test_truncated_raw_pcm_is_transcribed,
+        test_resampled_wav_goes_through_ffmpeg_pipe,
+        test_ffmpeg_failure_raises,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,96 @@
+"""Test hedged STT routing with fake backends."""
+
+import threading
+import time
+
+import numpy as np
+
+from stt_router import STTRouter
+
+AUDIO = np.ones(1600, dtype=np.float32)
+
+
+def _backend(text: str, delay: float, fail: bool = False, log: list = None):
+    def run(audio, sample_rate, cancel: threading.Event):
+        if cancel.wait(delay) and log is not None:
+            log.append("cancelled")
+        if fail:
+            raise RuntimeError(f"{text} failed")
+        return text
+
+    return run
+
+
+def test_first_acceptable_result_wins():
+    """Test that the faster backend answers and the loser is cancelled."""
+    log = []
+    router = STTRouter(
+        {"cloud": _backend("slow", 0.5, log=log), "local": _backend("fast", 0.01)}
+    )
+    start = time.perf_counter()
+    assert router.transcribe(AUDIO) == "fast"
+    assert time.perf_counter() - start < 0.3
+    time.sleep(0.05)
+    assert log == ["cancelled"]
+    assert router.summary()["local"]["wins"] == 1
+
+
+def test_empty_transcript_is_not_acceptable():
+    """Test that a fast empty answer doesn't beat a real one."""
+    router = STTRouter({"cloud": _backend("hello", 0.1), "local": _backend("", 0.0)})
+    assert router.transcribe(AUDIO) == "hello"
+
+
+def test_preferred_backend_within_deadline():
+    """Test that the preferred backend wins if it arrives before the deadline."""
+    router = STTRouter(
+        {"cloud": _backend("cloud", 0.1), "local": _backend("local", 0.0)},
+        prefer="cloud",
+        prefer_deadline_sec=0.5,
+    )
+    assert router.transcribe(AUDIO) == "cloud"
+
+
+def test_preferred_backend_past_deadline():
+    """Test that a slow preferred backend is abandoned at the deadline."""
+    router = STTRouter(
+        {"cloud": _backend("cloud", 1.0), "local": _backend("local", 0.0)},
+        prefer="cloud",
+        prefer_deadline_sec=0.1,
+    )
+    start = time.perf_counter()
+    assert router.transcribe(AUDIO) == "local"
+    assert time.perf_counter() - start < 0.5
+
+
+def test_all_backends_fail_raises_first_error():
+    """Test that the first backend's error is raised when all fail."""
+    router = STTRouter(
+        {
+            "cloud": _backend("cloud", 0.05, fail=True),
+            "local": _backend("local", 0.0, fail=True),
+        }
+    )
+    try:
+        router.transcribe(AUDIO)
+    except RuntimeError as e:
+        assert "cloud failed" in str(e)
+    else:
+        raise AssertionError("expected RuntimeError")
+    assert router.summary()["local"]["errors"] == 1
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("STT Router Tests")
+    print("=" * 60)
+
+    for test in (
+        test_first_acceptable_result_wins,
+        test_empty_transcript_is_not_acceptable,
+        test_preferred_backend_within_deadline,
+        test_preferred_backend_past_deadline,
+        test_all_backends_fail_raises_first_error,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
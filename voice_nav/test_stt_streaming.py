@@ -0,0 +1,147 @@
+"""Test streaming STT against a local fake realtime server."""
+
+import base64
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from websockets.sync.server import serve
+
+import stt_streaming
+from stt_elevenlabs import ElevenLabsSTTError
+from stt_streaming import stream_transcribe
+
+
+class FakeRealtimeServer:
+    """Websocket stand-in for the ElevenLabs realtime STT endpoint.
+
+    Sends a partial transcript per audio chunk and a committed transcript
+    once the client commits. ``fail_with`` makes it reply with an error.
+    """
+
+    def __init__(self, final_text: str = "type hello", fail_with: str = ""):
+        self.final_text = final_text
+        self.fail_with = fail_with
+        self.samples_received = 0
+        self.headers = {}
+        self._server = serve(self._handle, "127.0.0.1", 0)
+        self.url = f"ws://127.0.0.1:{self._server.socket.getsockname()[1]}"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self._server.shutdown()
+
+    def _handle(self, ws):
+        self.headers = dict(ws.request.headers)
+        ws.send(json.dumps({"message_type": "session_started"}))
+        if self.fail_with:
+            ws.send(json.dumps({"message_type": "auth_error", "error": self.fail_with}))
+            return
+        for raw in ws:
+            msg = json.loads(raw)
+            audio = base64.b64decode(msg["audio_base_64"])
+            self.samples_received += len(audio) // 2
+            if msg["commit"]:
+                ws.send(
+                    json.dumps(
+                        {
+                            "message_type": "committed_transcript",
+                            "text": self.final_text,
+                        }
+                    )
+                )
+            else:
+                words = self.final_text.split()
+                partial = " ".join(
+                    words[: min(len(words), self.samples_received // 320)]
+                )
+                ws.send(
+                    json.dumps({"message_type": "partial_transcript", "text": partial})
+                )
+
+
+def _chunks(count: int = 5, size: int = 320):
+    for _ in range(count):
+        yield np.zeros(size, dtype=np.float32)
+
+
+def test_partial_then_final_events():
+    """Test that partials arrive before the final transcript."""
+    server = FakeRealtimeServer()
+    try:
+        events = list(stream_transcribe(_chunks(), api_key="test-key", url=server.url))
+    finally:
+        server.close()
+
+    assert events[-1].is_final and events[-1].text == "type hello"
+    assert all(not e.is_final for e in events[:-1]) and len(events) == 6
+    assert server.samples_received == 5 * 320
+    assert server.headers.get("xi-api-key") == "test-key"
+
+
+class _LateEvent(threading.Event):
+    """An event whose set() is slow, as if the setting thread lost the CPU."""
+
+    def set(self):
+        time.sleep(0.3)
+        super().set()
+
+
+def test_immediate_final_ends_stream():
+    """Test a final transcript that beats the sender thread back from the commit."""
+    server = FakeRealtimeServer()
+    original = stt_streaming.threading
+    stt_streaming.threading = SimpleNamespace(Event=_LateEvent, Thread=threading.Thread)
+    try:
+        start = time.perf_counter()
+        events = list(
+            stream_transcribe(
+                _chunks(), api_key="test-key", url=server.url, timeout_sec=2.0
+            )
+        )
+    finally:
+        stt_streaming.threading = original
+        server.close()
+
+    assert events[-1].is_final and events[-1].text == "type hello"
+    assert time.perf_counter() - start < 1.5
+
+
+def test_server_error_raises_stt_error():
+    """Test that server-side errors surface as ElevenLabsSTTError."""
+    server = FakeRealtimeServer(fail_with="invalid api key")
+    try:
+        list(stream_transcribe(_chunks(), api_key="bad", url=server.url))
+    except ElevenLabsSTTError as e:
+        assert "invalid api key" in str(e)
+    else:
+        raise AssertionError("expected ElevenLabsSTTError")
+    finally:
+        server.close()
+
+
+def test_connection_refused_raises_stt_error():
+    """Test that an unreachable endpoint surfaces as ElevenLabsSTTError."""
+    try:
+        list(stream_transcribe(_chunks(), api_key="k", url="ws://127.0.0.1:9"))
+    except ElevenLabsSTTError:
+        pass
+    else:
+        raise AssertionError("expected ElevenLabsSTTError")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Streaming STT Tests")
+    print("=" * 60)
+
+    for test in (
+        test_partial_then_final_events,
+        test_immediate_final_ends_stream,
+        test_server_error_raises_stt_error,
+        test_connection_refused_raises_stt_error,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,113 @@
+"""Test screenshot downscaling, encoding, cropping and caching."""
+
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+import vision_payload
+from vision_payload import EncodeOptions, _focused_rect, encode_image, encode_screenshot
+
+
+def _screenshot(width: int = 2240, height: int = 1400, seed: int = 0) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    pixels = np.full((height, width, 3), 235, dtype=np.uint8)
+    # A photo-like region (wallpaper, video, image preview) next to flat UI.
+    photo = rng.normal(128, 40, (height // 2, width // 2, 3))
+    pixels[: height // 2, : width // 2] = np.clip(photo, 0, 255)
+    for _ in range(40):
+        x, y = rng.integers(0, width - 200), rng.integers(0, height - 60)
+        pixels[y : y + 40, x : x + 180] = rng.integers(0, 255, 3)
+    return Image.fromarray(pixels)
+
+
+def _decode(data_url: str) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(data_url.split(",", 1)[1])))
+
+
+def test_downscale_and_formats():
+    """Test max-edge downscaling and that JPEG/WebP beat full-size PNG."""
+    shot = _screenshot()
+    png = encode_image(shot, max_edge=0, fmt="png")
+    for fmt in ("jpeg", "webp"):
+        img = encode_image(shot, max_edge=1280, fmt=fmt, quality=80)
+        assert (img.width, img.height) == (1280, 800)
+        assert _decode(img.data_url).size == (1280, 800)
+        assert img.data_url.startswith(f"data:image/{fmt};base64,")
+        assert img.upload_bytes < png.upload_bytes / 2
+        print(f"  {fmt}: {img.upload_bytes} vs png {png.upload_bytes} bytes")
+
+
+def test_focused_rect_scales_logical_coordinates():
+    """Test that sway's logical window rect is mapped to screenshot pixels."""
+    tree = {
+        "rect": {"x": 0, "y": 0, "width": 1120, "height": 700},
+        "nodes": [
+            {
+                "type": "workspace",
+                "nodes": [
+                    {"type": "con", "focused": False, "rect": {}},
+                    {
+                        "type": "con",
+                        "focused": True,
+                        "rect": {"x": 560, "y": 0, "width": 560, "height": 700},
+                    },
+                ],
+            }
+        ],
+    }
+    assert _focused_rect(tree, (2240, 1400)) == (1120, 0, 2240, 1400)
+
+    # A second output left of the primary puts the layout origin at -1120.
+    tree["rect"].update(x=-1120, width=2240)
+    focused = tree["nodes"][0]["nodes"][1]["rect"]
+    focused.update(x=-1120, width=560, height=350)
+    assert _focused_rect(tree, (4480, 1400)) == (0, 0, 1120, 700)
+    assert _focused_rect({"rect": {"width": 10}, "nodes": []}, (20, 20)) is None
+
+
+def test_crop_sends_window_and_thumbnail():
+    """Test that window cropping adds a low-res context thumbnail."""
+    original = vision_payload.focused_window_rect
+    vision_payload.focused_window_rect = lambda size: (100, 100, 900, 600)
+    try:
+        images = encode_screenshot(
+            _screenshot(seed=1), EncodeOptions(crop_focused=True)
+        ).result()
+    finally:
+        vision_payload.focused_window_rect = original
+    assert [img.label for img in images][0] == "focused window"
+    assert (images[0].width, images[0].height) == (800, 500)
+    assert max(images[1].width, images[1].height) == vision_payload.THUMBNAIL_EDGE
+
+
+def test_identical_screenshot_is_not_reencoded():
+    """Test cache hits for the same object and for a pixel-identical copy."""
+    shot = _screenshot(seed=2)
+    options = EncodeOptions(crop_focused=False)
+    first = encode_screenshot(shot, options)
+    assert encode_screenshot(shot, options) is first
+    first.result()
+
+    before = vision_payload.cache_stats()
+    again = encode_screenshot(shot.copy(), options).result()
+    after = vision_payload.cache_stats()
+    assert again is first.result()
+    assert after["misses"] == before["misses"]
+    assert after["hits"] == before["hits"] + 1
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Vision Payload Tests")
+    print("=" * 60)
+
+    for test in (
+        test_downscale_and_formats,
+        test_focused_rect_scales_logical_coordinates,
+        test_crop_sends_window_and_thumbnail,
+        test_identical_screenshot_is_not_reencoded,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
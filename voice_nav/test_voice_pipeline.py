@@ -0,0 +1,197 @@
+"""Test that the voice pipeline overlaps screen work with speech."""
+
+import asyncio
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("evdev")
+
+import ai_client
+import main
+import screen_capture
+import vision_payload
+from schemas import Command
+from screen_capture import FileSource
+from test_incremental_detection import synthetic_screen
+
+SCREEN_SEC = 0.3
+SPEECH_SEC = 0.3
+
+
+@contextmanager
+def _patched(module, **attrs):
+    originals = {name: getattr(module, name) for name in attrs}
+    for name, value in attrs.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(module, name, value)
+
+
+class _SlowFileSource(FileSource):
+    """A file served as the screen, as slow to grab as a real capture."""
+
+    def grab(self):
+        time.sleep(SCREEN_SEC)
+        return super().grab()
+
+
+def _resolve(path: str):
+    async def transcribe(audio_path):
+        await asyncio.sleep(SPEECH_SEC)
+        return "click the blue button"
+
+    async def plan(transcript, blocks):
+        return Command(action="noop", confidence=1.0, reason="test")
+
+    screen_capture.set_source(_SlowFileSource(path))
+    try:
+        with _patched(main, transcribe_audio_file=transcribe, plan_command=plan):
+            return asyncio.run(main.resolve_voice_command("unused.wav"))
+    finally:
+        screen_capture.set_source(None)
+
+
+def test_screen_analysis_overlaps_transcription():
+    """Test that total latency is the longer of screen and speech, not the sum."""
+    path = tempfile.NamedTemporaryFile(suffix=".png", delete=False).name
+    Image.fromarray(synthetic_screen(1280, 800, seed=3)).save(path)
+    result = _resolve(path)
+
+    timings = result.timings
+    assert set(timings) == {
+        "total",
+        "screen",
+        "speech",
+        "plan",
+        "screenshot",
+        "detect",
+        "hints",
+        "blocks",
+    }
+    assert result.transcript == "click the blue button"
+    assert result.blocks
+    assert timings["screenshot"] >= SCREEN_SEC * 1000
+    assert timings["speech"] >= SPEECH_SEC * 1000
+    substages = sum(timings[k] for k in ("screenshot", "detect", "hints", "blocks"))
+    assert substages <= timings["screen"]
+
+    # Run one after the other, the stages would take screen + speech.
+    longer = max(timings["screen"], timings["speech"])
+    shorter = min(timings["screen"], timings["speech"])
+    assert timings["total"] < longer + timings["plan"] + 50
+    assert timings["total"] < longer + shorter / 2
+
+
+def test_speculative_capture_is_reused_for_vision():
+    """Test that capture and encode run during speech and the AI query reuses them."""
+    shot = Image.fromarray(synthetic_screen(1280, 800, seed=5))
+    seen = {}
+
+    def spy(name):
+        def encode(screenshot):
+            future = vision_payload.encode_screenshot(screenshot)
+            seen[name] = (screenshot, future)
+            return future
+
+        return encode
+
+    def transcribe():
+        time.sleep(SPEECH_SEC)
+        future = seen.get("speculative", (None, None))[1]
+        seen["encoded_during_speech"] = future is not None and future.done()
+        return "AI what is in this window"
+
+    def stream_completion(payload, key, timeout):
+        seen["payload"] = payload
+        yield "A terminal."
+
+    def type_stream(deltas, start=None):
+        seen["typed"] = "".join(deltas)
+        return seen["typed"]
+
+    before = vision_payload.cache_stats()
+    with _patched(
+        main,
+        prewarm=lambda *urls: None,
+        grab_screen=lambda: shot,
+        encode_screenshot=spy("speculative"),
+        transcribe_from_mic=transcribe,
+        save_screenshot=lambda screenshot: seen.setdefault("saved", screenshot),
+        stream_openrouter_with_vision=partial(
+            ai_client.stream_openrouter_with_vision, api_key="test-key"
+        ),
+        type_stream=type_stream,
+    ), _patched(
+        ai_client,
+        encode_screenshot=spy("request"),
+        _stream_completion=stream_completion,
+    ):
+        main.on_voice_hotkey()
+        main._capture_pool.submit(lambda: None).result()
+    after = vision_payload.cache_stats()
+
+    assert seen["encoded_during_speech"]
+    assert seen["typed"] == "A terminal."
+    assert seen["saved"] is shot
+    # The request got the speculative screenshot and its in-flight encode.
+    assert seen["request"][0] is shot
+    assert seen["request"][1] is seen["speculative"][1]
+    assert after["misses"] == before["misses"] + 1
+    urls = [
+        part["image_url"]["url"]
+        for part in seen["payload"]["messages"][1]["content"]
+        if part["type"] == "image_url"
+    ]
+    assert urls == [img.data_url for img in seen["speculative"][1].result()]
+
+
+def test_typing_does_not_wait_for_capture():
+    """Test that a transcript without "AI" is typed while the capture runs."""
+    shot = Image.fromarray(synthetic_screen(640, 400, seed=6))
+    grabbed = threading.Event()
+    typed = []
+
+    def slow_grab():
+        time.sleep(1.0)
+        grabbed.set()
+        return shot
+
+    with _patched(
+        main,
+        prewarm=lambda *urls: None,
+        grab_screen=slow_grab,
+        transcribe_from_mic=lambda: "type hello world",
+        type_text=typed.append,
+    ):
+        start = time.perf_counter()
+        main.on_voice_hotkey()
+        elapsed = time.perf_counter() - start
+        was_grabbed = grabbed.is_set()
+        main._capture_pool.submit(lambda: None).result()
+
+    assert typed == ["hello world"]
+    assert not was_grabbed
+    assert elapsed < 0.5
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Voice Pipeline Tests")
+    print("=" * 60)
+
+    for test in (
+        test_screen_analysis_overlaps_transcription,
+        test_speculative_capture_is_reused_for_vision,
+        test_typing_does_not_wait_for_capture,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
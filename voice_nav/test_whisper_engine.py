@@ -0,0 +1,179 @@
+"""Test WhisperEngine loading, threading and backends with stub models."""
+
+import asyncio
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+
+import stt
+from stt import WhisperEngine
+
+
+class _StubWhisperModel:
+    """Stands in for a PyTorch whisper model."""
+
+    def __init__(self, delay_sec: float = 0.0):
+        self.delay_sec = delay_sec
+        self.calls = []
+
+    def transcribe(self, audio, fp16):
+        self.calls.append((audio, fp16, threading.current_thread().name))
+        time.sleep(self.delay_sec)
+        return {"text": " open the browser "}
+
+
+class _StubFasterWhisperModel:
+    """Stands in for faster_whisper.WhisperModel; decodes lazily by segment."""
+
+    def __init__(self, model_name, device, compute_type):
+        self.args = (model_name, device, compute_type)
+        self.decoded = 0
+        self.on_segment = None
+
+    def transcribe(self, audio, beam_size):
+        def segments():
+            for text in (" one", " two", " three"):
+                self.decoded += 1
+                if self.on_segment is not None:
+                    self.on_segment()
+                yield SimpleNamespace(text=text)
+
+        return segments(), None
+
+
+@contextmanager
+def _backends(load_delay_sec: float = 0.0, transcribe_delay_sec: float = 0.0):
+    """Install stub ``whisper`` and ``faster_whisper`` modules."""
+    loads = []
+
+    def load_model(name, device):
+        loads.append((name, device, threading.current_thread().name))
+        time.sleep(load_delay_sec)
+        return _StubWhisperModel(transcribe_delay_sec)
+
+    stubs = {
+        "whisper": SimpleNamespace(load_model=load_model),
+        "faster_whisper": SimpleNamespace(WhisperModel=_StubFasterWhisperModel),
+    }
+    originals = {name: sys.modules.get(name) for name in stubs}
+    sys.modules.update(stubs)
+    try:
+        yield loads
+    finally:
+        for name, module in originals.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+def test_preload_loads_off_thread():
+    """Test that preload returns at once and loads once on the worker thread."""
+    with _backends(load_delay_sec=0.2) as loads:
+        engine = WhisperEngine(model_name="tiny", backend="whisper")
+        start = time.perf_counter()
+        future = engine.preload()
+        assert time.perf_counter() - start < 0.1
+        assert not future.done()
+        assert engine.preload() is future
+        assert isinstance(engine.model, _StubWhisperModel)
+    assert len(loads) == 1
+    assert loads[0][:2] == ("tiny", "cpu")
+    assert loads[0][2].startswith("whisper")
+
+
+def test_transcribe_async_does_not_block_loop():
+    """Test that the event loop keeps running while a transcription is decoding."""
+    with _backends(transcribe_delay_sec=0.3):
+        engine = WhisperEngine(backend="whisper")
+
+        async def run():
+            ticks = 0
+            task = asyncio.ensure_future(engine.transcribe_async(np.zeros(16000)))
+            while not task.done():
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return await task, ticks
+
+        text, ticks = asyncio.run(run())
+    assert text == "open the browser"
+    assert ticks >= 10
+    assert engine.model.calls[0][2].startswith("whisper")
+
+
+def test_numpy_input_goes_straight_to_the_model():
+    """Test that samples are handed to the model as is, without a temp file."""
+    audio = np.zeros(8000, dtype=np.float32)
+    with _backends():
+        engine = WhisperEngine(backend="whisper")
+        assert engine.transcribe(audio) == "open the browser"
+    passed, fp16, _ = engine.model.calls[0]
+    assert passed is audio
+    assert fp16 is False
+
+
+def test_backend_and_compute_type_from_environment():
+    """Test that the shared engine follows the VOICE_NAV_* variables."""
+    env = {
+        "VOICE_NAV_STT_BACKEND": "faster-whisper",
+        "VOICE_NAV_WHISPER_MODEL": "small",
+        "VOICE_NAV_WHISPER_COMPUTE_TYPE": "int8_float32",
+    }
+    originals = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        importlib.reload(stt)
+        with _backends():
+            engine = stt.get_engine()
+            assert engine.backend == "faster-whisper"
+            assert engine.model.args == ("small", "cpu", "int8_float32")
+    finally:
+        for name, value in originals.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        importlib.reload(stt)
+    assert stt.DEFAULT_BACKEND == os.getenv("VOICE_NAV_STT_BACKEND", "whisper")
+
+    try:
+        WhisperEngine(backend="vosk")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected ValueError")
+
+
+def test_cancel_stops_decoding_between_segments():
+    """Test that setting cancel stops faster-whisper decoding more segments."""
+    with _backends():
+        engine = WhisperEngine(backend="faster-whisper")
+        cancel = threading.Event()
+        engine.model.on_segment = cancel.set
+        assert engine.transcribe(np.zeros(16000), cancel=cancel) == ""
+        assert engine.model.decoded == 1
+
+        engine.model.on_segment = None
+        assert engine.transcribe(np.zeros(16000)) == "one two three"
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Whisper Engine Tests")
+    print("=" * 60)
+
+    for test in (
+        test_preload_loads_off_thread,
+        test_transcribe_async_does_not_block_loop,
+        test_numpy_input_goes_straight_to_the_model,
+        test_backend_and_compute_type_from_environment,
+        test_cancel_stops_decoding_between_segments,
+    ):
+        test()
+        print(f"✓ {test.__name__}")
@@ -1,7 +1,17 @@
 """Keyboard typing helpers using ydotool."""
 
+import logging
+import re
 import subprocess
+import threading
 import time
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Text up to the last sentence end or word break is safe to type; the rest
+# may still be the start of a longer word.
+_BREAK = re.compile(r"[.!?;:,]\s|\s")
 
 
 def type_text(text: str, delay: float = 0.01):
@@ -9,3 +19,110 @@ def type_text(text: str, delay: float = 0.01):
     subprocess.run(["wl-copy"], input=text, text=True, check=True)
     time.sleep(0.05)
     subprocess.run(["ydotool", "key", "29:1", "47:1", "47:0", "29:0"], check=True)
+
+
+class IncrementalTyper:
+    """Type streamed text into the focused field as whole words arrive.
+
+    ``push`` only buffers; a background thread pastes everything up to the
+    last word or sentence break whenever it is free. The first word goes
+    out as soon as it is complete, and while a paste is running later
+    tokens pile up and go out together, so a fast stream doesn't turn into
+    one paste per token.
+
+    Args:
+        type_fn: Sink for each chunk (defaults to ``type_text``)
+        start: ``time.perf_counter()`` value that time-to-first-character is
+            measured from (defaults to construction time)
+    """
+
+    def __init__(
+        self,
+        type_fn: Callable[[str], None] = type_text,
+        start: Optional[float] = None,
+    ):
+        self.type_fn = type_fn
+        self.start = time.perf_counter() if start is None else start
+        self.first_char_ms: Optional[float] = None
+        self.typed = ""
+        self._pending = ""
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="typer")
+        self._thread.start()
+
+    def push(self, text: str):
+        """Queue streamed text."""
+        with self._cond:
+            if not self.typed and not self._pending:
+                text = text.lstrip()
+            self._pending += text
+            self._cond.notify()
+
+    def finish(self) -> str:
+        """Type whatever is left and return everything typed.
+
+        Raises:
+            The sink's exception if a paste failed
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self.typed
+
+    def _take(self) -> Optional[str]:
+        # Called with the lock held; waits until a chunk is ready.
+        while True:
+            if self._error is not None:
+                return None
+            if self._closed:
+                chunk, self._pending = self._pending.rstrip(), ""
+                return chunk or None
+            cut = 0
+            for match in _BREAK.finditer(self._pending):
+                cut = match.end()
+            # Hold back trailing whitespace so the response's end is trimmed.
+            chunk = self._pending[:cut].rstrip()
+            if chunk:
+                self._pending = self._pending[len(chunk) :]
+                return chunk
+            self._cond.wait()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                chunk = self._take()
+            if chunk is None:
+                return
+            try:
+                self.type_fn(chunk)
+            except BaseException as e:
+                self._error = e
+                return
+            if self.first_char_ms is None:
+                self.first_char_ms = (time.perf_counter() - self.start) * 1000
+                logger.info(f"Time to first character: {self.first_char_ms:.0f} ms")
+            self.typed += chunk
+
+
+def type_stream(
+    chunks: Iterable[str],
+    type_fn: Callable[[str], None] = type_text,
+    start: Optional[float] = None,
+) -> str:
+    """Type a token stream as it arrives and return the typed text.
+
+    Text typed before the stream raises stays typed; the exception is
+    re-raised once the typer has drained.
+    """
+    typer = IncrementalTyper(type_fn, start)
+    try:
+        for chunk in chunks:
+            typer.push(chunk)
+    finally:
+        typed = typer.finish()
+    return typed
@@ -0,0 +1,259 @@
+"""Screenshot encoding for vision model requests.
+
+Screenshots are downscaled, encoded as JPEG or WebP and optionally cropped
+to the focused window (with a small full-screen thumbnail for context)
+before upload. Encoding runs on a background thread and results are cached
+by image content, so the same screenshot is never encoded twice.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"jpeg": "image/jpeg", "webp": "image/webp", "png": "image/png"}
+MAX_EDGE = int(os.getenv("VOICE_NAV_VISION_MAX_EDGE", "1280"))
+FORMAT = os.getenv("VOICE_NAV_VISION_FORMAT", "jpeg")
+QUALITY = int(os.getenv("VOICE_NAV_VISION_QUALITY", "80"))
+CROP_FOCUSED = os.getenv("VOICE_NAV_VISION_CROP") == "window"
+THUMBNAIL_EDGE = 512
+THUMBNAIL_QUALITY = 60
+CACHE_SIZE = 8
+
+
+@dataclass(frozen=True)
+class EncodeOptions:
+    """How a screenshot is turned into upload images.
+
+    Attributes:
+        max_edge: Longest side after downscaling (0 keeps full resolution)
+        fmt: One of ``FORMATS``
+        quality: JPEG/WebP quality, 1-100
+        crop_focused: Send the focused window plus a context thumbnail
+        thumbnail_edge: Longest side of the context thumbnail
+    """
+
+    max_edge: int = MAX_EDGE
+    fmt: str = FORMAT
+    quality: int = QUALITY
+    crop_focused: bool = CROP_FOCUSED
+    thumbnail_edge: int = THUMBNAIL_EDGE
+
+
+@dataclass
+class EncodedImage:
+    """One encoded image ready to put in a request."""
+
+    data_url: str
+    label: str
+    width: int
+    height: int
+    encoded_bytes: int
+    encode_ms: float
+
+    @property
+    def upload_bytes(self) -> int:
+        return len(self.data_url)
+
+
+def focused_window_rect(image_size: tuple[int, int]) -> Optional[tuple]:
+    """Get the focused sway window as (left, top, right, bottom) pixels.
+
+    Sway reports logical coordinates; they are scaled to the screenshot
+    using the size of the root container. Returns None outside sway or when
+    nothing is focused.
+    """
+    try:
+        result = subprocess.run(
+            ["swaymsg", "-t", "get_tree", "-r"],
+            capture_output=True,
+            text=True,
+            timeout=1,
+            check=True,
+        )
+        tree = json.loads(result.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.debug(f"No focused window rect: {e}")
+        return None
+    return _focused_rect(tree, image_size)
+
+
+def _focused_rect(tree: dict, image_size: tuple[int, int]) -> Optional[tuple]:
+    stack = [tree]
+    focused = None
+    while stack:
+        node = stack.pop()
+        if node.get("focused") and node.get("type") in ("con", "floating_con"):
+            focused = node
+            break
+        stack.extend(node.get("nodes", []))
+        stack.extend(node.get("floating_nodes", []))
+    if focused is None or not tree.get("rect", {}).get("width"):
+        return None
+
+    scale = image_size[0] / tree["rect"]["width"]
+    rect = focused["rect"]
+    # Outputs left of or above the primary have negative coordinates.
+    x0 = rect["x"] - tree["rect"]["x"]
+    y0 = rect["y"] - tree["rect"]["y"]
+    box = (
+        max(0, round(x0 * scale)),
+        max(0, round(y0 * scale)),
+        min(image_size[0], round((x0 + rect["width"]) * scale)),
+        min(image_size[1], round((y0 + rect["height"]) * scale)),
+    )
+    if box[2] <= box[0] or box[3] <= box[1]:
+        return None
+    return box
+
+
+def _downscale(image: Image.Image, max_edge: int) -> Image.Image:
+    if max_edge <= 0 or max(image.size) <= max_edge:
+        return image
+    ratio = max_edge / max(image.size)
+    size = (max(1, round(image.width * ratio)), max(1, round(image.height * ratio)))
+    # reducing_gap does a fast integer box-reduce first, then a proper resample.
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+
+def encode_image(
+    image: Image.Image,
+    max_edge: int = MAX_EDGE,
+    fmt: str = FORMAT,
+    quality: int = QUALITY,
+    label: str = "screen",
+) -> EncodedImage:
+    """Downscale and encode one image into a base64 data URL."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown image format {fmt!r}; use one of {list(FORMATS)}")
+    start = time.perf_counter()
+    image = _downscale(image, max_edge)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    if fmt == "png":
+        image.save(buffer, format="PNG")
+    elif fmt == "webp":
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+    else:
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+    data = buffer.getvalue()
+    data_url = f"data:{FORMATS[fmt]};base64,{base64.b64encode(data).decode('ascii')}"
+    return EncodedImage(
+        data_url=data_url,
+        label=label,
+        width=image.width,
+        height=image.height,
+        encoded_bytes=len(data),
+        encode_ms=(time.perf_counter() - start) * 1000,
+    )
+
+
+def _encode_screenshot(screenshot: Image.Image, options: EncodeOptions):
+    box = focused_window_rect(screenshot.size) if options.crop_focused else None
+    if box is None:
+        return [
+            encode_image(screenshot, options.max_edge, options.fmt, options.quality)
+        ]
+    return [
+        encode_image(
+            screenshot.crop(box),
+            options.max_edge,
+            options.fmt,
+            options.quality,
+            label="focused window",
+        ),
+        encode_image(
+            screenshot,
+            options.thumbnail_edge,
+            options.fmt,
+            THUMBNAIL_QUALITY,
+            label="whole screen (low resolution)",
+        ),
+    ]
+
+
+class _EncodeCache:
+    """Encoded results keyed by screenshot content and options.
+
+    The same image object is matched without hashing, so a screenshot
+    handed in twice (e.g. speculatively, then for the real request) shares
+    one in-flight encode.
+    """
+
+    def __init__(self, size: int = CACHE_SIZE):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._by_content: OrderedDict[tuple, list[EncodedImage]] = OrderedDict()
+        self._recent: list[tuple] = []  # (weakref to image, options, future)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+
+    def submit(self, screenshot: Image.Image, options: EncodeOptions) -> Future:
+        with self._lock:
+            for ref, opts, future in self._recent:
+                if ref() is screenshot and opts == options:
+                    self.hits += 1
+                    return future
+            future = self._pool.submit(self._encode, screenshot, options)
+            live = [entry for entry in self._recent if entry[0]() is not None]
+            self._recent = live[-(self.size - 1) :]
+            self._recent.append((weakref.ref(screenshot), options, future))
+            return future
+
+    def _encode(self, screenshot: Image.Image, options: EncodeOptions):
+        digest = hashlib.blake2b(screenshot.tobytes(), digest_size=16).digest()
+        key = (digest, screenshot.size, screenshot.mode, options)
+        with self._lock:
+            if key in self._by_content:
+                self._by_content.move_to_end(key)
+                self.hits += 1
+                return self._by_content[key]
+            self.misses += 1
+
+        images = _encode_screenshot(screenshot, options)
+        for img in images:
+            logger.info(
+                f"Encoded {img.label} {img.width}x{img.height} {options.fmt}: "
+                f"{img.upload_bytes} bytes to upload in {img.encode_ms:.0f} ms"
+            )
+        with self._lock:
+            self._by_content[key] = images
+            while len(self._by_content) > self.size:
+                self._by_content.popitem(last=False)
+        return images
+
+
+_cache = _EncodeCache()
+
+
+def encode_screenshot(
+    screenshot: Image.Image, options: Optional[EncodeOptions] = None
+) -> Future:
+    """Start encoding a screenshot in the background.
+
+    Returns:
+        Future resolving to the list of ``EncodedImage`` to upload
+    """
+    return _cache.submit(screenshot, options or EncodeOptions())
+
+
+def cache_stats() -> dict:
+    """Encode cache hit/miss counts."""
+    return {"hits": _cache.hits, "misses": _cache.misses}